@@ -0,0 +1,187 @@
+# Columnar export of the replay log and play analytics over it.
+#
+#   python analytics.py export replay.bin plays.npz
+#   python analytics.py report plays.npz
+#
+# The export turns every recorded session into typed NumPy columns in one
+# .npz file: one row per accepted flip, per turn (pair of flips and its match
+# check) and per session. Card faces are not in the log; each board is dealt
+# again from its seed. The report works on whole columns at once, so it takes
+# about as long for millions of flips as for a handful of games.
+import argparse
+import os
+import time
+
+import numpy as np
+
+from engine import MemoryBoard, FLIP_IGNORED, FLIP_FIRST, FLIP_SECOND
+from levels import LEVELS
+from replay import ReplayReader, LEVEL_NAMES, FLIP, MATCH, END, LIMITS
+
+# Face images of each level in face id order, from the level table
+FACE_IMAGES = {name: [os.path.basename(image) for image in level.deck] for name, level in LEVELS.items()}
+IMAGE_NAMES = sorted({image for images in FACE_IMAGES.values() for image in images})
+
+
+def export(replay_path, out_path):
+    reader = ReplayReader(replay_path)
+    records = reader.records
+    num_sessions = len(reader)
+    starts = reader.starts
+    session_of = np.searchsorted(starts, np.arange(len(records)), side='right') - 1
+
+    # Sessions
+    session_level = records['a'][starts].astype(np.uint8)
+    session_cards = records['b'][starts].astype(np.uint16)
+    session_seed = records['value'][starts].astype(np.uint32)
+    outcome = np.zeros(num_sessions, dtype=np.uint8)  # 0 while unfinished, else the board state
+    ends = np.flatnonzero(records['kind'] == END)
+    outcome[session_of[ends]] = records['a'][ends]
+    limits = np.flatnonzero(records['kind'] == LIMITS)
+    max_attempts = np.zeros(num_sessions, dtype=np.uint16)
+    max_attempts[session_of[limits]] = records['b'][limits]
+
+    # The only per-session Python work: deal every board again from its seed,
+    # mapping its face ids straight to indexes into IMAGE_NAMES
+    to_image = {code: np.array([IMAGE_NAMES.index(image) for image in FACE_IMAGES[level]], dtype=np.uint8)
+                for code, level in enumerate(LEVEL_NAMES)}
+    offsets = np.zeros(num_sessions + 1, dtype=np.int64)
+    np.cumsum(session_cards, out=offsets[1:])
+    card_images = np.empty(offsets[-1], dtype=np.uint8)
+    for session in range(num_sessions):
+        board = MemoryBoard(int(session_cards[session]) // 2, 0, int(session_seed[session]))
+        faces = np.frombuffer(board.cards, dtype=np.uint16)
+        card_images[offsets[session]:offsets[session + 1]] = to_image[int(session_level[session])][faces]
+
+    # Flips the board accepted
+    flip_rows = np.flatnonzero((records['kind'] == FLIP) & (records['a'] != FLIP_IGNORED))
+    flip_session = session_of[flip_rows]
+    flip_position = records['b'][flip_rows]
+    flip_seconds = (records['value'][flip_rows] / 1e6).astype(np.float32)
+
+    # Turns: every MATCH record closes the two accepted flips before it
+    match_rows = np.flatnonzero(records['kind'] == MATCH)
+    second = np.searchsorted(flip_rows, match_rows) - 1
+    valid = second >= 1
+    valid[valid] &= ((records['a'][flip_rows[second[valid]]] == FLIP_SECOND)
+                     & (records['a'][flip_rows[second[valid] - 1]] == FLIP_FIRST)
+                     & (flip_session[second[valid] - 1] == session_of[match_rows[valid]]))
+    match_rows, second = match_rows[valid], second[valid]
+    first = second - 1
+    turn_session = session_of[match_rows]
+
+    np.savez(
+        out_path,
+        levels=np.array(LEVEL_NAMES),
+        image_names=np.array(IMAGE_NAMES),
+        session_level=session_level,
+        session_cards=session_cards,
+        session_seed=session_seed,
+        session_max_attempts=max_attempts,
+        session_outcome=outcome,
+        flip_session=flip_session.astype(np.uint32),
+        flip_level=session_level[flip_session],
+        flip_position=flip_position,
+        flip_image=card_images[offsets[flip_session] + flip_position],
+        flip_seconds=flip_seconds,
+        turn_session=turn_session.astype(np.uint32),
+        turn_level=session_level[turn_session],
+        turn_first=flip_position[first],
+        turn_second=flip_position[second],
+        turn_first_image=card_images[offsets[turn_session] + flip_position[first]],
+        turn_second_image=card_images[offsets[turn_session] + flip_position[second]],
+        turn_matched=records['a'][match_rows].astype(bool),
+        turn_seconds=(records['value'][match_rows] / 1e6).astype(np.float32),
+    )
+    del records  # The reader's map cannot close while a view of it is alive
+    reader.close()
+    return num_sessions, len(flip_rows)
+
+
+def load(path):
+    with np.load(path) as data:
+        return {name: data[name] for name in data.files}
+
+
+def image_stats(data):
+    # Flips, mismatches and mismatch rate per face image
+    count = len(data['image_names'])
+    flips = np.bincount(data['flip_image'], minlength=count)
+    missed = ~data['turn_matched']
+    mismatches = (np.bincount(data['turn_first_image'][missed], minlength=count)
+                  + np.bincount(data['turn_second_image'][missed], minlength=count))
+    with np.errstate(invalid='ignore', divide='ignore'):
+        rate = np.where(flips > 0, mismatches / flips, 0.0)
+    return flips, mismatches, rate
+
+
+def position_stats(data, level):
+    # Flips, mismatches and mismatch rate per board position of one level
+    code = LEVEL_NAMES.index(level)
+    size = int(data['session_cards'][data['session_level'] == code].max(initial=0))
+    flips = np.bincount(data['flip_position'][data['flip_level'] == code], minlength=size)
+    missed = ~data['turn_matched'] & (data['turn_level'] == code)
+    mismatches = (np.bincount(data['turn_first'][missed], minlength=size)
+                  + np.bincount(data['turn_second'][missed], minlength=size))
+    with np.errstate(invalid='ignore', divide='ignore'):
+        rate = np.where(flips > 0, mismatches / flips, 0.0)
+    return flips, mismatches, rate
+
+
+def time_to_match(data):
+    # Seconds from the first time a face was turned over in a session to the
+    # match that took it off the board, for every matched pair
+    images = np.uint64(len(data['image_names']))
+    flip_key = data['flip_session'].astype(np.uint64) * images + data['flip_image']
+    # Flips are stored in the order they happened, so the first index unique()
+    # finds for a session and face is when that face was first seen
+    keys, first = np.unique(flip_key, return_index=True)
+    first_seen = data['flip_seconds'][first]
+
+    matched = data['turn_matched']
+    match_key = data['turn_session'][matched].astype(np.uint64) * images + data['turn_first_image'][matched]
+    seconds = data['turn_seconds'][matched] - first_seen[np.searchsorted(keys, match_key)]
+    return data['turn_level'][matched], seconds
+
+
+def report(data):
+    flips, mismatches, rate = image_stats(data)
+    print(f"{len(data['session_level'])} sessions, {len(data['flip_image'])} flips, {len(data['turn_matched'])} turns")
+    print("Hardest faces (mismatches per flip):")
+    for image in np.argsort(-rate)[:5]:
+        print(f"  {data['image_names'][image]:<7} {rate[image]:.3f} ({mismatches[image]} of {flips[image]} flips)")
+
+    levels, seconds = time_to_match(data)
+    for code, level in enumerate(LEVEL_NAMES):
+        flips, mismatches, rate = position_stats(data, level)
+        if not flips.sum():
+            continue
+        worst = np.argsort(-rate)[:3]
+        level_seconds = seconds[levels == code]
+        p50, p90, p99 = np.percentile(level_seconds, [50, 90, 99]) if len(level_seconds) else (0, 0, 0)
+        print(f"{level}: hardest positions " + ', '.join(f"{position} ({rate[position]:.3f})" for position in worst)
+              + f"; time to match p50 {p50:.1f}s p90 {p90:.1f}s p99 {p99:.1f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export the replay log to columns and analyze play.")
+    commands = parser.add_subparsers(dest='command', required=True)
+    export_command = commands.add_parser('export', help="write the replay log as a columnar .npz")
+    export_command.add_argument('replay')
+    export_command.add_argument('out')
+    report_command = commands.add_parser('report', help="per-face, per-position and time-to-match stats")
+    report_command.add_argument('path')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    if args.command == 'export':
+        sessions, flips = export(args.replay, args.out)
+        print(f"{sessions} sessions, {flips} flips exported in {time.perf_counter() - start:.2f} s")
+    else:
+        data = load(args.path)
+        report(data)
+        print(f"Report took {time.perf_counter() - start:.2f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+# App-wide sound service. Every effect is loaded once for the whole app into a
+# small pool of voices so quick taps overlap instead of cutting each other off.
+import time
+from collections import deque
+from threading import Thread
+
+from kivy.clock import Clock
+from kivy.core.audio import SoundLoader
+
+from profiling import profiler
+
+# Forward slashes, as asset packs name their files
+CLICK_SOUND = 'assets/mixkit-arcade-game-jump-coin-216.wav'
+BACKGROUND_MUSIC = 'assets/minifunk-67270.mp3'
+
+
+class AudioManager:
+    def __init__(self, voices=4, assets=None):
+        self.voices = voices
+        self.assets = assets  # packs.Assets of the theme, sources are opened through it
+        self.effects = {}     # name -> list of Sound, one per voice
+        self.next_voice = {}  # name -> voice to steal when all of them are playing
+        self.music = None
+        self.music_source = None  # What play_music() was last asked for
+        self.music_load_time = None  # seconds the music took to open on the worker thread
+        self.effects_muted = False
+        self.music_muted = False
+        self.latencies = deque(maxlen=500)  # seconds from touch down to play() returning
+
+    def _path(self, source):
+        return self.assets.path(source) if self.assets else source
+
+    def load_effect(self, name, source):
+        if name in self.effects:
+            return
+        path = self._path(source)
+        sounds = [SoundLoader.load(path) for _ in range(self.voices)]
+        self.effects[name] = [sound for sound in sounds if sound]
+        self.next_voice[name] = 0
+
+    def unload_effect(self, name):
+        for sound in self.effects.pop(name, ()):
+            sound.stop()
+            sound.unload()
+        self.next_voice.pop(name, None)
+
+    def play(self, name, touch=None):
+        voices = self.effects.get(name)
+        if self.effects_muted or not voices:
+            return
+
+        for sound in voices:
+            if sound.state == 'stop':
+                break
+        else:
+            index = self.next_voice[name]
+            self.next_voice[name] = (index + 1) % len(voices)
+            sound = voices[index]
+            sound.stop()
+        sound.play()
+
+        if touch is not None:
+            self.latencies.append(time.time() - touch.time_start)
+
+    def latency_stats(self):
+        if not self.latencies:
+            return None
+        samples = sorted(self.latencies)
+        return {
+            'count': len(samples),
+            'mean_ms': sum(samples) / len(samples) * 1000,
+            'p95_ms': samples[int(len(samples) * 0.95)] * 1000,
+            'max_ms': samples[-1] * 1000,
+        }
+
+    def play_music(self, source, fade_in=2.0):
+        # Opening the music file would hold up the first frame, so a worker
+        # thread loads it and playback starts on the UI thread once it is ready.
+        # Music already playing stops when the new music starts.
+        self.music_source = source
+        Thread(target=self._load_music, args=(source, fade_in), daemon=True).start()
+
+    def _load_music(self, source, fade_in):
+        start = time.perf_counter()
+        sound = SoundLoader.load(self._path(source))
+        self.music_load_time = time.perf_counter() - start
+        Clock.schedule_once(lambda dt: self._start_music(source, sound, fade_in))
+
+    def _start_music(self, source, sound, fade_in):
+        if source != self.music_source:  # Asked for other music while this one loaded
+            if sound:
+                sound.unload()
+            return
+        if self.music:
+            self.music.stop()
+            self.music.unload()
+        self.music = sound
+        if not sound:
+            return
+        if profiler.enabled:
+            print(f"Background music loaded in {self.music_load_time * 1000:.0f} ms off the UI thread")
+        sound.loop = True
+        sound.volume = 0
+        sound.play()
+
+        fade_start = time.perf_counter()
+
+        def fade(dt):
+            progress = min(1.0, (time.perf_counter() - fade_start) / fade_in) if fade_in else 1.0
+            sound.volume = 0 if self.music_muted else progress
+            return progress < 1.0
+
+        Clock.schedule_interval(fade, 1 / 30.)
+
+    def set_music_muted(self, muted):
+        self.music_muted = muted
+        if self.music:
+            self.music.volume = 0 if muted else 1
+
+    def set_effects_muted(self, muted):
+        self.effects_muted = muted
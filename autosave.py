@@ -0,0 +1,106 @@
+# Crash-safe autosave of the game in progress. The board is not stored, only
+# what it takes to deal it again: the seed, which cards are matched (one bit
+# each), the attempts and the time left, so even a big board is a few dozen
+# bytes to write and to restore.
+#
+#   magic (4s) level (u8) pipelined (u8) num_cards (u16) seed (u32)
+#   num_attempts (u16) max_attempts (u16) remaining_time (u16), matched bitset
+#
+# Snapshots are written to a temporary file, synced and renamed over the old
+# one, so after a crash the file holds either the previous snapshot or the new
+# one, never half of each.
+#
+#   python autosave.py autosave.bin
+import argparse
+import os
+import struct
+
+from replay import LEVEL_NAMES
+from levels import LEVELS
+from writer import BackgroundWriter
+
+MAGIC = b'MGS1'
+HEADER = struct.Struct('<4sBBHIHHH')
+
+
+class Snapshot:
+    def __init__(self, data):
+        magic, level, pipelined, num_cards, seed, num_attempts, max_attempts, remaining_time = \
+            HEADER.unpack_from(data)
+        if magic != MAGIC or level >= len(LEVEL_NAMES) or len(data) != HEADER.size + ((num_cards + 7) >> 3):
+            raise ValueError("not an autosave snapshot")
+        self.level = LEVEL_NAMES[level]
+        if num_cards != LEVELS[self.level].num_pairs * 2:
+            raise ValueError("saved by a version with another deck for this level")
+        self.pipelined = bool(pipelined)
+        self.num_cards = num_cards
+        self.seed = seed
+        self.num_attempts = num_attempts
+        self.max_attempts = max_attempts
+        self.remaining_time = remaining_time
+        self.matched = data[HEADER.size:]  # As in MemoryBoard.matched
+
+
+def pack(level, board, remaining_time, pipelined=False):
+    return HEADER.pack(MAGIC, LEVEL_NAMES.index(level), pipelined, board.num_cards, board.seed,
+                       board.num_attempts, board.max_attempts, remaining_time) + bytes(board.matched)
+
+
+def load(path):
+    # The snapshot left by the last run, or None if there is nothing to resume
+    try:
+        with open(path, 'rb') as snapshot:
+            return Snapshot(snapshot.read())
+    except (OSError, struct.error, ValueError):
+        return None
+
+
+class Autosave:
+    # Snapshots are packed on the caller's thread and written by a worker, so
+    # saving after a pair never waits on the disk. Only the newest snapshot
+    # waiting is written; the ones it replaces are already out of date.
+    def __init__(self, path):
+        self.path = path
+        self.writer = BackgroundWriter(self._write)
+
+    def _write(self, _, snapshots):
+        if snapshots[-1]:
+            temporary = self.path + '.tmp'
+            with open(temporary, 'wb') as snapshot:
+                snapshot.write(snapshots[-1])
+                snapshot.flush()
+                os.fsync(snapshot.fileno())
+            os.replace(temporary, self.path)
+        else:
+            try:
+                os.remove(self.path)
+            except FileNotFoundError:
+                pass
+
+    def save(self, level, board, remaining_time, pipelined=False):
+        self.writer.put(pack(level, board, remaining_time, pipelined))
+
+    def clear(self):
+        # The game is over or was left, so there is nothing to resume
+        self.writer.put(b'')
+
+    def close(self):
+        self.writer.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Show the game an autosave snapshot would resume.")
+    parser.add_argument('path')
+    args = parser.parse_args()
+
+    snapshot = load(args.path)
+    if snapshot is None:
+        print("nothing to resume")
+        return
+    matched = sum(bin(byte).count('1') for byte in snapshot.matched)
+    print(f"{snapshot.level}, seed {snapshot.seed}, {matched // 2}/{snapshot.num_cards // 2} pairs, "
+          f"{snapshot.num_attempts}/{snapshot.max_attempts} attempts, {snapshot.remaining_time} s left")
+
+
+if __name__ == "__main__":
+    main()
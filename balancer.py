@@ -0,0 +1,163 @@
+# Monte Carlo balancer for the level limits (max_attempts and remaining_time).
+# Plays whole batches of shuffled boards at once with NumPy, one turn per step,
+# and reports how often a player with a given memory would win each level.
+#
+#   python balancer.py --games 200000 --model perfect --model forgetful:0.6 --model random
+import argparse
+import json
+
+import numpy as np
+
+from levels import LEVELS
+from solver import MEMORY_MODELS  # Kept with the solver, which plays by them too
+
+# name: (pairs, max_attempts, time limit in seconds), as in the level table
+LEVEL_LIMITS = {name: (level.num_pairs, level.max_attempts, level.time_limit) for name, level in LEVELS.items()}
+
+SECONDS_PER_FLIP = 0.8  # player reaction time for one tap
+REVEAL_DELAY = 1.0      # check_match runs one second after the second flip
+
+
+def _pick(rng, mask):
+    # One uniformly random True column per row
+    keys = rng.random(mask.shape)
+    keys[~mask] = -1.0
+    return keys.argmax(axis=1)
+
+
+def simulate(num_pairs, num_games, recall=1.0, seed=None):
+    # Plays every board to the end and returns the number of mismatches each
+    # one needed. Limits are applied afterwards, so one run can be evaluated
+    # against any max_attempts/time limit.
+    rng = np.random.default_rng(seed)
+    num_cards = num_pairs * 2
+
+    # A shuffled board only matters through where each card's partner lies
+    order = np.argsort(rng.random((num_games, num_cards)), axis=1)
+    partner = np.empty_like(order)
+    rows = np.arange(num_games)[:, None]
+    partner[rows, order[:, 0::2]] = order[:, 1::2]
+    partner[rows, order[:, 1::2]] = order[:, 0::2]
+
+    matched = np.zeros((num_games, num_cards), dtype=bool)
+    known = np.zeros((num_games, num_cards), dtype=bool)
+    pairs_left = np.full(num_games, num_pairs, dtype=np.int32)
+    mismatches = np.zeros(num_games, dtype=np.int32)
+    game_ids = np.arange(num_games)
+    result = np.zeros(num_games, dtype=np.int32)
+
+    while game_ids.size:
+        rows = np.arange(game_ids.size)
+        hidden = ~matched
+        unknown = hidden & ~known
+
+        # A pair whose both cards are remembered is always taken first
+        ready = hidden & known & np.take_along_axis(known, partner, axis=1)
+        has_ready = ready.any(axis=1)
+        first = np.where(has_ready, ready.argmax(axis=1), _pick(rng, unknown))
+
+        # Otherwise turn over an unknown card and use its partner if remembered
+        first_partner = partner[rows, first]
+        unknown[rows, first] = False
+        second = np.where(has_ready | known[rows, first_partner], first_partner, _pick(rng, unknown))
+
+        match = second == first_partner
+        matched[rows[match], first[match]] = True
+        matched[rows[match], second[match]] = True
+        pairs_left -= match
+        mismatches += ~match
+        if recall > 0:
+            remembered = (rng.random((rows.size, 2)) < recall) & ~match[:, None]
+            known[rows, first] |= remembered[:, 0]
+            known[rows, second] |= remembered[:, 1]
+
+        done = pairs_left == 0
+        if done.any():
+            result[game_ids[done]] = mismatches[done]
+            keep = ~done
+            game_ids, partner, matched, known = game_ids[keep], partner[keep], matched[keep], known[keep]
+            pairs_left, mismatches = pairs_left[keep], mismatches[keep]
+
+    return result
+
+
+def turn_seconds(seconds_per_flip=SECONDS_PER_FLIP):
+    return 2 * seconds_per_flip + REVEAL_DELAY
+
+
+def evaluate(mismatches, num_pairs, max_attempts, time_limit, seconds_per_flip=SECONDS_PER_FLIP):
+    # The screen ends the game as soon as num_attempts reaches max_attempts,
+    # and the clock keeps running through the reveal delay of every turn.
+    elapsed = (mismatches + num_pairs) * turn_seconds(seconds_per_flip)
+    out_of_attempts = mismatches >= max_attempts
+    out_of_time = ~out_of_attempts & (elapsed >= time_limit)
+    return {
+        'win_rate': float(np.mean(~out_of_attempts & ~out_of_time)),
+        'lost_attempts': float(np.mean(out_of_attempts)),
+        'lost_time': float(np.mean(out_of_time)),
+    }
+
+
+def suggest_limits(mismatches, num_pairs, target_win_rate, seconds_per_flip=SECONDS_PER_FLIP):
+    # Smallest limits that let target_win_rate of the games finish
+    needed = int(np.quantile(mismatches, target_win_rate, method='inverted_cdf'))
+    seconds = (needed + num_pairs) * turn_seconds(seconds_per_flip)
+    return {'max_attempts': needed + 1, 'remaining_time': int(np.floor(seconds)) + 1}
+
+
+def report(levels, models, num_games, target_win_rate=0.5, seconds_per_flip=SECONDS_PER_FLIP, seed=None):
+    results = {}
+    for level, (num_pairs, max_attempts, time_limit) in levels.items():
+        results[level] = {}
+        for model, recall in models.items():
+            mismatches = simulate(num_pairs, num_games, recall, seed)
+            stats = evaluate(mismatches, num_pairs, max_attempts, time_limit, seconds_per_flip)
+            stats['mismatches'] = {f'p{q}': float(np.percentile(mismatches, q)) for q in (10, 25, 50, 75, 90, 99)}
+            stats['suggested'] = suggest_limits(mismatches, num_pairs, target_win_rate, seconds_per_flip)
+            results[level][model] = stats
+    return results
+
+
+def parse_model(text):
+    # "perfect", "random" or "forgetful:0.4"
+    name, _, recall = text.partition(':')
+    if recall:
+        return text, float(recall)
+    if name not in MEMORY_MODELS:
+        raise argparse.ArgumentTypeError(f"unknown memory model '{name}'")
+    return name, MEMORY_MODELS[name]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulate win rates for each level's limits.")
+    parser.add_argument('--games', type=int, default=200000, help="boards per level and model")
+    parser.add_argument('--model', action='append', type=parse_model, help="memory model, e.g. perfect or forgetful:0.6")
+    parser.add_argument('--level', action='append', choices=sorted(LEVEL_LIMITS))
+    parser.add_argument('--target', type=float, default=0.5, help="win rate the suggested limits aim for")
+    parser.add_argument('--seconds-per-flip', type=float, default=SECONDS_PER_FLIP)
+    parser.add_argument('--seed', type=int)
+    parser.add_argument('--json', action='store_true', help="print the raw results as JSON")
+    args = parser.parse_args()
+
+    models = dict(args.model or MEMORY_MODELS.items())
+    levels = {name: LEVEL_LIMITS[name] for name in (args.level or LEVEL_LIMITS)}
+    results = report(levels, models, args.games, args.target, args.seconds_per_flip, args.seed)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    for level, by_model in results.items():
+        num_pairs, max_attempts, time_limit = levels[level]
+        print(f"{level}: {num_pairs * 2} cards, {max_attempts} attempts, {time_limit}s")
+        for model, stats in by_model.items():
+            spread = stats['mismatches']
+            suggested = stats['suggested']
+            print(f"  {model:<16} win {stats['win_rate']:6.1%}"
+                  f"  (out of attempts {stats['lost_attempts']:6.1%}, out of time {stats['lost_time']:6.1%})"
+                  f"  mismatches p10/p50/p90 {spread['p10']:.0f}/{spread['p50']:.0f}/{spread['p90']:.0f}"
+                  f"  for {args.target:.0%}: {suggested['max_attempts']} attempts, {suggested['remaining_time']}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,10 @@
+# Imported first by every benchmark, before anything imports Kivy: without a
+# display they run offscreen, Kivy leaves their command line alone and does not
+# log every run. Processes they start inherit the same environment.
+import os
+
+os.environ.setdefault('KIVY_NO_ARGS', '1')
+os.environ.setdefault('KIVY_NO_CONSOLELOG', '1')
+os.environ.setdefault('KIVY_NO_FILELOG', '1')
+if not os.environ.get('DISPLAY') and not os.environ.get('WAYLAND_DISPLAY'):
+    os.environ.setdefault('SDL_VIDEODRIVER', 'offscreen')
@@ -0,0 +1,69 @@
+# Times analytics.py on a large synthetic replay log. Games are played by the
+# solver with the forgetful memory model and written as the app records them.
+#
+#   python -m benchmarks.analytics_scale [--sessions 60000]
+import benchmarks._headless  # noqa: F401  Must come before anything that imports Kivy
+
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from analytics import export, load, report
+from balancer import LEVEL_LIMITS, MEMORY_MODELS, SECONDS_PER_FLIP, REVEAL_DELAY
+from engine import MemoryBoard, PLAYING
+from replay import RECORD, LEVEL_NAMES, SESSION, LIMITS, FLIP, MATCH, END
+from solver import Knowledge
+
+
+def play_session(level, rng):
+    num_pairs, max_attempts, time_limit = LEVEL_LIMITS[level]
+    board = MemoryBoard(num_pairs, max_attempts, rng.getrandbits(32))
+    knowledge = Knowledge(board.num_cards, MEMORY_MODELS['forgetful'], rng.getrandbits(32))
+    chunks = [RECORD.pack(SESSION, LEVEL_NAMES.index(level), board.num_cards, board.seed),
+              RECORD.pack(LIMITS, 0, max_attempts, time_limit)]
+    seconds = 0.0
+    while board.state == PLAYING:
+        first = knowledge.suggest()[0]
+        for index in (first, None):
+            if index is None:
+                index = knowledge.suggest(first)[0]
+            seconds += SECONDS_PER_FLIP * rng.uniform(0.5, 1.5)
+            chunks.append(RECORD.pack(FLIP, board.flip(index), index, int(seconds * 1e6)))
+            knowledge.reveal(index, board.face(index))
+        seconds += REVEAL_DELAY
+        matched = board.check_match()
+        knowledge.checked(matched)
+        chunks.append(RECORD.pack(MATCH, matched, board.num_attempts, int(seconds * 1e6)))
+    chunks.append(RECORD.pack(END, board.state, board.num_attempts, int(seconds * 1e6)))
+    return b''.join(chunks)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time the analytics export and report on a big log.")
+    parser.add_argument('--sessions', type=int, default=60000)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    workdir = tempfile.mkdtemp(prefix='memorygame-analytics-')
+    replay_path = os.path.join(workdir, 'replay.bin')
+    plays_path = os.path.join(workdir, 'plays.npz')
+
+    start = time.perf_counter()
+    with open(replay_path, 'wb') as log:
+        for _ in range(args.sessions):
+            log.write(play_session(rng.choice(LEVEL_NAMES), rng))
+    print(f"Generated {args.sessions} sessions in {time.perf_counter() - start:.1f} s")
+
+    start = time.perf_counter()
+    sessions, flips = export(replay_path, plays_path)
+    print(f"Exported {sessions} sessions, {flips} flips in {time.perf_counter() - start:.2f} s")
+
+    start = time.perf_counter()
+    report(load(plays_path))
+    print(f"Loaded and reported in {time.perf_counter() - start:.2f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+# Loading every level's card faces and the background from loose files and
+# from one memory-mapped asset pack of the same files:
+#
+#   python -m benchmarks.asset_packs [--runs 20] [--cell 128]
+import benchmarks._headless  # noqa: F401  Must come before anything that imports Kivy
+
+import argparse
+import os
+import tempfile
+import time
+from statistics import median
+
+from kivy.core.window import Window  # noqa: F401  Creates the GL context the Fbos need
+
+from cards import CardAtlas
+from levels import playable
+from main import BACKGROUND_IMAGE
+from packs import Assets, build
+
+
+def load_all(assets, cell):
+    # A new atlas every time, so every face is read and decoded again
+    start = time.perf_counter()
+    atlas = CardAtlas(cell, assets)
+    for level in playable().values():
+        atlas.load(level.deck)
+    assets.image(assets.pick(BACKGROUND_IMAGE, 1024, 768))
+    return (time.perf_counter() - start) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time loading assets loose and from a pack.")
+    parser.add_argument('--runs', type=int, default=20)
+    parser.add_argument('--cell', type=int, default=128)
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(prefix='memorygame-pack-'), 'assets.pack')
+    count, size = build(path)
+    print(f"{count} files, {size / 1024:.0f} KB packed")
+
+    start = time.perf_counter()
+    packed = Assets(default_pack=path)
+    print(f"pack opened in {(time.perf_counter() - start) * 1000:.2f} ms")
+    for name, assets in (('loose', Assets(default_pack=None)), ('pack', packed)):
+        samples = [load_all(assets, args.cell) for _ in range(args.runs)]
+        print(f"{name:<6} {median(samples):7.2f} ms median, {min(samples):7.2f} ms best")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+# Frame time of the single-canvas BoardWidget against a GridLayout of Buttons,
+# the way the game screens used to draw cards. Each frame flips a pair of
+# cards and, in the resize case, also changes the board size.
+#
+#   python -m benchmarks.board_frametime [frames]
+import benchmarks._headless  # noqa: F401  Must come before anything that imports Kivy
+
+import sys
+import time
+from math import ceil, sqrt
+from random import Random
+from statistics import mean
+
+from kivy.clock import Clock
+from kivy.core.window import Window
+from kivy.uix.button import Button
+from kivy.uix.gridlayout import GridLayout
+
+from board import BoardWidget
+from cards import CardAtlas
+
+SOURCES = ['assets/%s.png' % name for name in 'abcdefhijklmnopqrstuvwxy']
+SIZES = (20, 100, 400)
+WARMUP_FRAMES = 10  # First frames pay one-off texture uploads and shader setup
+
+
+def draw():
+    Clock.tick_draw()
+    Window.dispatch('on_draw')
+    Window.dispatch('on_flip')
+
+
+class ButtonGrid:
+    def __init__(self, count, faces):
+        self.widget = GridLayout(cols=ceil(sqrt(count)), spacing=10)
+        self.buttons = [Button(background_normal='', background_color=(1, 1, 1, 1)) for _ in range(count)]
+        for button in self.buttons:
+            self.widget.add_widget(button)
+        self.faces = faces
+
+    def set_face(self, index, face):
+        self.buttons[index].background_normal = self.faces[face] if face is not None else ''
+
+
+class CanvasBoard:
+    def __init__(self, count, faces):
+        self.widget = BoardWidget(cols=ceil(sqrt(count)), spacing=10)
+        self.widget.set_cards(count)
+        self.faces = faces
+
+    def set_face(self, index, face):
+        self.widget.set_face(index, self.faces[face] if face is not None else None)
+
+
+def run(board, count, frames, resize):
+    Window.add_widget(board.widget)
+    board.widget.size = Window.size
+    draw()
+
+    rng = Random(0)
+    samples = []
+    for frame in range(frames + WARMUP_FRAMES):
+        first, second = rng.randrange(count), rng.randrange(count)
+        start = time.perf_counter()
+        board.set_face(first, frame % len(SOURCES))
+        board.set_face(second, None)
+        if resize:
+            board.widget.width = Window.width - (frame % 2) * 40
+        draw()
+        if frame >= WARMUP_FRAMES:
+            samples.append((time.perf_counter() - start) * 1000)
+
+    Window.remove_widget(board.widget)
+    samples.sort()
+    return mean(samples), samples[int(len(samples) * 0.95)]
+
+
+def main():
+    frames = int(sys.argv[1]) if len(sys.argv) > 1 else 120
+    atlas = CardAtlas()
+    textures = atlas.load(SOURCES)
+
+    print(f"{'cards':>5}  {'renderer':<22} {'flip mean':>10} {'flip p95':>10} {'resize mean':>12} {'resize p95':>11}")
+    for count in SIZES:
+        for name, board_class, faces in (('GridLayout of Buttons', ButtonGrid, SOURCES), ('BoardWidget', CanvasBoard, textures)):
+            flip = run(board_class(count, faces), count, frames, resize=False)
+            resize = run(board_class(count, faces), count, frames, resize=True)
+            print(f"{count:>5}  {name:<22} {flip[0]:8.3f}ms {flip[1]:8.3f}ms {resize[0]:10.3f}ms {resize[1]:9.3f}ms")
+
+
+if __name__ == "__main__":
+    main()
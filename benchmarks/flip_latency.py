@@ -0,0 +1,78 @@
+# Flip latency with the old per-flip image path versus atlas regions. The first
+# round of path flips is the cold case: every face is read from disk on its
+# first flip, which is the stutter players see.
+#
+#   python -m benchmarks.flip_latency [rounds]
+import benchmarks._headless  # noqa: F401  Must come before anything that imports Kivy
+
+import sys
+import time
+from statistics import mean, median
+
+from kivy.clock import Clock
+from kivy.core.window import Window
+from kivy.uix.button import Button
+
+from board import BoardWidget
+from cards import CardAtlas
+
+SOURCES = ['assets/%s.png' % name for name in 'abcdefhijklmnopqrstuvwxy']
+
+
+def draw():
+    Clock.tick_draw()
+    Window.dispatch('on_draw')
+
+
+def time_flips(flip, unflip, rounds):
+    samples = []
+    for _ in range(rounds):
+        for source in SOURCES:
+            start = time.perf_counter()
+            flip(source)
+            draw()
+            samples.append((time.perf_counter() - start) * 1000)
+            unflip()
+            draw()
+    return samples
+
+
+def main():
+    rounds = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    button = Button(background_normal='', size=(200, 200))
+    board = BoardWidget(cols=1, size=(200, 200), pos=(200, 0))
+    board.set_cards(1)
+    Window.add_widget(button)
+    Window.add_widget(board)
+    draw()
+
+    def path_flip(source):
+        button.background_normal = source
+
+    def path_unflip():
+        button.background_normal = ''
+
+    def atlas_flip(source):
+        board.set_face(0, atlas[source])
+
+    def atlas_unflip():
+        board.set_face(0, None)
+
+    # Cold path flips have to run before the atlas reads the same files
+    results = {'image path, cold': time_flips(path_flip, path_unflip, 1)}
+    results['image path, warm'] = time_flips(path_flip, path_unflip, rounds)
+
+    start = time.perf_counter()
+    atlas = CardAtlas()
+    atlas.load(SOURCES)
+    draw()
+    preload = (time.perf_counter() - start) * 1000
+    results['atlas region'] = time_flips(atlas_flip, atlas_unflip, rounds)
+
+    print(f"atlas preload: {preload:.1f} ms for {len(SOURCES)} faces")
+    for name, samples in results.items():
+        print(f"{name:<17} mean {mean(samples):7.3f} ms  median {median(samples):7.3f} ms  max {max(samples):7.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+# Import time of main.py, from `python -X importtime` in fresh interpreters.
+# Prints what main.py imports directly by cumulative time and the slowest
+# modules by their own time, and exits with status 1 when the total is over
+# the budget, so a check can keep cold start from creeping up:
+#
+#   python -m benchmarks.import_time [--budget-ms 600] [--runs 5] [--top 12]
+import benchmarks._headless  # noqa: F401  Must come before anything that imports Kivy
+
+import argparse
+import os
+import subprocess
+import sys
+from statistics import median
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def import_main():
+    # [(depth, self us, cumulative us, module)] in the order -X importtime prints them
+    stderr = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import main'],
+                            cwd=ROOT, capture_output=True, text=True, check=True).stderr
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or line.endswith('| imported package'):
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        rows.append((depth, int(self_us), int(cumulative_us), name.strip()))
+    return rows
+
+
+def measure(runs):
+    # The run with the median total, so one slow disk read does not decide the report
+    results = sorted((next(row[2] for row in rows if row[3] == 'main'), rows)
+                     for rows in (import_main() for _ in range(runs)))
+    return results[len(results) // 2]
+
+
+def bench_imports(runs):
+    # For benchmarks.suite
+    return {'import_main_ms': median(next(row[2] for row in import_main() if row[3] == 'main')
+                                     for _ in range(runs)) / 1000}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Report and check how long importing main.py takes.")
+    parser.add_argument('--budget-ms', type=float, help="fail when importing main takes longer")
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--top', type=int, default=12)
+    args = parser.parse_args()
+
+    total, rows = measure(args.runs)
+    main_depth = next(row[0] for row in rows if row[3] == 'main')
+    direct = [row for row in rows if row[0] == main_depth + 1]
+    print(f"import main: {total / 1000:.1f} ms (median of {args.runs})")
+    print("Imported by main.py, cumulative:")
+    for depth, self_us, cumulative_us, name in sorted(direct, key=lambda row: -row[2])[:args.top]:
+        print(f"  {cumulative_us / 1000:7.1f} ms  {name}")
+    print("Slowest modules, self:")
+    for depth, self_us, cumulative_us, name in sorted(rows, key=lambda row: -row[1])[:args.top]:
+        print(f"  {self_us / 1000:7.1f} ms  {name}")
+
+    if args.budget_ms is not None and total / 1000 > args.budget_ms:
+        print(f"Over the {args.budget_ms:.0f} ms budget by {total / 1000 - args.budget_ms:.1f} ms")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
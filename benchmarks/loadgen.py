@@ -0,0 +1,179 @@
+# Load generator for server.py. Plays many matches at once with bots that
+# remember every card they have seen, and reports finished matches per second
+# and the move latency: the time from sending a FLIP to seeing its SHOW.
+#
+#   python -m benchmarks.loadgen --matches 1000 --duration 10
+#   python -m benchmarks.loadgen --connect 127.0.0.1:8765
+#
+# Without --connect a server is started in its own process for the run.
+import benchmarks._headless  # noqa: F401  Must come before anything that imports Kivy
+
+import argparse
+import asyncio
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+
+from replay import RECORD, LEVEL_NAMES
+from server import read_records, JOIN, FLIP, START, SHOW, CHECKED, END
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class Bot:
+    def __init__(self, level, latencies, seed):
+        self.level = LEVEL_NAMES.index(level)
+        self.latencies = latencies
+        self.rng = random.Random(seed)
+        self.sent = 0.0
+        self.matches = 0
+        self.playing = False
+        self.finished_at = 0.0
+
+    async def run(self, host, port, until):
+        reader, writer = await asyncio.open_connection(host, port)
+        records = read_records(reader)
+        try:
+            while time.monotonic() < until:
+                writer.write(RECORD.pack(JOIN, self.level, 0, 0))
+                if await self.play(records, writer) is None:
+                    return  # Server went away
+                self.matches += 1
+                self.finished_at = time.perf_counter()
+        finally:
+            writer.close()
+
+    def flip(self, writer, index):
+        self.sent = time.perf_counter()
+        writer.write(RECORD.pack(FLIP, 0, index, 0))
+
+    async def play(self, records, writer):
+        seen = {}  # card index -> face id, for cards not matched yet
+        matched = set()
+        flipped = []
+        seat = turn = num_cards = None
+        async for kind, a, b, value in records:
+            if kind == START:
+                seat, num_cards, turn = a, b, 0
+                self.playing = True
+            elif kind == SHOW:
+                seen[b] = value
+                flipped.append(b)
+                if a == seat:
+                    self.latencies.append(time.perf_counter() - self.sent)
+                    if len(flipped) == 1:
+                        self.flip(writer, self.choose(seen, matched, num_cards, flipped[0]))
+                continue
+            elif kind == CHECKED:
+                if a:
+                    for index in flipped:
+                        del seen[index]
+                        matched.add(index)
+                flipped = []
+                turn = value
+            elif kind == END:
+                self.playing = False
+                return seat
+            else:
+                continue
+            if turn == seat and len(matched) < num_cards:
+                self.flip(writer, self.choose(seen, matched, num_cards))
+        return None
+
+    def choose(self, seen, matched, num_cards, first=-1):
+        if first == -1:
+            faces = {}
+            for index, face in seen.items():
+                if face in faces:
+                    return index  # Both cards of this pair are known
+                faces[face] = index
+        else:
+            for index, face in seen.items():
+                if face == seen[first] and index != first:
+                    return index
+        unseen = [index for index in range(num_cards) if index not in seen and index not in matched]
+        if unseen:
+            return self.rng.choice(unseen)
+        return self.rng.choice([index for index in seen if index != first])
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+async def wait_for_server(host, port, timeout=10):
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            reader, writer = await asyncio.open_connection(host, port)
+        except OSError:
+            if time.monotonic() > deadline:
+                raise
+            await asyncio.sleep(0.05)
+        else:
+            writer.close()
+            return
+
+
+async def run(args, host, port):
+    await wait_for_server(host, port)
+    latencies = []
+    until = time.monotonic() + args.duration
+    bots = [Bot(args.level, latencies, seed) for seed in range(args.matches * 2)]
+    start = time.perf_counter()
+    tasks = [asyncio.ensure_future(bot.run(host, port, until)) for bot in bots]
+    # Matches still running when the time is up are played out; bots left
+    # waiting for an opponent after that are cut off
+    await asyncio.sleep(args.duration)
+    while any(bot.playing for bot in bots):
+        await asyncio.sleep(0.05)
+    for task in tasks:
+        task.cancel()
+    results = await asyncio.gather(*tasks, return_exceptions=True)
+    for result in results:
+        if isinstance(result, Exception):
+            raise result
+    elapsed = max(bot.finished_at for bot in bots) - start
+    return sum(bot.matches for bot in bots) // 2, elapsed, latencies
+
+
+def percentile(samples, q):
+    return samples[min(int(q * len(samples)), len(samples) - 1)] * 1000 if samples else 0.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Play many matches against server.py at once.")
+    parser.add_argument('--connect', metavar='HOST:PORT', help="use a running server instead of starting one")
+    parser.add_argument('--matches', type=int, default=1000, help="matches played at the same time")
+    parser.add_argument('--duration', type=float, default=10, help="seconds to keep starting new matches")
+    parser.add_argument('--level', choices=LEVEL_NAMES, default='easy')
+    args = parser.parse_args()
+
+    server = None
+    if args.connect:
+        host, port = args.connect.rsplit(':', 1)
+        port = int(port)
+    else:
+        host, port = '127.0.0.1', free_port()
+        server = subprocess.Popen([sys.executable, os.path.join(ROOT, 'server.py'), '--host', host, '--port', str(port)],
+                                  stdout=subprocess.DEVNULL)
+    try:
+        matches, elapsed, latencies = asyncio.run(run(args, host, port))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    latencies.sort()
+    print(f"{matches} matches in {elapsed:.1f} s: {matches / elapsed:.0f} matches/s, {len(latencies)} moves")
+    print(f"move latency: p50 {percentile(latencies, 0.5):.2f} ms, p99 {percentile(latencies, 0.99):.2f} ms, "
+          f"max {percentile(latencies, 1):.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+# Fuzz test for pipelined input. Bursts of taps land on the real game screen,
+# as several fingers would, on the virtual clock of pipelined_input.py: any
+# card, often one matched or face up already, often while a pair is showing.
+# After every tap the board, the hint knowledge and the drawn faces must agree,
+# and once the screen has been left alone for a reveal nothing stays face up
+# that the board has face down. Some games run out of time with a pair showing.
+# Every game is then replayed from replay.bin and has to end as it was played.
+# Exits with status 1 on the first disagreement.
+#
+#   python -m benchmarks.pipelined_fuzz [--games 200] [--level hard] [--seed 0]
+import benchmarks._headless  # noqa: F401  Must come before anything that imports Kivy
+
+import argparse
+import random
+import sys
+from unittest import mock
+
+from benchmarks.pipelined_input import VirtualClock
+from benchmarks.suite import BenchApp, close_popups
+from engine import PLAYING, WON
+from levels import playable
+from replay import ReplayReader
+import main as game
+
+MAX_BURST = 5   # taps landing in the same frame
+AIM = 0.3       # chance a tap goes to the partner of the face up card, so some games are won
+CUT_SHORT = 0.3 # chance a game's time runs out a few seconds in, likely with a pair showing
+
+
+class Disagreement(Exception):
+    pass
+
+
+def check(screen, settled=False):
+    board, grid, knowledge = screen.board, screen.grid, screen.knowledge
+    pending = [index for index in (board.first, board.second) if index != -1]
+    if board.second != -1 and board.first == -1:
+        raise Disagreement("second card without a first")
+    if any(board.is_matched(index) for index in pending):
+        raise Disagreement(f"matched card pending in {pending}")
+    if board.num_matched != sum(bin(byte).count('1') for byte in board.matched):
+        raise Disagreement("num_matched does not count the matched cards")
+    if knowledge.shown != [(index, board.face(index)) for index in pending]:
+        raise Disagreement(f"knowledge shows {knowledge.shown}, the board {pending}")
+    if knowledge.matched != sum(1 << index for index in range(board.num_cards) if board.is_matched(index)):
+        raise Disagreement("knowledge and board disagree on the matched cards")
+    for index, face in enumerate(grid.faces):
+        if face is not None and face is not screen.card_faces[board.face(index)]:
+            raise Disagreement(f"card {index} is drawn with another card's face")
+        if face is None and board.is_face_up(index):
+            raise Disagreement(f"card {index} is face up but drawn face down")
+        if face is not None and settled and not board.is_face_up(index):
+            raise Disagreement(f"card {index} is still drawn after its reveal")
+
+
+def outcome(board):
+    return board.state, board.num_attempts, bytes(board.matched)
+
+
+def tap(screen, rng):
+    board = screen.board
+    if board.first != -1 and board.second == -1 and rng.random() < AIM:
+        face = board.face(board.first)
+        return next(index for index in range(board.num_cards) if index != board.first and board.face(index) == face)
+    return rng.randrange(board.num_cards)
+
+
+def play(screen, clock, rng, time_limit):
+    # One game of bursts and pauses; returns how it ended and whether time ran out
+    screen.reset()
+    screen.start_timer()
+    board = screen.board
+    start = clock.now
+    timed_out = False
+    while board.state == PLAYING:
+        if clock.now - start >= time_limit:
+            screen.time_up()  # The game clock runs on real time, so it is ended here at its virtual limit
+            timed_out = True
+            break
+        for _ in range(rng.randint(1, MAX_BURST)):
+            screen.on_image_click(screen.grid, tap(screen, rng), None)
+            check(screen)
+            if board.state != PLAYING:
+                break
+        if rng.random() < 0.3:
+            clock.advance(clock.now + game.REVEAL_DELAY)
+            check(screen, settled=board.second == -1)
+        else:
+            clock.advance(clock.now + rng.uniform(0, game.REVEAL_DELAY))
+            check(screen)
+    clock.advance(clock.now + game.REVEAL_DELAY)  # Lets a pending check or hide run out
+    check(screen, settled=True)
+    close_popups()
+    return outcome(board), timed_out
+
+
+def replayed(screen, clock, session):
+    screen.play_replay(session)
+    clock.advance(clock.now + max((seconds for _, _, _, seconds in session.events()), default=0) + game.REVEAL_DELAY)
+    check(screen, settled=True)
+    close_popups()
+    return outcome(screen.board)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fuzz pipelined input with bursts of taps and replay every game.")
+    parser.add_argument('--games', type=int, default=200)
+    parser.add_argument('--level', choices=playable(), default='hard')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    app = BenchApp()
+    app.load_kv(filename=app.kv_file)
+    app.root = app.build()
+    app.pipelined_input = True
+    level = playable()[args.level]
+    rng = random.Random(args.seed)
+    clock = VirtualClock()
+    with mock.patch.object(game, 'Clock', clock):
+        screen = app.get_game_screen(args.level)
+        app.root.current = screen.name
+        try:
+            played = [play(screen, clock, rng, rng.uniform(1, 10) if rng.random() < CUT_SHORT else level.time_limit)
+                      for _ in range(args.games)]
+            app.replay_log.close()
+            reader = ReplayReader(app.replay_path)
+            app.replay_log = type(app.replay_log)(app.replay_path)
+            first_session = len(reader) - args.games  # The games played above are the last sessions
+            for number, (expected, _) in enumerate(played):
+                actual = replayed(screen, clock, reader.session(first_session + number))
+                if actual != expected:
+                    raise Disagreement(f"game {number} replayed to {actual[:2]}, it was played to {expected[:2]}")
+        except Disagreement as error:
+            print(f"FAIL: {error}")
+            app.on_stop()
+            sys.exit(1)
+    app.on_stop()
+
+    won = sum(state == WON for (state, _, _), _ in played)
+    timed_out = sum(timed_out for _, timed_out in played)
+    print(f"{args.games} games on {args.level}: {won} won, {timed_out} out of time, "
+          f"{args.games - won - timed_out} out of attempts; every one replayed to the same end")
+
+
+if __name__ == "__main__":
+    main()
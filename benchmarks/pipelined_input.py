@@ -0,0 +1,117 @@
+# Picks per minute with and without pipelined input. A simulated player with
+# the forgetful memory model plays the real game screen on a virtual clock:
+# it needs SECONDS_PER_FLIP (+-50%) per pick, counted from when the board
+# last changed for it. That is the hide at the end of a mismatch reveal
+# today, or the second card showing when input is pipelined.
+#
+#   python -m benchmarks.pipelined_input [--games 200]
+import benchmarks._headless  # noqa: F401  Must come before anything that imports Kivy
+
+import argparse
+import heapq
+import itertools
+import random
+from unittest import mock
+
+from benchmarks.suite import BenchApp, close_popups
+from balancer import MEMORY_MODELS, SECONDS_PER_FLIP
+from engine import PLAYING
+from levels import playable
+from solver import Knowledge
+import main as game
+
+
+class VirtualEvent:
+    def __init__(self, callback):
+        self.callback = callback
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+
+class VirtualClock:
+    # Stands in for main.Clock; time only moves when advance() is called
+    def __init__(self):
+        self.now = 0.0
+        self.queue = []
+        self.order = itertools.count()
+
+    def schedule_once(self, callback, timeout=0):
+        event = VirtualEvent(callback)
+        heapq.heappush(self.queue, (self.now + timeout, next(self.order), event))
+        return event
+
+    def get_time(self):
+        return self.now
+
+    def advance(self, until):
+        while self.queue and self.queue[0][0] <= until:
+            when, _, event = heapq.heappop(self.queue)
+            self.now = when
+            if not event.cancelled:
+                event.callback(0)
+        self.now = until
+
+
+def play(screen, clock, rng, recall):
+    # One game; returns accepted picks, seconds played and the final board state
+    screen.reset()
+    screen.start_timer()
+    board = screen.board
+    knowledge = screen.knowledge = Knowledge(board.num_cards, recall, rng.getrandbits(32))
+    start = ready = clock.now
+    picks = 0
+    while board.state == PLAYING:
+        clock.advance(ready + SECONDS_PER_FLIP * rng.uniform(0.5, 1.5))
+        if board.state != PLAYING:
+            break
+        first = board.first
+        if board.second != -1:
+            if not screen.pipelined:
+                ready = screen.reveal_end  # Waits for the pair to be hidden before picking on
+                continue
+            # Both faces are in sight, so the player already knows how the pair
+            # ends, and this pick starts the next one
+            knowledge.checked(board.face(board.first) == board.face(board.second))
+            first = -1
+        index = knowledge.suggest(first)[0]
+        screen.on_image_click(screen.grid, index, None)
+        picks += 1
+        ready = clock.now
+    clock.advance(clock.now + game.REVEAL_DELAY)  # Lets a pending hide run out
+    close_popups()
+    return picks, clock.now - start, board.state
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare picks per minute with and without pipelined input.")
+    parser.add_argument('--games', type=int, default=200)
+    parser.add_argument('--model', choices=MEMORY_MODELS, default='forgetful')
+    args = parser.parse_args()
+
+    app = BenchApp()
+    app.load_kv(filename=app.kv_file)
+    app.root = app.build()
+    clock = VirtualClock()
+    with mock.patch.object(game, 'Clock', clock):
+        for name, level in playable().items():
+            screen = app.get_game_screen(name)
+            app.root.current = screen.name
+            for pipelined in (False, True):
+                app.pipelined_input = pipelined
+                rng = random.Random(0)
+                picks = seconds = over_time = 0
+                for _ in range(args.games):
+                    game_picks, game_seconds, state = play(screen, clock, rng, MEMORY_MODELS[args.model])
+                    picks += game_picks
+                    seconds += game_seconds
+                    over_time += game_seconds > level.time_limit
+                print(f"{name:<7} {'pipelined' if pipelined else 'blocking':<9} "
+                      f"{picks / seconds * 60:6.1f} picks/min, {seconds / args.games:5.1f} s per game, "
+                      f"{over_time / args.games:6.1%} over the {level.time_limit} s limit")
+    app.on_stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,31 @@
+# Times drawing procedural card faces for one big board, then dealing the
+# same faces again for the next game, which should come from the cache:
+#
+#   python -m benchmarks.procedural_faces [--pairs 200] [--cell 128]
+import benchmarks._headless  # noqa: F401  Must come before anything that imports Kivy
+
+import argparse
+import time
+
+from kivy.core.window import Window  # noqa: F401  Creates the GL context the Fbos need
+
+from procedural import ProceduralFaces
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time drawing procedural card faces.")
+    parser.add_argument('--pairs', type=int, default=200)
+    parser.add_argument('--cell', type=int, default=128)
+    args = parser.parse_args()
+
+    faces = ProceduralFaces(args.cell)
+    faces.glyph('1')  # Loading the font is a one-off cost of the first label
+    for game in ('first game', 'next game'):
+        start = time.perf_counter()
+        faces.load(range(args.pairs))
+        print(f"{game}: {args.pairs} faces in {(time.perf_counter() - start) * 1000:.1f} ms, "
+              f"{faces.rendered} drawn so far")
+
+
+if __name__ == "__main__":
+    main()
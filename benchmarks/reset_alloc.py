@@ -0,0 +1,46 @@
+# Widgets allocated and time spent per reset() of the game screen at each level.
+# A pooled reset should report zero new widgets.
+#
+#   python -m benchmarks.reset_alloc [resets]
+import benchmarks._headless  # noqa: F401  Must come before anything that imports Kivy
+
+import gc
+import sys
+import time
+
+from kivy.uix.widget import Widget
+
+from levels import playable
+from main import MemoryGameApp
+
+
+def live_widgets():
+    gc.collect()
+    return [obj for obj in gc.get_objects() if isinstance(obj, Widget)]
+
+
+def main():
+    resets = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    app = MemoryGameApp()
+    app.load_kv()
+    app.root = app.build()
+
+    for name in playable():
+        screen = app.get_game_screen(name)
+        screen.reset()  # First reset may still settle lazily created widgets
+
+        before = live_widgets()
+        seen = {id(widget) for widget in before}
+        start = time.perf_counter()
+        for _ in range(resets):
+            screen.reset()
+        elapsed = time.perf_counter() - start
+        new = [widget for widget in live_widgets() if id(widget) not in seen]
+
+        print(f"{name:<7} {screen.board.num_cards} cards: {elapsed / resets * 1e6:8.1f} us per reset, "
+              f"{len(new)} new widgets after {resets} resets")
+        del before
+
+
+if __name__ == "__main__":
+    main()
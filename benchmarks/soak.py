@@ -0,0 +1,179 @@
+# Soak test for unattended kiosks. A bot plays thousands of rounds across all
+# levels through the real screens: it presses the menu, level chooser, Hint,
+# Play Again and Back buttons, and its taps go through the board widget. Every
+# few rounds, with the popups closed, it samples what a leak would show in:
+# live widgets, Clock events, textures, sounds and the process's RSS. It exits
+# with status 1 if any of them is still climbing after the warm-up.
+#
+#   python -m benchmarks.soak [--rounds 3000] [--sample-every 100] [--warmup 300]
+#
+# Screen transitions are switched off and a pair is checked on the next frame
+# instead of after a second, so a round is a few dozen frames, not a minute.
+import benchmarks._headless  # noqa: F401  Must come before anything that imports Kivy
+
+from kivy.config import Config
+
+Config.set('graphics', 'maxfps', '0')  # Frames as fast as they can be drawn; read when the Clock is created
+
+import argparse
+import gc
+import os
+import sys
+import time
+from unittest import mock
+
+from kivy.base import EventLoop
+from kivy.clock import Clock
+from kivy.core.audio import Sound
+from kivy.core.window import Window
+from kivy.graphics.texture import Texture
+from kivy.uix.button import Button
+from kivy.uix.popup import Popup
+from kivy.uix.screenmanager import NoTransition
+from kivy.uix.spinner import Spinner
+from kivy.uix.widget import Widget
+
+from benchmarks.suite import BenchApp
+from engine import PLAYING
+from levels import playable
+from solver import MEMORY_MODELS
+import main as game
+
+METRICS = ('widgets', 'clock_events', 'textures', 'texture_mb', 'sounds', 'rss_mb')
+
+
+def rss_mb():
+    # Resident set size now; where there is no /proc, the peak so far
+    try:
+        with open('/proc/self/statm') as statm:
+            return int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2**20
+    except OSError:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / 2**20 if sys.platform == 'darwin' else peak / 1024
+
+
+def sample(app):
+    gc.collect()
+    counts = dict.fromkeys(('widgets', 'textures', 'sounds'), 0)
+    for obj in gc.get_objects():
+        if isinstance(obj, Widget):
+            counts['widgets'] += 1
+        elif isinstance(obj, Texture):
+            counts['textures'] += 1
+        elif isinstance(obj, Sound):
+            counts['sounds'] += 1
+    counts['clock_events'] = len(Clock.get_events())
+    counts['texture_mb'] = app.texture_budget.resident() / 2**20
+    counts['rss_mb'] = rss_mb()
+    return counts
+
+
+def growing(values, slack=0):
+    # Bounded metrics settle after the warm-up; one that grows without bound
+    # has every sample of the second half above all of the first
+    half = len(values) // 2
+    return half >= 2 and min(values[half:]) > max(values[:half]) + slack
+
+
+def frame():
+    EventLoop.idle()
+    if EventLoop.quit:
+        raise RuntimeError("the event loop stopped")
+
+
+def settle(timeout=5.0):
+    # Runs frames until popups have finished closing
+    deadline = time.perf_counter() + timeout
+    while any(isinstance(widget, Popup) for widget in Window.children):
+        if time.perf_counter() > deadline:
+            raise RuntimeError("a popup did not close")
+        frame()
+
+
+def press(parent, text):
+    button = next(widget for widget in parent.walk() if isinstance(widget, Button) and widget.text == text)
+    button.dispatch('on_release')
+    frame()
+
+
+def open_popup():
+    return next(widget for widget in Window.children if isinstance(widget, Popup))
+
+
+def play(screen, recall):
+    # One game to the end, with a Hint pressed first
+    screen.knowledge.recall = recall
+    press(screen, "Hint")
+    while screen.board.state == PLAYING:
+        if screen.board.second != -1:
+            frame()  # check_match is due on the next frame
+            continue
+        index = screen.knowledge.suggest(screen.board.first)[0]
+        screen.grid.dispatch('on_card_press', index, None)
+        frame()
+
+
+def soak(app, rounds, sample_every):
+    levels = list(playable().values())
+    models = list(MEMORY_MODELS.values())
+    menu = app.root.get_screen('main_menu')
+    for round_ in range(rounds):
+        level = levels[round_ // 2 % len(levels)]  # Two games of each level, the second one through Play Again
+        screen = app.root.get_screen('game') if app.root.has_screen('game') else None
+        if app.root.current != 'game' or screen.level is not level:
+            if app.root.current == 'game':
+                press(screen, "Back to Main Menu")
+            press(menu, "Start")
+            chooser = app.get_choose_level_screen()
+            next(widget for widget in chooser.walk() if isinstance(widget, Spinner)).text = level.title
+            press(chooser, "Start")
+            screen = app.root.get_screen('game')
+
+        play(screen, models[round_ % len(models)])
+        press(open_popup(), "Play Again")
+        settle()
+
+        if (round_ + 1) % sample_every == 0:
+            yield round_ + 1, sample(app)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Play rounds unattended and fail if resources keep growing.")
+    parser.add_argument('--rounds', type=int, default=3000)
+    parser.add_argument('--sample-every', type=int, default=100, help="rounds between samples")
+    parser.add_argument('--warmup', type=int, default=300, help="rounds before samples count towards growth")
+    parser.add_argument('--rss-slack-mb', type=float, default=8.0, help="RSS growth taken as allocator noise")
+    args = parser.parse_args()
+
+    app = BenchApp()
+    app.load_kv(filename=app.kv_file)
+    app.root = app.build()
+    app.root.transition = NoTransition()
+    Window.add_widget(app.root)
+    EventLoop.ensure_window()
+
+    print(f"{'round':>7} {'seconds':>8} " + ' '.join(f"{name:>12}" for name in METRICS))
+    start = time.perf_counter()
+    samples = []
+    with mock.patch.object(game, 'REVEAL_DELAY', 0):
+        for round_, counts in soak(app, args.rounds, args.sample_every):
+            samples.append((round_, counts))
+            print(f"{round_:>7} {time.perf_counter() - start:8.1f} "
+                  + ' '.join(f"{counts[name]:>12.1f}" if isinstance(counts[name], float) else f"{counts[name]:>12}"
+                             for name in METRICS), flush=True)
+    app.on_stop()
+
+    counted = [counts for round_, counts in samples if round_ > args.warmup]
+    leaks = [name for name in METRICS
+             if growing([counts[name] for counts in counted], args.rss_slack_mb if name == 'rss_mb' else 0)]
+    for name in leaks:
+        print(f"LEAK: {name} kept growing, {counted[0][name]} -> {counted[-1][name]} "
+              f"after round {args.warmup}")
+    if leaks:
+        sys.exit(1)
+    print(f"No growth over {args.rounds} rounds")
+
+
+if __name__ == "__main__":
+    main()
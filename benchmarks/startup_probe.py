@@ -0,0 +1,22 @@
+# Runs the app until its first frame and prints how long that took, both from
+# the parent's spawn time (argv[1]) and from main.py's first line.
+# Used by benchmarks.suite, which starts it in a fresh interpreter.
+import benchmarks._headless  # noqa: F401  Must come before anything that imports Kivy
+
+import sys
+import time
+
+from benchmarks.suite import BenchApp
+
+
+class Probe(BenchApp):
+    warm_game_screens = False
+
+    def on_first_frame(self, window):
+        super(Probe, self).on_first_frame(window)
+        print('PROBE', time.time() - float(sys.argv[1]), self.startup_time)
+        self.stop()
+
+
+if __name__ == "__main__":
+    Probe().run()
@@ -0,0 +1,195 @@
+# Repeatable benchmark suite that runs without a display. Results are written
+# as JSON so two commits can be compared:
+#
+#   python -m benchmarks.suite --out before.json
+#   python -m benchmarks.suite --out after.json --compare before.json
+import benchmarks._headless  # noqa: F401  Must come before anything that imports Kivy
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from statistics import median
+from unittest import mock
+
+from kivy import __version__ as kivy_version
+from kivy.clock import Clock
+from kivy.core.window import Window
+from kivy.uix.popup import Popup
+
+import main as game
+from benchmarks.import_time import bench_imports
+from levels import playable
+
+
+class BenchApp(game.MemoryGameApp):
+    # Keeps replay logs and other user data of benchmark games out of the
+    # player's profile, in a temporary directory made by build() and removed
+    # by on_stop(); benchmarks that never run() the app call on_stop() themselves
+    data_dir = None
+    kv_file = os.path.join(os.path.dirname(os.path.abspath(game.__file__)), 'memorygameapp.kv')
+
+    @property
+    def user_data_dir(self):
+        return self.data_dir
+
+    def build(self):
+        if self.data_dir is None:
+            self.data_dir = tempfile.mkdtemp(prefix='memorygame-bench-')
+        return super(BenchApp, self).build()
+
+    def on_stop(self):
+        super(BenchApp, self).on_stop()
+        shutil.rmtree(self.data_dir, ignore_errors=True)
+        self.data_dir = None
+
+
+class ImmediateClock:
+    # Stands in for main.Clock so the one second reveal delay runs at once
+    def schedule_once(self, callback, timeout=0):
+        callback(timeout)
+
+    def __getattr__(self, name):
+        return getattr(Clock, name)
+
+
+def close_popups():
+    for widget in list(Window.children):
+        if isinstance(widget, Popup):
+            widget.dismiss(animation=False)
+
+
+def bench_startup(runs):
+    # Process start to first frame, measured in fresh interpreters
+    total, first_frame = [], []
+    for _ in range(runs):
+        output = subprocess.run([sys.executable, '-m', 'benchmarks.startup_probe', repr(time.time())],
+                                capture_output=True, text=True, check=True).stdout
+        probe = next(line for line in output.splitlines() if line.startswith('PROBE'))
+        process, app = map(float, probe.split()[1:])
+        total.append(process * 1000)
+        first_frame.append(app * 1000)
+    return {'startup_process_ms': median(total), 'startup_main_to_first_frame_ms': median(first_frame)}
+
+
+def bench_build(app, runs):
+    samples = []
+    for run in range(runs):
+        if run:
+            app.replay_log.close()
+            app.stats.close()
+            app.autosave.close()
+        start = time.perf_counter()
+        root = app.build()
+        samples.append((time.perf_counter() - start) * 1000)
+    app.root = root
+    Window.add_widget(root)
+    return {'build_ms': median(samples)}
+
+
+def bench_reset(app, runs):
+    results = {}
+    for level in playable():
+        screen = app.get_game_screen(level)
+        start = time.perf_counter()
+        for _ in range(runs):
+            screen.reset()
+        results[f'reset_{level}_us'] = (time.perf_counter() - start) / runs * 1e6
+    return results
+
+
+def play(screen):
+    # Perfect play: both cards of every pair, in board order
+    positions = {}
+    for index, face in enumerate(screen.board.cards):
+        positions.setdefault(face, []).append(index)
+    clicks = 0
+    for first, second in positions.values():
+        screen.on_image_click(screen.grid, first, None)
+        screen.on_image_click(screen.grid, second, None)
+        clicks += 2
+    return clicks
+
+
+def bench_play(app, games):
+    results = {}
+    with mock.patch.object(game, 'Clock', ImmediateClock()):
+        for level in playable():
+            screen = app.get_game_screen(level)
+            app.root.current = screen.name
+            clicks = 0
+            start = time.perf_counter()
+            for _ in range(games):
+                screen.reset()
+                screen.start_timer()
+                clicks += play(screen)
+                close_popups()
+            elapsed = time.perf_counter() - start
+            results[f'game_{level}_ms'] = elapsed / games * 1000
+            results[f'clicks_{level}_per_s'] = clicks / elapsed
+    return results
+
+
+def run(args):
+    results = {}
+    results.update(bench_startup(args.startup_runs))
+    results.update(bench_imports(args.startup_runs))
+
+    app = BenchApp()
+    app.load_kv(filename=app.kv_file)
+    results.update(bench_build(app, args.runs))
+    results.update(bench_reset(app, args.runs * 50))
+    results.update(bench_play(app, args.games))
+    app.on_stop()
+    return results
+
+
+def meta():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True).stdout.strip()
+    except OSError:
+        commit = ''
+    return {'commit': commit, 'python': platform.python_version(), 'kivy': kivy_version,
+            'platform': platform.platform(), 'time': time.strftime('%Y-%m-%dT%H:%M:%S')}
+
+
+def compare(results, baseline):
+    print(f"{'metric':<34} {'baseline':>12} {'current':>12} {'change':>8}")
+    for name, value in results.items():
+        before = baseline.get(name)
+        if before is None:
+            print(f"{name:<34} {'-':>12} {value:12.3f}")
+        else:
+            change = (value - before) / before * 100 if before else 0.0
+            print(f"{name:<34} {before:12.3f} {value:12.3f} {change:+7.1f}%")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless benchmarks for the memory game.")
+    parser.add_argument('--out', help="write results to this JSON file")
+    parser.add_argument('--compare', help="JSON file from an earlier run to compare against")
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--startup-runs', type=int, default=3)
+    parser.add_argument('--games', type=int, default=50)
+    args = parser.parse_args()
+
+    results = run(args)
+    report = {'meta': meta(), 'results': results}
+    if args.out:
+        with open(args.out, 'w') as out:
+            json.dump(report, out, indent=2)
+
+    if args.compare:
+        with open(args.compare) as baseline:
+            compare(results, json.load(baseline)['results'])
+    else:
+        print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
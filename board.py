@@ -0,0 +1,98 @@
+# Game board drawn as one canvas. Every card is a single Rectangle instruction
+# and touches are mapped to a card with grid math, so boards of hundreds of
+# cards cost no more widgets, layout passes or event dispatch than one card.
+from kivy.graphics import Color, Line, Rectangle
+from kivy.properties import NumericProperty
+from kivy.uix.widget import Widget
+
+
+class BoardWidget(Widget):
+    cols = NumericProperty(4)
+    spacing = NumericProperty(10)
+
+    def __init__(self, **kwargs):
+        self.register_event_type('on_card_press')
+        super(BoardWidget, self).__init__(**kwargs)
+        self.rects = []
+        self.faces = []
+        self.highlighted = []
+        with self.canvas:
+            Color(1, 1, 1, 1)  # Face down cards are plain white
+        self.bind(pos=self.update_layout, size=self.update_layout, cols=self.update_layout, spacing=self.update_layout)
+
+    def set_cards(self, count):
+        # Rectangles are kept and reused; only a bigger board adds new ones
+        while len(self.rects) < count:
+            rect = Rectangle()
+            self.rects.append(rect)
+            self.canvas.add(rect)
+        while len(self.rects) > count:
+            self.canvas.remove(self.rects.pop())
+        self.faces = [None] * count
+        self.highlighted = []
+        self.canvas.after.clear()
+        self.clear_faces()
+        self.update_layout()
+
+    def clear_faces(self):
+        for index, rect in enumerate(self.rects):
+            rect.texture = None
+            self.faces[index] = None
+
+    def set_face(self, index, texture):
+        # texture is a card face region, or None to turn the card face down
+        self.faces[index] = texture
+        self.rects[index].texture = texture
+
+    def set_highlight(self, indexes):
+        # Outlines these cards, e.g. for a hint; an empty list removes the outlines
+        if not indexes and not self.highlighted:
+            return
+        self.highlighted = list(indexes)
+        self.canvas.after.clear()
+        with self.canvas.after:
+            Color(1, 0.43, 0.85, 1)
+            for index in self.highlighted:
+                rect = self.rects[index]
+                Line(rectangle=(rect.pos[0], rect.pos[1], rect.size[0], rect.size[1]), width=3)
+
+    def rows(self):
+        return -(-len(self.rects) // self.cols)
+
+    def cell_size(self):
+        rows = max(self.rows(), 1)
+        width = (self.width - self.spacing * (self.cols - 1)) / self.cols
+        height = (self.height - self.spacing * (rows - 1)) / rows
+        return max(width, 0), max(height, 0)
+
+    def update_layout(self, *args):
+        # Cards fill rows from the top left, like the GridLayout they replace
+        width, height = self.cell_size()
+        for index, rect in enumerate(self.rects):
+            row, col = divmod(index, self.cols)
+            rect.pos = (self.x + col * (width + self.spacing), self.top - (row + 1) * height - row * self.spacing)
+            rect.size = (width, height)
+        if self.highlighted:
+            self.set_highlight(self.highlighted)
+
+    def card_at(self, x, y):
+        width, height = self.cell_size()
+        if width <= 0 or height <= 0:
+            return -1
+        col, col_offset = divmod(x - self.x, width + self.spacing)
+        row, row_offset = divmod(self.top - y, height + self.spacing)
+        if col_offset > width or row_offset > height or not 0 <= col < self.cols:
+            return -1  # Touch landed in the spacing between cards
+        index = int(row) * self.cols + int(col)
+        return index if 0 <= index < len(self.rects) else -1
+
+    def on_touch_down(self, touch):
+        if not self.collide_point(*touch.pos):
+            return super(BoardWidget, self).on_touch_down(touch)
+        index = self.card_at(*touch.pos)
+        if index != -1:
+            self.dispatch('on_card_press', index, touch)
+        return True
+
+    def on_card_press(self, index, touch):
+        pass
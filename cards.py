@@ -0,0 +1,91 @@
+# Texture atlas the card faces are drawn from.
+from collections import Counter
+from functools import partial
+from math import ceil, sqrt
+
+from kivy.core.image import Image as CoreImage
+from kivy.graphics import Fbo, ClearColor, ClearBuffers, Rectangle
+
+from variants import BUCKETS
+
+
+def cell_size_for(pixels, largest=256):
+    # Smallest density bucket covering a card drawn this many pixels wide,
+    # never more than the card sources themselves
+    for bucket in BUCKETS:
+        if bucket >= pixels:
+            return min(bucket, largest)
+    return largest
+
+
+class CardAtlas:
+    # Packs card face images into one texture per load() call. Every image is
+    # read from disk once; afterwards a face is just a region of that texture,
+    # and only the page is kept in texture memory, not the images it was drawn from.
+    def __init__(self, cell_size=256, assets=None):
+        self.cell_size = cell_size
+        self.assets = assets  # packs.Assets of the theme, to read the sources or smaller copies from
+        self.pages = []
+        self.textures = {}
+        self.page_of = {}     # source -> the page its region lives in
+        self.page_bytes = {}  # page -> bytes of texture memory the page holds
+        self.users = Counter()  # source -> load() calls not yet matched by unload(), one per screen
+
+    def load(self, sources):
+        self.users.update(dict.fromkeys(sources, 1))
+        missing = [source for source in dict.fromkeys(sources) if source not in self.textures]
+        if missing:
+            self.pack(missing)
+        return [self.textures[source] for source in sources]
+
+    def pack(self, sources):
+        cell = self.cell_size
+        cols = ceil(sqrt(len(sources)))
+        rows = ceil(len(sources) / cols)
+        fbo = Fbo(size=(cols * cell, rows * cell))
+        regions = [(source, (i % cols) * cell, (i // cols) * cell) for i, source in enumerate(sources)]
+        self.bake(fbo, regions)
+        # A lost GL context takes the page with it, so it is drawn from the images again
+        fbo.add_reload_observer(partial(self.bake, regions=regions))
+
+        self.pages.append(fbo)
+        self.page_bytes[fbo] = cols * cell * rows * cell * 4
+        for source, x, y in regions:
+            self.textures[source] = fbo.texture.get_region(x, y, cell, cell)
+            self.page_of[source] = fbo
+
+    def bake(self, fbo, regions):
+        cell = self.cell_size
+        with fbo:
+            ClearColor(0, 0, 0, 0)
+            ClearBuffers()
+            for source, x, y in regions:
+                # Not kept in Kivy's image cache, so the texture goes with its rectangle
+                if self.assets:
+                    image = self.assets.image(self.assets.pick(source, cell, cell))
+                else:
+                    image = CoreImage(source, nocache=True)
+                Rectangle(texture=image.texture, pos=(x, y), size=(cell, cell))
+        fbo.draw()
+        fbo.clear()
+
+    def unload(self, sources):
+        # Forgets faces no other screen has loaded; a page goes once none of its faces are left
+        for source in dict.fromkeys(sources):
+            self.users[source] -= 1
+            if self.users[source] > 0:
+                continue
+            del self.users[source]
+            self.textures.pop(source, None)
+            page = self.page_of.pop(source, None)
+            if page is not None and page not in self.page_of.values():
+                self.pages.remove(page)
+                del self.page_bytes[page]
+
+    def nbytes(self, sources):
+        # Texture memory held by the pages these faces live in
+        pages = {self.page_of[source] for source in sources if source in self.page_of}
+        return sum(self.page_bytes[page] for page in pages)
+
+    def __getitem__(self, source):
+        return self.textures[source]
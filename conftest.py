@@ -0,0 +1 @@
+# Lets pytest import the game modules, which live at the top of the repository
@@ -0,0 +1,92 @@
+# Headless game rules for the memory game. Nothing in here imports Kivy, so the
+# same board can be driven by the screens, by tools and by tight test loops.
+from array import array
+from random import Random, getrandbits
+
+# Results of MemoryBoard.flip()
+FLIP_IGNORED = 0  # card is matched, already face up, or a pair is pending
+FLIP_FIRST = 1    # first card of a pair turned over
+FLIP_SECOND = 2   # second card turned over, call check_match() next
+
+# Board states
+PLAYING = 0
+WON = 1
+LOST = 2
+
+
+class MemoryBoard:
+    def __init__(self, num_pairs, max_attempts, seed=None):
+        self.num_pairs = num_pairs
+        self.num_cards = num_pairs * 2
+        self.max_attempts = max_attempts
+        self.shuffle(seed)
+
+    def shuffle(self, seed=None):
+        # Every board gets a 32-bit seed so it can be dealt again for a replay
+        if seed is None:
+            seed = getrandbits(32)
+        faces = list(range(self.num_pairs)) * 2
+        Random(seed).shuffle(faces)
+        self.seed = seed
+        # Face id of the card at each position, 2 bytes per card
+        self.cards = array('H', faces)
+        # One bit per position, set once the card has been matched
+        self.matched = bytearray((self.num_cards + 7) >> 3)
+        self.num_matched = 0
+        self.num_attempts = 0
+        self.first = -1
+        self.second = -1
+        self.state = PLAYING
+
+    def restore(self, seed, matched, num_attempts):
+        # Deals the board of `seed` again as it was part way through, see autosave.py
+        self.shuffle(seed)
+        self.matched[:] = matched
+        self.num_matched = sum(bin(byte).count('1') for byte in matched)
+        self.num_attempts = num_attempts
+
+    def face(self, index):
+        return self.cards[index]
+
+    def is_matched(self, index):
+        return self.matched[index >> 3] & (1 << (index & 7)) != 0
+
+    def is_face_up(self, index):
+        return index == self.first or index == self.second or self.is_matched(index)
+
+    def flip(self, index):
+        if self.state != PLAYING or self.second != -1 or index == self.first:
+            return FLIP_IGNORED
+        if self.matched[index >> 3] & (1 << (index & 7)):
+            return FLIP_IGNORED
+
+        if self.first == -1:
+            self.first = index
+            return FLIP_FIRST
+        self.second = index
+        return FLIP_SECOND
+
+    def check_match(self):
+        if self.state != PLAYING:  # Time ran out while the pair was showing; the result stands
+            return False
+        first, second = self.first, self.second
+        self.first = self.second = -1
+        if second == -1:
+            return False
+
+        if self.cards[first] == self.cards[second]:
+            self.matched[first >> 3] |= 1 << (first & 7)
+            self.matched[second >> 3] |= 1 << (second & 7)
+            self.num_matched += 2
+            if self.num_matched == self.num_cards:
+                self.state = WON
+            return True
+
+        self.num_attempts += 1
+        if self.num_attempts >= self.max_attempts:
+            self.state = LOST
+        return False
+
+    def time_up(self):
+        if self.state == PLAYING:
+            self.state = LOST
@@ -0,0 +1,89 @@
+# App-wide game clock. Timers keep a monotonic deadline instead of counting
+# ticks, so the time left is exact however late a frame is, and a single
+# Clock event is scheduled for the next moment any shown value changes.
+from math import ceil
+import time
+
+from kivy.clock import Clock
+
+
+class GameTimer:
+    def __init__(self, duration, on_change, on_expire):
+        self.deadline = time.monotonic() + duration
+        self.paused_left = None  # Seconds left while paused
+        self.shown = None
+        self.on_change = on_change
+        self.on_expire = on_expire
+
+    def remaining(self, now=None):
+        if self.paused_left is not None:
+            return self.paused_left
+        return max(self.deadline - (time.monotonic() if now is None else now), 0.0)
+
+    def next_change(self, now):
+        # Seconds until the whole seconds shown drop by one
+        left = self.remaining(now)
+        return left - (ceil(left) - 1) if left > 0 else 0.0
+
+
+class GameClock:
+    def __init__(self):
+        self.timers = {}  # owner -> GameTimer
+        self.event = None
+
+    def start(self, owner, duration, on_change, on_expire=None):
+        # on_change(seconds) gets the whole seconds left whenever they change;
+        # starting again replaces the owner's timer instead of adding another
+        self.timers[owner] = GameTimer(duration, on_change, on_expire)
+        self._tick()
+
+    def stop(self, owner):
+        if self.timers.pop(owner, None) is not None:
+            self._schedule()
+
+    def remaining(self, owner):
+        timer = self.timers.get(owner)
+        return timer.remaining() if timer else 0.0
+
+    def pause(self, owner=None):
+        # Pauses the owner's timer, or every timer when no owner is given
+        for timer in self._select(owner):
+            if timer.paused_left is None:
+                timer.paused_left = timer.remaining()
+        self._schedule()
+
+    def resume(self, owner=None):
+        now = time.monotonic()
+        for timer in self._select(owner):
+            if timer.paused_left is not None:
+                timer.deadline = now + timer.paused_left
+                timer.paused_left = None
+        self._schedule()
+
+    def _select(self, owner):
+        if owner is None:
+            return list(self.timers.values())
+        return [self.timers[owner]] if owner in self.timers else []
+
+    def _tick(self, dt=None):
+        now = time.monotonic()
+        for owner, timer in list(self.timers.items()):
+            left = timer.remaining(now)
+            shown = ceil(left)
+            if shown != timer.shown:
+                timer.shown = shown
+                timer.on_change(shown)
+            if left <= 0 and self.timers.get(owner) is timer:
+                del self.timers[owner]
+                if timer.on_expire:
+                    timer.on_expire()
+        self._schedule()
+
+    def _schedule(self):
+        if self.event is not None:
+            self.event.cancel()
+            self.event = None
+        now = time.monotonic()
+        waits = [timer.next_change(now) for timer in self.timers.values() if timer.paused_left is None]
+        if waits:
+            self.event = Clock.schedule_once(self._tick, min(waits))
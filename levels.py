@@ -0,0 +1,38 @@
+# Level table. Everything that differs between levels lives in one row here:
+# the game screen, the replay log, the balancer, the match server and the
+# analytics all read it, so a new level is one more row. Rows are in level
+# code order and the codes are stored in replay logs, so only append.
+
+
+class Level:
+    def __init__(self, name, deck, max_attempts, time_limit, cols=4, procedural=False):
+        self.name = name
+        self.title = name.capitalize()  # As shown in the level spinner
+        self.deck = deck                # face image of every pair, in face id order
+        self.max_attempts = max_attempts
+        self.time_limit = time_limit    # seconds
+        self.cols = cols
+        self.procedural = procedural    # deck is keys with no image, only drawn by procedural.py
+
+    @property
+    def num_pairs(self):
+        return len(self.deck)
+
+
+LEVELS = {level.name: level for level in (
+    Level('easy', ('assets/a.png', 'assets/b.png', 'assets/c.png', 'assets/d.png', 'assets/e.png',
+                   'assets/f.png'), max_attempts=20, time_limit=90),
+    Level('normal', ('assets/h.png', 'assets/i.png', 'assets/j.png', 'assets/k.png', 'assets/l.png',
+                     'assets/m.png', 'assets/x.png', 'assets/y.png'), max_attempts=16, time_limit=90),
+    Level('hard', ('assets/n.png', 'assets/o.png', 'assets/p.png', 'assets/q.png', 'assets/r.png',
+                   'assets/s.png', 'assets/t.png', 'assets/u.png', 'assets/v.png', 'assets/w.png'),
+          max_attempts=12, time_limit=60),
+    # More pairs than there are card images, so only with python main.py --procedural
+    Level('huge', tuple(f'procedural/{face}' for face in range(60)), max_attempts=66, time_limit=360, cols=12,
+          procedural=True),
+)}
+
+
+def playable(procedural_faces=False):
+    # The levels that can be dealt with the card faces in use
+    return {name: level for name, level in LEVELS.items() if procedural_faces or not level.procedural}
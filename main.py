@@ -1,53 +1,86 @@
+import time
+STARTUP_START = time.perf_counter()  # Taken before Kivy is imported, the earliest point main.py can see
+
+import argparse
+import os
+import sys
+from functools import partial
+
+# The command line is main.py's own (see the end of this file); otherwise Kivy
+# parses it first and exits on every option it does not know
+os.environ.setdefault('KIVY_NO_ARGS', '1')
+
 import kivy
 from kivy.app import App
 from kivy.uix.screenmanager import ScreenManager, Screen
 from kivy.uix.label import Label
 from kivy.uix.button import Button
-from kivy.uix.popup import Popup
 from kivy.uix.boxlayout import BoxLayout
-from kivy.uix.togglebutton import ToggleButton
-from kivy.core.audio import SoundLoader
-from kivy.utils import get_color_from_hex
-from kivy.uix.spinner import Spinner
-from kivy.uix.gridlayout import GridLayout
 from kivy.clock import Clock
-from random import shuffle
-
-class HardGameScreen(Screen):
+from kivy.core.window import Window
+from kivy.properties import ObjectProperty
+from engine import MemoryBoard, FLIP_IGNORED, FLIP_SECOND, PLAYING, WON, LOST
+from cards import CardAtlas, cell_size_for
+from procedural import ProceduralFaces
+from packs import Assets, themes, DEFAULT_THEME
+from board import BoardWidget
+from audio import AudioManager, CLICK_SOUND, BACKGROUND_MUSIC
+from replay import ReplayWriter, ReplayReader, FLIP, MATCH, END as END_RECORD, LEVEL_NAMES
+from levels import LEVELS, playable
+from stats import StatsStore
+from autosave import Autosave, load as load_autosave
+from gameclock import GameClock
+from textures import TextureBudget
+from solver import Knowledge, MoveWorker, DIFFICULTIES
+from server import JOIN, FLIP as FLIP_MOVE, START, SHOW, CHECKED, END, DRAW
+from netclient import NetClient, DISCONNECTED, start_local_server
+from profiling import profiler, timed
+
+BACKGROUND_IMAGE = 'assets/bg-0.png'
+REVEAL_DELAY = 1  # Seconds a turned over pair shows before it is checked
+
+
+class GameScreen(Screen):
+    # The one screen every level is played on. set_level() swaps the deck,
+    # limits and board in place, so levels cost a row in levels.py, not widgets.
     def __init__(self, **kwargs):
-        super(HardGameScreen, self).__init__(**kwargs)
-        self.images = ['assets/n.png', 'assets/o.png', 'assets/p.png', 'assets/q.png', 'assets/r.png', 'assets/s.png', 'assets/t.png', 'assets/u.png', 'assets/v.png', 'assets/w.png'] * 2
-        shuffle(self.images)
-        self.selected_images = []
-        self.matched_images = []
-        self.num_attempts = 0
-        self.max_attempts = 12
-        self.remaining_time = 60  # 2 minutes in seconds
-        self.timer_event = None
-
-        layout = self.ids.layout
+        super(GameScreen, self).__init__(**kwargs)
+        self.level = None
+        self.images = []
+        self.board = None
+        self.knowledge = None  # Everything the board has shown, for hints
+        self.card_faces = None  # Face textures, indexed by face id
+        self.remaining_time = 0
+        self.in_game = False  # A game of the player's is under way: autosaved and counted, unlike a replay
+        self.pipelined = False  # Taps during the reveal settle the pair instead of being ignored
+        self.match_check = None  # Scheduled check_match of the pair being shown
+        self.reveal_end = 0  # Clock time that pair's reveal is over
+        self.replay_events = []  # Scheduled records of the replay being shown, see play_replay()
+        self.replaying = False  # Taps on the board are ignored until the replay's last record has run
 
         layout = BoxLayout(orientation='vertical', spacing=10)
 
-        self.button_click_sound = SoundLoader.load('assets\mixkit-arcade-game-jump-coin-216.wav')
-        self.button_click_sound.volume = 0 if MemoryGameApp.game_sound_state == 'On' else 1
-
         # Add a label to display remaining time
-        self.time_label = Label(text=str(self.remaining_time), font_size=24, halign='right', size_hint=(1, 0.05), color=(0, 0, 0, 1), bold=True)
+        self.time_label = Label(text='', font_size=24, halign='right', size_hint=(1, 0.05), color=(0, 0, 0, 1), bold=True)
         layout.add_widget(self.time_label)
 
         # Add a label to display the number of attempts
-        self.attempts_label = Label(text=f"Attempts: {self.num_attempts}/{self.max_attempts}", font_size=18, halign='left', size_hint=(1, 0.05), color=(1, 0, 0, 1), bold=True)
+        self.attempts_label = Label(text='', font_size=18, halign='left', size_hint=(1, 0.05), color=(1, 0, 0, 1), bold=True)
         layout.add_widget(self.attempts_label)
 
-        self.grid = GridLayout(cols=4, spacing=10)
+        self.grid = BoardWidget(spacing=10)  # All cards are drawn in this one widget
+        self.grid.bind(on_card_press=self.on_image_click)
         layout.add_widget(self.grid)
-        self.can_click = True
 
-        for image in self.images:
-            btn = Button(background_normal='', background_color=(1, 1, 1, 1))  # Set the background color to white (R, G, B, A)
-            btn.bind(on_release=self.on_image_click)
-            self.grid.add_widget(btn)
+        hint_button = Button(
+            text="Hint",
+            on_release=self.show_hint,
+            size_hint=(0.2, 0.1),
+            pos_hint={'center_x': 0.5},
+            background_normal='',
+            background_color=(0.32, 0.83, 0.85, 1)
+        )
+        layout.add_widget(hint_button)
 
         back_to_menu_button = Button(
             text="Back to Main Menu",
@@ -61,228 +94,161 @@ class HardGameScreen(Screen):
 
         self.add_widget(layout)
 
-    def start_timer(self):
-        self.timer_event = Clock.schedule_interval(self.update_timer, 1)
-
-    def update_timer(self, dt):
-        self.remaining_time -= 1
-        self.time_label.text = str(self.remaining_time)
-
-        if self.remaining_time <= 0:
-            self.game_over("Time is up! You ran out of time.")
-            self.stop_timer()
-
-    def stop_timer(self):
-        if self.timer_event:
-            self.timer_event.cancel()
-
-    def on_image_click(self, button):
-        if self.button_click_sound:
-            self.button_click_sound.play()
-
-        if not self.can_click or button in (image[0] for image in self.selected_images):
+    def set_level(self, name):
+        level = LEVELS[name]
+        if level is self.level:
             return
-    
-        image_path = self.images[self.grid.children.index(button)]
-        if image_path in self.matched_images:
-            return
-    
-        if len(self.selected_images) < 2:
-            button.background_normal = image_path
-            self.selected_images.append((button, image_path))
-    
-        if len(self.selected_images) == 2:
-            self.can_click = False  # Disable further clicks until the match check is complete
-            Clock.schedule_once(self.check_match, 1)
-
-
-    def check_match(self, dt):
-        if self.selected_images[0][1] == self.selected_images[1][1]:
-            self.matched_images.extend([self.selected_images[0][1], self.selected_images[1][1]])
-            self.selected_images[0][0].disabled = True
-            self.selected_images[1][0].disabled = True
-            self.selected_images = []
-            if len(self.matched_images) == len(self.images):
-                self.game_over("Congratulations! You won!")
-        else:
-            self.selected_images[0][0].background_normal = ''
-            self.selected_images[1][0].background_normal = ''
-            self.selected_images = []
-            self.num_attempts += 1
-            if self.num_attempts >= self.max_attempts:
-                self.game_over("Game over! You ran out of attempts.")
-
-        self.can_click = True
-        self.update_attempts_label()
-
-    def update_attempts_label(self):
-        self.attempts_label.text = f"Attempts: {self.num_attempts}/{self.max_attempts}"
-
-    def game_over(self, message):
         self.stop_timer()
-        self.show_game_over_popup(message)
-
-    def show_game_over_popup(self, message):
-        popup = Popup(title="Game Over",
-                      content=BoxLayout(orientation='vertical', spacing=10, padding=10),
-                      size_hint=(None, None), size=(400, 200),
-                      auto_dismiss=False)  # Set auto_dismiss to False
-
-        # Add the label to display the message
-        popup.content.add_widget(Label(text=message, size_hint=(1, 0.8)))
-
-        play_again_button = Button(text="Play Again", on_release=lambda btn: self.reset_game(btn, popup))
-        popup.content.add_widget(play_again_button)
-
-        popup.open()
-
-    def switch_to_menu(self, instance):
-        # sound_manager = SoundManager
-        self.manager.current = 'main_menu'
-        
-
-    def reset_game(self, button, popup):
-        popup.dismiss()
-        self.manager.current = 'easy'
-        self.manager.get_screen('easy').reset()
-        self.start_timer()  # Restart the timer
-        self.num_attempts = 0  # Reset the number of attempts
-        self.update_attempts_label()
-
-    def reset(self):
-        self.grid.clear_widgets()
-        self.images = ['assets/n.png', 'assets/o.png', 'assets/p.png', 'assets/q.png', 'assets/r.png', 'assets/s.png', 'assets/t.png', 'assets/u.png', 'assets/v.png', 'assets/w.png'] * 2
-        shuffle(self.images)
-        self.selected_images = []
-        self.matched_images = []
-        self.num_attempts = 0
-        self.remaining_time = 60  # Reset the timer
-        self.update_attempts_label()
-
-        for image in self.images:
-            btn = Button(background_normal='', background_color=(1, 1, 1, 1))
-            btn.bind(on_release=self.on_image_click)
-            self.grid.add_widget(btn)
-
-        self.can_click = True
-
-
-    def on_leave(self):
+        card_atlas = App.get_running_app().card_atlas
+        if self.card_faces is not None:
+            card_atlas.unload(self.images)  # Only the current level's faces stay loaded
+        self.level = level
+        self.images = list(level.deck)
+        self.board = MemoryBoard(level.num_pairs, level.max_attempts)
+        self.knowledge = Knowledge(self.board.num_cards)
+        self.card_faces = card_atlas.load(self.images)
+        App.get_running_app().texture_budget.loaded(self.name)
+        self.grid.cols = level.cols
+        self.grid.set_cards(self.board.num_cards)
         self.reset()
-        self.stop_timer()
-
-
-
-class NormalGameScreen(Screen):
-    def __init__(self, **kwargs):
-        super(NormalGameScreen, self).__init__(**kwargs)
-        self.images = ['assets/h.png', 'assets/i.png', 'assets/j.png', 'assets/k.png', 'assets/l.png', 'assets/m.png', 'assets/x.png', 'assets/y.png'] * 2
-        shuffle(self.images)
-        self.selected_images = []
-        self.matched_images = []
-        self.num_attempts = 0
-        self.max_attempts = 16
-        self.remaining_time = 90  # 2 minutes in seconds
-        self.timer_event = None
-
-        layout = self.ids.layout
-
-        layout = BoxLayout(orientation='vertical', spacing=10)
-
-        self.button_click_sound = SoundLoader.load('assets\mixkit-arcade-game-jump-coin-216.wav')
-        self.button_click_sound.volume = 0 if MemoryGameApp.game_sound_state == 'On' else 1
-
-        # Add a label to display remaining time
-        self.time_label = Label(text=str(self.remaining_time), font_size=24, halign='right', size_hint=(1, 0.05), color=(0, 0, 0, 1), bold=True)
-        layout.add_widget(self.time_label)
-
-        # Add a label to display the number of attempts
-        self.attempts_label = Label(text=f"Attempts: {self.num_attempts}/{self.max_attempts}", font_size=18, halign='left', size_hint=(1, 0.05), color=(1, 0, 0, 1), bold=True)
-        layout.add_widget(self.attempts_label)
-
-        self.grid = GridLayout(cols=4, spacing=10)
-        layout.add_widget(self.grid)
-        self.can_click = True
-
-        for image in self.images:
-            btn = Button(background_normal='', background_color=(1, 1, 1, 1))  # Set the background color to white (R, G, B, A)
-            btn.bind(on_release=self.on_image_click)
-            self.grid.add_widget(btn)
-
-        back_to_menu_button = Button(
-            text="Back to Main Menu",
-            on_release=self.switch_to_menu,
-            size_hint=(0.2, 0.1),
-            pos_hint={'center_x': 0.5},
-            background_normal='', 
-            background_color=(1, 0.43, 0.85, 0.9)
-        )
-        layout.add_widget(back_to_menu_button)
-
-        self.add_widget(layout)
 
     def start_timer(self):
-        self.timer_event = Clock.schedule_interval(self.update_timer, 1)
-
-    def update_timer(self, dt):
-        self.remaining_time -= 1
-        self.time_label.text = str(self.remaining_time)
-
-        if self.remaining_time <= 0:
-            self.game_over("Time is up! You ran out of time.")
-            self.stop_timer()
+        # A game starts with its timer, so this is where its recording begins
+        self.pipelined = App.get_running_app().pipelined_input
+        App.get_running_app().replay_log.begin(self.level.name, self.board, self.remaining_time, self.pipelined)
+        self.in_game = True
+        App.get_running_app().game_clock.start(self, self.remaining_time, self.update_timer, self.time_up)
+
+    @timed('update_timer')
+    def update_timer(self, seconds):
+        # Called by the game clock only when the whole seconds left change
+        self.remaining_time = seconds
+        self.time_label.text = str(seconds)
+
+    def time_up(self):
+        self.board.time_up()
+        self.game_over("Time is up! You ran out of time.")
 
     def stop_timer(self):
-        if self.timer_event:
-            self.timer_event.cancel()
+        App.get_running_app().game_clock.stop(self)
 
-    def on_image_click(self, button):
-        if self.button_click_sound:
-            self.button_click_sound.play()
+    @timed('on_image_click')
+    def on_image_click(self, grid, index, touch):
+        if self.replaying and touch is not None:
+            return
+        App.get_running_app().audio.play('click', touch)
+
+        if self.pipelined and self.board.second != -1:
+            # Settles the pair being shown now, so this tap can start the next one;
+            # every touch is handled in turn, so the board is never in between
+            if self.match_check is not None:
+                self.match_check.cancel()
+            self.check_match(self.board, 0, hide_after=self.reveal_end - Clock.get_time())
+
+        result = self.board.flip(index)
+        App.get_running_app().replay_log.flip(index, result)
+        if result == FLIP_IGNORED:
+            return
 
-        if not self.can_click or button in (image[0] for image in self.selected_images):
+        self.grid.set_face(index, self.card_faces[self.board.face(index)])
+        self.knowledge.reveal(index, self.board.face(index))
+        if self.grid.highlighted:
+            self.grid.set_highlight(())
+        if profiler.enabled and touch is not None:
+            profiler.after_frame('click_to_flip', touch)
+        if result == FLIP_SECOND:
+            # Unless input is pipelined, further clicks are ignored until the match check is complete
+            self.reveal_end = Clock.get_time() + REVEAL_DELAY
+            if not self.replay_events:  # A replay checks the pair when its MATCH record comes up
+                self.match_check = Clock.schedule_once(partial(self.check_match, self.board), REVEAL_DELAY)
+
+    @timed('check_match')
+    def check_match(self, board, dt, hide_after=0):
+        if board is not self.board or board.second == -1:  # Level changed or board reset while the pair was showing
             return
-    
-        image_path = self.images[self.grid.children.index(button)]
-        if image_path in self.matched_images:
+        if board.state != PLAYING:  # The game ended first, by time
             return
-    
-        if len(self.selected_images) < 2:
-            button.background_normal = image_path
-            self.selected_images.append((button, image_path))
-    
-        if len(self.selected_images) == 2:
-            self.can_click = False  # Disable further clicks until the match check is complete
-            Clock.schedule_once(self.check_match, 1)
-
-
-    def check_match(self, dt):
-        if self.selected_images[0][1] == self.selected_images[1][1]:
-            self.matched_images.extend([self.selected_images[0][1], self.selected_images[1][1]])
-            self.selected_images[0][0].disabled = True
-            self.selected_images[1][0].disabled = True
-            self.selected_images = []
-            if len(self.matched_images) == len(self.images):
+
+        self.match_check = None
+        first, second = self.board.first, self.board.second
+        matched = self.board.check_match()
+        self.knowledge.checked(matched)
+        App.get_running_app().replay_log.match(matched, self.board.num_attempts)
+        if matched:
+            if self.board.state == WON:
                 self.game_over("Congratulations! You won!")
         else:
-            self.selected_images[0][0].background_normal = ''
-            self.selected_images[1][0].background_normal = ''
-            self.selected_images = []
-            self.num_attempts += 1
-            if self.num_attempts >= self.max_attempts:
+            self.hide_cards(board, (first, second), hide_after)
+            if self.board.state == LOST:
                 self.game_over("Game over! You ran out of attempts.")
 
-        self.can_click = True
         self.update_attempts_label()
+        self.autosave()
+
+    def hide_cards(self, board, cards, delay):
+        # A mismatch settled early by a pipelined tap stays in sight for the rest of its reveal
+        if delay > 0:
+            Clock.schedule_once(lambda dt: self.hide_cards(board, cards, 0), delay)
+            return
+        if board is self.board:
+            for index in cards:
+                if not board.is_face_up(index):  # Unless it was turned over again meanwhile
+                    self.grid.set_face(index, None)
+
+    def show_hint(self, instance):
+        # Worked out on the solver thread; the board keeps taking clicks meanwhile
+        if self.board.state == PLAYING and self.board.second == -1:
+            App.get_running_app().move_worker.request(self.knowledge, self.board.first,
+                                                      partial(self.on_hint, self.board, self.board.first))
+
+    def on_hint(self, board, first, cards):
+        if board is self.board and first == self.board.first and self.board.second == -1:  # Board has not moved on since
+            self.grid.set_highlight(cards)
+
+    def autosave(self):
+        # Only settled pairs are saved, so a resumed game starts with no card face up
+        if self.in_game and self.board.state == PLAYING:
+            App.get_running_app().autosave.save(self.level.name, self.board, self.remaining_time, self.pipelined)
+
+    def resume(self, snapshot):
+        # Picks up an autosaved game where it was left: same deal, matched cards, attempts and time
+        app = App.get_running_app()
+        self.set_level(snapshot.level)
+        self.reset()
+        self.board.max_attempts = snapshot.max_attempts
+        self.board.restore(snapshot.seed, snapshot.matched, snapshot.num_attempts)
+        self.knowledge.matched = int.from_bytes(snapshot.matched, 'little')
+        for index in range(self.board.num_cards):
+            if self.board.is_matched(index):
+                self.grid.set_face(index, self.card_faces[self.board.face(index)])
+        self.remaining_time = snapshot.remaining_time
+        self.time_label.text = str(self.remaining_time)
+        self.update_attempts_label()
+        self.pipelined = snapshot.pipelined
+        app.replay_log.abandon()  # A recording has to start from a fresh deal, so this game is not logged
+        self.in_game = True
+        app.game_clock.start(self, self.remaining_time, self.update_timer, self.time_up)
 
     def update_attempts_label(self):
-        self.attempts_label.text = f"Attempts: {self.num_attempts}/{self.max_attempts}"
+        self.attempts_label.text = f"Attempts: {self.board.num_attempts}/{self.board.max_attempts}"
 
     def game_over(self, message):
+        app = App.get_running_app()
+        # From the game clock, which stops while the app is paused and carries over a resumed game's time
+        seconds = self.level.time_limit - app.game_clock.remaining(self)
         self.stop_timer()
+        if self.match_check is not None:  # Time can run out while a pair is showing
+            self.match_check.cancel()
+            self.match_check = None
+        app.replay_log.end(self.board.state, self.board.num_attempts)
+        if self.in_game:
+            app.autosave.clear()
+            app.stats.record(self.level.name, self.board.state == WON, seconds, self.board.num_attempts)
+            self.in_game = False
         self.show_game_over_popup(message)
 
     def show_game_over_popup(self, message):
+        from kivy.uix.popup import Popup  # Not needed until the first game ends, so not imported at startup
         popup = Popup(title="Game Over",
                       content=BoxLayout(orientation='vertical', spacing=10, padding=10),
                       size_hint=(None, None), size=(400, 200),
@@ -302,206 +268,273 @@ class NormalGameScreen(Screen):
         
 
     def reset_game(self, button, popup):
+        # Another game of the level just played
         popup.dismiss()
-        self.manager.current = 'easy'
-        self.manager.get_screen('easy').reset()
+        self.reset()
         self.start_timer()  # Restart the timer
-        self.num_attempts = 0  # Reset the number of attempts
-        self.update_attempts_label()
 
     def reset(self):
-        self.grid.clear_widgets()
-        self.images = ['assets/h.png', 'assets/i.png', 'assets/j.png', 'assets/k.png', 'assets/l.png', 'assets/m.png', 'assets/x.png', 'assets/y.png'] * 2
-        shuffle(self.images)
-        self.selected_images = []
-        self.matched_images = []
-        self.num_attempts = 0
-        self.remaining_time = 90  # Reset the timer
+        if self.match_check is not None:
+            self.match_check.cancel()
+            self.match_check = None
+        for event in self.replay_events:
+            event.cancel()
+        self.replay_events = []
+        self.replaying = False
+        self.board.shuffle()
+        self.board.max_attempts = self.level.max_attempts  # A replay or resumed game may have had other limits
+        self.knowledge.reset()
+        self.grid.set_highlight(())
+        self.remaining_time = self.level.time_limit  # Reset the timer
+        self.time_label.text = str(self.remaining_time)
         self.update_attempts_label()
-
-        for image in self.images:
-            btn = Button(background_normal='', background_color=(1, 1, 1, 1))
-            btn.bind(on_release=self.on_image_click)
-            self.grid.add_widget(btn)
-
-        self.can_click = True
+        self.grid.clear_faces()  # Same card instructions, all face down
 
 
     def on_leave(self):
+        # A game left for the menu is given up
+        App.get_running_app().replay_log.end(PLAYING, self.board.num_attempts)
+        App.get_running_app().autosave.clear()
+        self.in_game = False
         self.reset()
         self.stop_timer()
 
-class EasyGameScreen(Screen):
+    def reload_faces(self):
+        # After a theme change: the new faces, on the cards that are face up now
+        if self.card_faces is None:
+            return  # Released by the texture budget, restored from the new theme when shown
+        self.card_faces = App.get_running_app().card_atlas.load(self.images)
+        for index in range(self.board.num_cards):
+            if self.board.is_face_up(index):
+                self.grid.set_face(index, self.card_faces[self.board.face(index)])
+
+    def release_textures(self):
+        # Called by the texture budget while another screen is shown
+        self.grid.clear_faces()
+        App.get_running_app().card_atlas.unload(self.images)
+        self.card_faces = None
+
+    def restore_textures(self):
+        self.card_faces = App.get_running_app().card_atlas.load(self.images)
+
+    def texture_bytes(self):
+        return App.get_running_app().card_atlas.nbytes(self.images)
+
+    def play_replay(self, session):
+        # Deals the recorded board again and plays its records back at their
+        # recorded times, in recorded order: every pair is checked when its
+        # MATCH record comes up, not by a reveal timer racing the taps, and a
+        # game that ran out of time ends at its END record
+        app = App.get_running_app()
+        app.replay_log.abandon()
+        self.in_game = False
+        self.stop_timer()
+        self.reset()
+        self.pipelined = session.pipelined
+        self.board.shuffle(session.seed)
+        self.board.max_attempts = session.max_attempts  # Until the next reset()
+        self.update_attempts_label()
+        self.replay_events = [Clock.schedule_once(partial(self.replay_record, kind, a, b), seconds)
+                              for kind, a, b, seconds in session.events() if kind in (FLIP, MATCH, END_RECORD)]
+        self.replaying = bool(self.replay_events)
+        app.game_clock.start(self, session.time_limit, self.update_timer)  # Only shown, the records end the game
+
+    def replay_record(self, kind, a, b, dt):
+        self.replay_events.pop(0)  # Records run in the order they were scheduled
+        if kind == FLIP:
+            self.on_image_click(self.grid, b, None)
+        elif kind == MATCH:
+            self.check_match(self.board, 0, hide_after=self.reveal_end - Clock.get_time())
+        elif a == LOST and self.board.state == PLAYING:
+            self.time_up()
+        else:
+            self.stop_timer()
+        if not self.replay_events:
+            self.replaying = False
+            if self.board.state == PLAYING:
+                # Left for the menu or cut off by a crash; Play Again hands the board back
+                self.stop_timer()
+                self.show_game_over_popup("End of the recording, the game was not finished.")
+
+
+class OnlineGameScreen(Screen):
+    # Thin client for a head-to-head match on server.py. The server runs the
+    # rules; this screen only sends clicks and draws what it is told.
     def __init__(self, **kwargs):
-        super(EasyGameScreen, self).__init__(**kwargs)
-        self.images = ['assets/a.png', 'assets/b.png', 'assets/c.png', 'assets/d.png', 'assets/e.png', 'assets/f.png'] * 2
-        shuffle(self.images)
-        self.selected_images = []
-        self.matched_images = []
-        self.num_attempts = 0
-        self.max_attempts = 20
-        self.remaining_time = 90  # 2 minutes in seconds
-        self.timer_event = None
-
-        layout = self.ids.layout
+        super(OnlineGameScreen, self).__init__(**kwargs)
+        self.client = None
+        self.level = None
+        self.images = []
+        self.card_faces = None
+        self.seat = 0
+        self.turn = 0
+        self.pairs = [0, 0]
+        self.flipped = []  # Cards turned over in the current turn
+        self.faces = {}    # card index -> face id of every card face up
+        self.remaining_time = 0
 
         layout = BoxLayout(orientation='vertical', spacing=10)
 
-        self.button_click_sound = SoundLoader.load('assets\mixkit-arcade-game-jump-coin-216.wav')
-        self.button_click_sound.volume = 0 if MemoryGameApp.game_sound_state == 'On' else 1
-
-        # Add a label to display remaining time
-        self.time_label = Label(text=str(self.remaining_time), font_size=24, halign='right', size_hint=(1, 0.05), color=(0, 0, 0, 1), bold=True)
+        self.time_label = Label(text='', font_size=24, halign='right', size_hint=(1, 0.05), color=(0, 0, 0, 1), bold=True)
         layout.add_widget(self.time_label)
 
-        # Add a label to display the number of attempts
-        self.attempts_label = Label(text=f"Attempts: {self.num_attempts}/{self.max_attempts}", font_size=18, halign='left', size_hint=(1, 0.05), color=(1, 0, 0, 1), bold=True)
-        layout.add_widget(self.attempts_label)
+        self.status_label = Label(text='', font_size=18, halign='left', size_hint=(1, 0.05), color=(1, 0, 0, 1), bold=True)
+        layout.add_widget(self.status_label)
 
-        self.grid = GridLayout(cols=4, spacing=10)
+        self.grid = BoardWidget(cols=4, spacing=10)
+        self.grid.bind(on_card_press=self.on_image_click)
         layout.add_widget(self.grid)
-        self.can_click = True
-
-        for image in self.images:
-            btn = Button(background_normal='', background_color=(1, 1, 1, 1))  # Set the background color to white (R, G, B, A)
-            btn.bind(on_release=self.on_image_click)
-            self.grid.add_widget(btn)
 
         back_to_menu_button = Button(
             text="Back to Main Menu",
             on_release=self.switch_to_menu,
             size_hint=(0.2, 0.1),
             pos_hint={'center_x': 0.5},
-            background_normal='', 
+            background_normal='',
             background_color=(1, 0.43, 0.85, 0.9)
         )
         layout.add_widget(back_to_menu_button)
 
         self.add_widget(layout)
 
-    def start_timer(self):
-        self.timer_event = Clock.schedule_interval(self.update_timer, 1)
-
-    def update_timer(self, dt):
-        self.remaining_time -= 1
-        self.time_label.text = str(self.remaining_time)
-
-        if self.remaining_time <= 0:
-            self.game_over("Time is up! You ran out of time.")
+    def join(self, level):
+        app = App.get_running_app()
+        self.level = level
+        if self.card_faces is not None:
+            app.card_atlas.unload(self.images)
+        self.images = list(LEVELS[level].deck)
+        self.card_faces = app.card_atlas.load(self.images)  # Same atlas regions as playing alone
+        app.texture_budget.loaded(self.name)
+        self.grid.cols = LEVELS[level].cols
+        if self.client is None:
+            self.client = NetClient(app.server_address, self.on_message)
+        self.grid.set_cards(0)
+        self.time_label.text = ''
+        self.status_label.text = "Waiting for an opponent..."
+        computer = app.computer_difficulty
+        self.client.send(JOIN, LEVEL_NAMES.index(level), computer is not None,
+                         DIFFICULTIES.index(computer) if computer else 0)
+
+    def on_image_click(self, grid, index, touch):
+        App.get_running_app().audio.play('click', touch)
+        if self.client is not None and self.turn == self.seat and len(self.flipped) < 2:
+            self.client.send(FLIP_MOVE, 0, index)
+
+    def on_message(self, kind, a, b, value, dt):
+        if self.client is None:
+            return  # Left the screen; the rest of the match is not shown
+        if kind == START:
+            self.seat, self.turn, self.pairs, self.flipped, self.faces = a, 0, [0, 0], [], {}
+            self.grid.set_cards(b)
+            App.get_running_app().game_clock.start(self, value, self.update_timer)
+            self.update_status()
+        elif kind == SHOW:
+            self.flipped.append(b)
+            self.faces[b] = value
+            self.grid.set_face(b, self.card_faces[value])
+        elif kind == CHECKED:
+            if a:
+                self.pairs[self.turn] += 1
+            else:
+                Clock.schedule_once(partial(self.hide_cards, self.flipped), 1)
+            self.flipped = []
+            self.turn = value
+            self.update_status()
+        elif kind == END:
             self.stop_timer()
-
-    def stop_timer(self):
-        if self.timer_event:
-            self.timer_event.cancel()
-
-    def on_image_click(self, button):
-        if self.button_click_sound:
-            self.button_click_sound.play()
-
-        if not self.can_click or button in (image[0] for image in self.selected_images):
-            return
-    
-        image_path = self.images[self.grid.children.index(button)]
-        if image_path in self.matched_images:
+            if b == DRAW:
+                message = "It's a draw!"
+            elif b == self.seat:
+                message = "Congratulations! You won!"
+            else:
+                message = "Your opponent won."
+            self.show_game_over_popup(message)
+        elif kind == DISCONNECTED:
+            self.stop_timer()
+            self.client = None
+            self.status_label.text = "Disconnected from the server"
+
+    def hide_cards(self, cards, dt):
+        for index in cards:
+            if index not in self.flipped:  # Unless it was turned over again meanwhile
+                self.faces.pop(index, None)
+                self.grid.set_face(index, None)
+
+    def reload_faces(self):
+        # After a theme change, as GameScreen.reload_faces
+        if self.card_faces is None:
             return
-    
-        if len(self.selected_images) < 2:
-            button.background_normal = image_path
-            self.selected_images.append((button, image_path))
-    
-        if len(self.selected_images) == 2:
-            self.can_click = False  # Disable further clicks until the match check is complete
-            Clock.schedule_once(self.check_match, 1)
-
-
-    def check_match(self, dt):
-        if self.selected_images[0][1] == self.selected_images[1][1]:
-            self.matched_images.extend([self.selected_images[0][1], self.selected_images[1][1]])
-            self.selected_images[0][0].disabled = True
-            self.selected_images[1][0].disabled = True
-            self.selected_images = []
-            if len(self.matched_images) == len(self.images):
-                self.game_over("Congratulations! You won!")
-        else:
-            self.selected_images[0][0].background_normal = ''
-            self.selected_images[1][0].background_normal = ''
-            self.selected_images = []
-            self.num_attempts += 1
-            if self.num_attempts >= self.max_attempts:
-                self.game_over("Game over! You ran out of attempts.")
+        self.card_faces = App.get_running_app().card_atlas.load(self.images)
+        for index, face in self.faces.items():
+            self.grid.set_face(index, self.card_faces[face])
 
-        self.can_click = True
-        self.update_attempts_label()
+    def update_status(self):
+        whose = "Your turn" if self.turn == self.seat else "Opponent's turn"
+        self.status_label.text = f"{whose} - pairs: you {self.pairs[self.seat]}, opponent {self.pairs[self.seat ^ 1]}"
 
-    def update_attempts_label(self):
-        self.attempts_label.text = f"Attempts: {self.num_attempts}/{self.max_attempts}"
+    def update_timer(self, seconds):
+        # Only for show, the server ends the match when time is up
+        self.remaining_time = seconds
+        self.time_label.text = str(seconds)
 
-    def game_over(self, message):
-        self.stop_timer()
-        self.show_game_over_popup(message)
+    def stop_timer(self):
+        App.get_running_app().game_clock.stop(self)
 
     def show_game_over_popup(self, message):
+        from kivy.uix.popup import Popup
         popup = Popup(title="Game Over",
                       content=BoxLayout(orientation='vertical', spacing=10, padding=10),
                       size_hint=(None, None), size=(400, 200),
-                      auto_dismiss=False)  # Set auto_dismiss to False
+                      auto_dismiss=False)
 
-        # Add the label to display the message
         popup.content.add_widget(Label(text=message, size_hint=(1, 0.8)))
 
-        play_again_button = Button(text="Play Again", on_release=lambda btn: self.reset_game(btn, popup))
+        play_again_button = Button(text="Play Again", on_release=lambda btn: self.play_again(popup))
         popup.content.add_widget(play_again_button)
 
         popup.open()
 
-    def switch_to_menu(self, instance):
-        # sound_manager = SoundManager
-        self.manager.current = 'main_menu'
-        
-
-    def reset_game(self, button, popup):
+    def play_again(self, popup):
         popup.dismiss()
-        self.manager.current = 'easy'
-        self.manager.get_screen('easy').reset()
-        self.start_timer()  # Restart the timer
-        self.num_attempts = 0  # Reset the number of attempts
-        self.update_attempts_label()
+        if self.manager.current == self.name:
+            self.join(self.level)
 
-    def reset(self):
-        self.grid.clear_widgets()
-        self.images = ['assets/a.png', 'assets/b.png', 'assets/c.png', 'assets/d.png', 'assets/e.png', 'assets/f.png'] * 2
-        shuffle(self.images)
-        self.selected_images = []
-        self.matched_images = []
-        self.num_attempts = 0
-        self.remaining_time = 90  # Reset the timer
-        self.update_attempts_label()
+    def switch_to_menu(self, instance):
+        self.manager.current = 'main_menu'
 
-        for image in self.images:
-            btn = Button(background_normal='', background_color=(1, 1, 1, 1))
-            btn.bind(on_release=self.on_image_click)
-            self.grid.add_widget(btn)
+    def release_textures(self):
+        # Called by the texture budget while another screen is shown
+        self.grid.clear_faces()
+        App.get_running_app().card_atlas.unload(self.images)
+        self.card_faces = None
 
-        self.can_click = True
+    def restore_textures(self):
+        self.card_faces = App.get_running_app().card_atlas.load(self.images)
 
+    def texture_bytes(self):
+        return App.get_running_app().card_atlas.nbytes(self.images)
 
     def on_leave(self):
-        self.reset()
+        # Closing the connection forfeits a match still being played
         self.stop_timer()
+        if self.client is not None:
+            self.client.close()
+            self.client = None
+
 
 class ChooseLevelScreen(Screen):
+    # Built when Start is first pressed, see MemoryGameApp.get_choose_level_screen
     def __init__(self, **kwargs):
+        from kivy.uix.spinner import Spinner
         super(ChooseLevelScreen, self).__init__(**kwargs)
 
         layout = BoxLayout(orientation='vertical')
 
-        self.button_click_sound = SoundLoader.load('assets\mixkit-arcade-game-jump-coin-216.wav')
-
         level_label = Label(text='Choose Level', font_size=40, color=(1, 0.48, 0.66, 1), bold=True)
         layout.add_widget(level_label)
 
-        levels = ["Easy", "Normal", "Hard"]
-        level_spinner = Spinner(text='Easy', values=levels, size_hint_y=None, height=44)
+        self.levels = {level.title: name for name, level in playable(App.get_running_app().procedural_faces).items()}
+        level_spinner = Spinner(text=next(iter(self.levels)), values=list(self.levels), size_hint_y=None, height=44)
         layout.add_widget(level_spinner)
 
         start_button = Button(text="Start", size_hint_y=0.2, height=40, background_normal='', background_color=(0.32, 0.83, 0.85, 1))
@@ -516,21 +549,16 @@ class ChooseLevelScreen(Screen):
         print(f"Start button pressed for level: {chosen_level}")
         # Add your logic to handle the chosen level and navigate accordingly
 
-        if self.button_click_sound:
-            self.button_click_sound.play()
+        App.get_running_app().audio.play('click', instance.last_touch)
 
-        if chosen_level=='Easy':
-            easy_game_screen = self.manager.get_screen('easy')
-            easy_game_screen.start_timer()
-            self.manager.current = 'easy'
-        elif chosen_level=='Normal':
-            normal_game_screen = self.manager.get_screen('normal')
-            normal_game_screen.start_timer()
-            self.manager.current = 'normal'
-        elif chosen_level=='Hard':
-            hard_game_screen = self.manager.get_screen('hard')
-            hard_game_screen.start_timer()
-            self.manager.current = 'hard'
+        if App.get_running_app().server_address:
+            online_screen = App.get_running_app().get_online_screen()
+            self.manager.current = 'online'
+            online_screen.join(self.levels[chosen_level])
+        else:
+            game_screen = App.get_running_app().get_game_screen(self.levels[chosen_level])
+            game_screen.start_timer()
+            self.manager.current = game_screen.name
 
 
 class MyScreen(Screen):
@@ -550,30 +578,18 @@ class MyScreen(Screen):
             button.bind(on_release=self.button_callback)
             layout.add_widget(button)
 
-        # Load and play background sound
-        self.background_sound = SoundLoader.load('assets/minifunk-67270.mp3')
-        if self.background_sound:
-            self.background_sound.loop = True
-            self.background_sound.play()
-
-        # Load sound for button click
-        self.button_click_sound = SoundLoader.load('assets\mixkit-arcade-game-jump-coin-216.wav')
-
-        # Initialize sound state
-        self.bg_sound_state = 'Off'
-        self.game_sound_state = 'Off'
-        # MemoryGameApp.game_sound_state = self.game_sound_state
+        # Play background sound, mute state lives in the app's AudioManager
+        App.get_running_app().audio.play_music(BACKGROUND_MUSIC)
 
     def button_callback(self, instance):
         # Play sound when a button is clicked
-        if self.button_click_sound:
-            self.button_click_sound.play()
+        App.get_running_app().audio.play('click', instance.last_touch)
 
         button_text = instance.text
         if button_text == "Start":
             print("Start button pressed")
             # Navigate to the ChooseLevelScreen
-            self.manager.current = "choose_level_screen"
+            self.manager.current = App.get_running_app().get_choose_level_screen().name
         elif button_text == "Settings":
             print("Settings button pressed")
             # Add your code to handle the "Settings" button action
@@ -587,20 +603,45 @@ class MyScreen(Screen):
             App.get_running_app().stop()
 
     def show_settings_popup(self):
+        from kivy.uix.popup import Popup
+        from kivy.uix.spinner import Spinner
+        from kivy.uix.togglebutton import ToggleButton
+        from kivy.utils import get_color_from_hex
+
         # Create the settings pop-up
         content = BoxLayout(orientation='vertical')
 
+        app = App.get_running_app()
+        audio = app.audio
+
         mute_bg_label = Label(text='Mute Background Sound')
-        mute_bg_toggle = ToggleButton(text=self.bg_sound_state,group='mute_bg', state='down',background_color=get_color_from_hex('#756AB6'))
+        mute_bg_toggle = ToggleButton(text='On' if audio.music_muted else 'Off',group='mute_bg', state='down',background_color=get_color_from_hex('#756AB6'))
         mute_bg_toggle.bind(on_release=self.toggle_bg_sound)
 
         content.add_widget(mute_bg_label)
         content.add_widget(mute_bg_toggle)
 
-        popup = Popup(title='Settings', content=content, size_hint=(None, None), size=(400, 300))
+        mute_game_label = Label(text='Mute Game Sound')
+        mute_game_toggle = ToggleButton(text='On' if audio.effects_muted else 'Off',group='mute_game', state='down',background_color=get_color_from_hex('#756AB6'))
+        mute_game_toggle.bind(on_release=self.toggle_game_sound)
+
+        content.add_widget(mute_game_label)
+        content.add_widget(mute_game_toggle)
+
+        # Card sets, background and sounds change at once, see packs.py
+        theme_label = Label(text='Theme')
+        theme_spinner = Spinner(text=app.theme, values=list(themes()), background_color=get_color_from_hex('#756AB6'))
+        theme_spinner.bind(text=lambda spinner, theme: app.set_theme(theme))
+
+        content.add_widget(theme_label)
+        content.add_widget(theme_spinner)
+
+        popup = Popup(title='Settings', content=content, size_hint=(None, None), size=(400, 400))
         popup.open()
 
     def show_info_popup(self):
+        from kivy.uix.popup import Popup
+
         # Create the info pop-up
         content = Label(text='This app make by CPE SWU 65')
 
@@ -610,23 +651,248 @@ class MyScreen(Screen):
 
     def toggle_bg_sound(self, instance):
         print("Background sound toggled")
-        if self.background_sound:
-            self.bg_sound_state = 'On' if self.bg_sound_state == 'Off' else 'Off'
-            self.background_sound.volume = 0 if self.bg_sound_state == 'On' else 1
-            instance.text = self.bg_sound_state
+        audio = App.get_running_app().audio
+        audio.set_music_muted(not audio.music_muted)
+        instance.text = 'On' if audio.music_muted else 'Off'
+
+    def toggle_game_sound(self, instance):
+        print("Game sound toggled")
+        audio = App.get_running_app().audio
+        audio.set_effects_muted(not audio.effects_muted)
+        instance.text = 'On' if audio.effects_muted else 'Off'
 
 
 class MemoryGameApp(App):
-    game_sound_state = 'Off'  # Class-level variable to store the state of the game sound
+    warm_game_screens = True  # Build the game screen in an idle frame once the menu is showing
+    replay_session = None  # Index of a recorded session to play back on start, see replay.py
+    startup_time = None  # Seconds from main.py's first line to the first frame
+    server_address = None  # HOST:PORT of a server.py to play head-to-head matches on
+    computer_difficulty = None  # Memory model of the computer opponent, see solver.py
+    pipelined_input = False  # Taps during the mismatch reveal settle the pair at once, see GameScreen
+    procedural_faces = False  # Draw card faces at runtime instead of using the PNGs, see procedural.py
+    theme = DEFAULT_THEME  # Pack the card sets, background and sounds are read from, see packs.py
+    background_texture = ObjectProperty(None, allownone=True)  # Screen background, sized for the window
+    background_source = None
+    background_bytes = 0
 
     def build(self):
+        self.assets = Assets(self.theme, self.pack_cache_dir)
+        self.audio = AudioManager(assets=self.assets)
+        self.audio.load_effect('click', CLICK_SOUND)
+        self.game_clock = GameClock()  # One deadline-based timer service for every game screen
+        self.move_worker = MoveWorker(lambda function: Clock.schedule_once(lambda dt: function()))
+        self.replay_log = ReplayWriter(self.replay_path)
+        self.stats = StatsStore(os.path.join(self.user_data_dir, 'stats.db'))
+        self.autosave = Autosave(os.path.join(self.user_data_dir, 'autosave.bin'))
+        # Cards never get bigger than a quarter of the width or a third of 80% of the height
+        width, height = Window.size
+        cell_size = cell_size_for(max(width / 4, height * 0.8 / 3))
+        if self.procedural_faces:
+            self.card_atlas = ProceduralFaces(cell_size)
+        else:
+            self.card_atlas = CardAtlas(cell_size, self.assets)
+        self.texture_budget = TextureBudget()
+        self.texture_budget.register('background', lambda: self.background_bytes)
+        Window.bind(size=self.pick_background)
+        self.pick_background(Window, Window.size)
         sm = ScreenManager()
+        # A screen gets its textures back before it is drawn; others are only
+        # released once the transition away from them is over
+        sm.bind(current=lambda manager, current: self.texture_budget.show(current))
+        sm.transition.bind(on_complete=lambda transition: self.texture_budget.enforce())
         sm.add_widget(MyScreen(name="main_menu"))
-        sm.add_widget(EasyGameScreen(name="easy"))
-        sm.add_widget(NormalGameScreen(name="normal"))
-        sm.add_widget(HardGameScreen(name="hard"))
-        sm.add_widget(ChooseLevelScreen(name="choose_level_screen"))
         return sm
 
+    def on_start(self):
+        Window.bind(on_flip=self.on_first_frame)
+        if profiler.enabled:
+            profiler.start(self)
+
+        if self.replay_session is not None:
+            session = ReplayReader(self.replay_path).session(self.replay_session)
+            screen = self.get_game_screen(session.level)
+            self.root.current = screen.name
+            screen.play_replay(session)
+        elif self.server_address is None:
+            snapshot = load_autosave(self.autosave.path)
+            if snapshot is not None and snapshot.level in playable(self.procedural_faces):
+                self.offer_resume(snapshot)
+
+    def offer_resume(self, snapshot):
+        # The last run ended with a game in progress, killed or closed
+        from kivy.uix.popup import Popup  # Only needed when there is a game to resume
+        popup = Popup(title="Resume Game",
+                      content=BoxLayout(orientation='vertical', spacing=10, padding=10),
+                      size_hint=(None, None), size=(400, 240),
+                      auto_dismiss=False)
+        popup.content.add_widget(Label(
+            text=f"{LEVELS[snapshot.level].title} game, {snapshot.remaining_time} s left",
+            size_hint=(1, 0.6)))
+        popup.content.add_widget(Button(text="Resume", on_release=lambda btn: self.resume_game(snapshot, popup)))
+        popup.content.add_widget(Button(text="New Game", on_release=lambda btn: self.discard_game(popup)))
+        popup.open()
+
+    def resume_game(self, snapshot, popup):
+        popup.dismiss()
+        screen = self.get_game_screen(snapshot.level)
+        screen.resume(snapshot)
+        self.root.current = screen.name
+
+    def discard_game(self, popup):
+        popup.dismiss()
+        self.autosave.clear()
+
+    def on_first_frame(self, window):
+        window.unbind(on_flip=self.on_first_frame)
+        self.startup_time = time.perf_counter() - STARTUP_START
+        if profiler.enabled:
+            print(f"Startup: first frame after {self.startup_time * 1000:.0f} ms")
+
+        if self.warm_game_screens:
+            Clock.schedule_once(self.warm_game_screen)
+
+    def warm_game_screen(self, dt):
+        # Built with the first level of the table, the one the spinner offers first
+        if not self.root.has_screen('game'):
+            self.get_game_screen(next(iter(LEVELS)))
+
+    def get_game_screen(self, level=None):
+        # The game screen is built on first navigation unless it was warmed
+        # already, then switched to the level asked for
+        if not self.root.has_screen('game'):
+            screen = GameScreen(name='game')
+            self.root.add_widget(screen)
+            self.texture_budget.register('game', screen.texture_bytes, screen.release_textures, screen.restore_textures)
+        screen = self.root.get_screen('game')
+        if level is not None:
+            screen.set_level(level)
+        return screen
+
+    def pick_background(self, window, size):
+        source = self.assets.pick(BACKGROUND_IMAGE, *size)
+        if source != self.background_source:  # Most resizes stay within one variant
+            self.background_source = source
+            self.background_texture = self.assets.image(source).texture
+            self.background_bytes = self.background_texture.width * self.background_texture.height * 4
+
+    def set_theme(self, theme):
+        # Swaps card faces, background and sounds while the app runs; games keep their state
+        if theme == self.theme:
+            return
+        self.theme = theme
+        self.assets = Assets(theme, self.pack_cache_dir)
+        self.background_source = None
+        self.pick_background(Window, Window.size)
+        self.audio.assets = self.assets
+        self.audio.unload_effect('click')
+        self.audio.load_effect('click', CLICK_SOUND)
+        if self.audio.music_source is not None:
+            self.audio.play_music(self.audio.music_source)
+        if not self.procedural_faces:
+            self.card_atlas = CardAtlas(self.card_atlas.cell_size, self.assets)
+            for name in ('game', 'online'):
+                if self.root.has_screen(name):
+                    self.root.get_screen(name).reload_faces()
+
+    def get_choose_level_screen(self):
+        if not self.root.has_screen('choose_level_screen'):
+            self.root.add_widget(ChooseLevelScreen(name='choose_level_screen'))
+        return self.root.get_screen('choose_level_screen')
+
+    def get_online_screen(self):
+        if not self.root.has_screen('online'):
+            screen = OnlineGameScreen(name='online')
+            self.root.add_widget(screen)
+            self.texture_budget.register('online', screen.texture_bytes, screen.release_textures, screen.restore_textures)
+        return self.root.get_screen('online')
+
+    @property
+    def replay_path(self):
+        return os.path.join(self.user_data_dir, 'replay.bin')
+
+    @property
+    def pack_cache_dir(self):
+        # Files copied out of asset packs for the audio backends
+        return os.path.join(self.user_data_dir, 'pack-cache')
+
+    def on_pause(self):
+        # Game time stands still while the app is in the background
+        self.game_clock.pause()
+        self.replay_log.pause()
+        if self.root.has_screen('game'):
+            self.root.get_screen('game').autosave()  # The app may be ended in the background without notice
+        return True
+
+    def on_resume(self):
+        self.game_clock.resume()
+        self.replay_log.resume()
+
+    def on_stop(self):
+        self.replay_log.close()
+        if self.root.has_screen('game'):
+            self.root.get_screen('game').autosave()  # Quitting mid-game keeps the game too, with its time left
+        self.autosave.close()
+        self.stats.close()
+        self.move_worker.close()
+        stats = self.audio.latency_stats()
+        if stats and profiler.enabled:
+            print(f"Tap-to-sound latency over {stats['count']} taps: mean {stats['mean_ms']:.1f} ms, "
+                  f"p95 {stats['p95_ms']:.1f} ms, max {stats['max_ms']:.1f} ms")
+        textures = self.texture_budget.report()
+        if profiler.enabled:
+            print("Peak texture memory per screen: " + ', '.join(
+                f"{screen} {peak / 2**20:.1f} MB" for screen, peak in textures['peak_bytes'].items()))
+            profiler.dump(os.path.join(self.user_data_dir, time.strftime('profile-%Y%m%d-%H%M%S.json')),
+                          startup_ms=self.startup_time and self.startup_time * 1000, tap_to_sound=stats,
+                          textures=textures)
+
+
+def check_replay(path, index, procedural_faces=False):
+    # Raises ValueError saying why --replay INDEX cannot be played back from path
+    if not os.path.exists(path) or os.path.getsize(path) == 0:
+        raise ValueError(f"no games have been recorded in {path} yet")
+    reader = ReplayReader(path)
+    try:
+        if len(reader) == 0:
+            raise ValueError(f"no games have been recorded in {path} yet")
+        if not 0 <= index < len(reader):
+            raise ValueError(f"there is no session {index} in {path}, it holds sessions 0 to {len(reader) - 1}")
+        if reader.bounds[index] - reader.starts[index] < 2:
+            raise ValueError(f"session {index} in {path} was cut off as it began")
+        level = reader.session(index).level
+        if level not in playable(procedural_faces):
+            raise ValueError(f"session {index} was played on the {LEVELS[level].title} level, "
+                             f"replay it with --procedural")
+    finally:
+        reader.close()
+
 if __name__ == "__main__":
-    MemoryGameApp().run()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Memory game.")
+    parser.add_argument('--replay', type=int, metavar='SESSION', help="play back a recorded session from replay.bin")
+    parser.add_argument('--server', metavar='HOST:PORT', help="play head-to-head matches on a server.py")
+    parser.add_argument('--computer', choices=DIFFICULTIES, help="play against the computer at this difficulty")
+    parser.add_argument('--pipelined', action='store_true', help="keep taking taps while a mismatch is shown")
+    parser.add_argument('--procedural', action='store_true', help="draw card faces at runtime instead of the PNGs")
+    parser.add_argument('--theme', choices=themes(), default=DEFAULT_THEME, help="theme pack to start with, see packs.py")
+    argv = sys.argv[1:]
+    if argv[:1] == ['--']:  # The old form that got the options past Kivy, python main.py -- --replay 3
+        argv = argv[1:]
+    args = parser.parse_args(argv)
+
+    app = MemoryGameApp()
+    if args.replay is not None:
+        try:
+            check_replay(app.replay_path, args.replay, args.procedural)
+        except ImportError:
+            parser.error("--replay needs NumPy to read the recording")
+        except ValueError as error:
+            parser.error(f"--replay: {error}")
+    app.replay_session = args.replay
+    app.server_address = args.server
+    app.computer_difficulty = args.computer
+    app.procedural_faces = args.procedural
+    app.theme = args.theme
+    app.pipelined_input = args.pipelined
+    if args.computer and not args.server:
+        app.server_address = start_local_server()
+    app.run()
\ No newline at end of file
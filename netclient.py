@@ -0,0 +1,67 @@
+# Thin client for server.py. The connection runs on an asyncio loop in a
+# worker thread and every message is handed to the UI thread through the
+# Clock, so the screen never blocks on the network.
+import asyncio
+from functools import partial
+from threading import Thread
+
+from kivy.clock import Clock
+
+from replay import RECORD
+from server import read_records, MatchServer
+
+DISCONNECTED = 0  # Kind of the message sent to on_message when the connection ends
+
+
+class NetClient:
+    def __init__(self, address, on_message):
+        # on_message(kind, a, b, value, dt) is called on the UI thread
+        self.host, port = address.rsplit(':', 1)
+        self.port = int(port)
+        self.on_message = on_message
+        self.writer = None
+        self.pending = []  # Records sent before the connection was up
+        self.loop = asyncio.new_event_loop()
+        self.thread = Thread(target=self.loop.run_forever, daemon=True)
+        self.thread.start()
+        asyncio.run_coroutine_threadsafe(self._run(), self.loop)
+
+    async def _run(self):
+        try:
+            reader, self.writer = await asyncio.open_connection(self.host, self.port)
+            self.writer.write(b''.join(self.pending))
+            del self.pending[:]
+            async for record in read_records(reader):
+                Clock.schedule_once(partial(self.on_message, *record))
+        except OSError:
+            pass
+        finally:
+            self.writer = None
+            Clock.schedule_once(partial(self.on_message, DISCONNECTED, 0, 0, 0))
+
+    def send(self, kind, a=0, b=0, value=0):
+        self.loop.call_soon_threadsafe(self._send, RECORD.pack(kind, a, b, value))
+
+    def _send(self, data):
+        if self.writer is None:
+            self.pending.append(data)
+        else:
+            self.writer.write(data)
+
+    def close(self):
+        self.loop.call_soon_threadsafe(self._close)
+
+    def _close(self):
+        if self.writer is not None:
+            self.writer.close()
+        self.loop.call_later(0.1, self.loop.stop)
+
+
+def start_local_server():
+    # Serves matches from a worker thread of this process, for playing the
+    # computer without a server.py; returns the address to connect to
+    loop = asyncio.new_event_loop()
+    server = loop.run_until_complete(asyncio.start_server(MatchServer().handle, '127.0.0.1', 0))
+    Thread(target=loop.run_forever, daemon=True).start()
+    host, port = server.sockets[0].getsockname()[:2]
+    return f'{host}:{port}'
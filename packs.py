@@ -0,0 +1,196 @@
+# Asset packs: a theme's card sets, backgrounds and sounds in one uncompressed
+# file that is memory-mapped, so loading a level takes page faults in one
+# mapping instead of an open() per image. Nothing is decoded until first used.
+#
+#   header  magic 'MGPK' (4s), version (u16), entries (u16), index bytes (u32)
+#   index   per entry: offset (u64), size (u32), name bytes (u16), name (utf-8)
+#   blobs   the files as they are on disk, PNGs and sounds stay encoded
+#
+# Entries are named by the path the app uses for the loose file, like
+# assets/a.png, so a pack stands in for the assets directory. A theme only
+# needs the files it changes; everything else comes from the default assets.
+#
+#   python packs.py build assets.pack                        default assets
+#   python packs.py build themes/night.pack --root night     a theme, laid out as night/assets/...
+#   python packs.py list themes/night.pack
+#
+# Run variants.py first (in the theme's root for a theme) to pack the variants too.
+import argparse
+import mmap
+import os
+import struct
+from io import BytesIO
+
+from variants import AssetVariants
+
+MAGIC = b'MGPK'
+VERSION = 1
+HEADER = struct.Struct('<4sHHI')
+ENTRY = struct.Struct('<QIH')
+
+DEFAULT_PACK = 'assets.pack'  # Used before the loose files when it exists
+THEMES_DIR = 'themes'         # <name>.pack for every theme besides the default
+DEFAULT_THEME = 'default'
+
+
+def build(path, root='.', include=('assets',)):
+    # Packs every file under root/include, named by its path relative to root
+    names = []
+    for directory in include:
+        for parent, dirs, files in os.walk(os.path.join(root, directory)):
+            dirs.sort()
+            for name in sorted(files):
+                names.append(os.path.relpath(os.path.join(parent, name), root).replace(os.sep, '/'))
+
+    index_size = sum(ENTRY.size + len(name.encode()) for name in names)
+    offset = HEADER.size + index_size
+    index, sizes = [], []
+    for name in names:
+        size = os.path.getsize(os.path.join(root, name))
+        index.append(ENTRY.pack(offset, size, len(name.encode())) + name.encode())
+        sizes.append(size)
+        offset += size
+
+    with open(path + '.tmp', 'wb') as pack:
+        pack.write(HEADER.pack(MAGIC, VERSION, len(names), index_size))
+        pack.write(b''.join(index))
+        for name in names:
+            with open(os.path.join(root, name), 'rb') as source:
+                pack.write(source.read())
+    os.replace(path + '.tmp', path)
+    return len(names), sum(sizes)
+
+
+class AssetPack:
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as pack:
+            self.data = mmap.mmap(pack.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self.data) < HEADER.size:
+            raise ValueError(f"{path} is not an asset pack")
+        magic, version, count, index_size = HEADER.unpack_from(self.data)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not an asset pack")
+        # Every entry and blob has to lie inside the mapping, or reads would
+        # come back short instead of failing
+        index_end = HEADER.size + index_size
+        if index_end > len(self.data):
+            raise ValueError(f"{path} is truncated")
+        self.entries = {}  # name -> (offset, size)
+        position = HEADER.size
+        for _ in range(count):
+            if position + ENTRY.size > index_end:
+                raise ValueError(f"{path} has a corrupt index")
+            offset, size, name_size = ENTRY.unpack_from(self.data, position)
+            position += ENTRY.size
+            if position + name_size > index_end or offset < index_end or offset + size > len(self.data):
+                raise ValueError(f"{path} has a corrupt index")
+            self.entries[bytes(self.data[position:position + name_size]).decode()] = (offset, size)
+            position += name_size
+
+    def __contains__(self, name):
+        return name in self.entries
+
+    def read(self, name):
+        offset, size = self.entries[name]
+        return self.data[offset:offset + size]
+
+
+def themes():
+    # Theme name -> its pack, None for the default assets alone
+    found = {DEFAULT_THEME: None}
+    if os.path.isdir(THEMES_DIR):
+        for name in sorted(os.listdir(THEMES_DIR)):
+            if name.endswith('.pack'):
+                found[name[:-len('.pack')]] = os.path.join(THEMES_DIR, name)
+    return found
+
+
+MEMORY_LOADERS = {}  # image extension -> Kivy image loader, see memory_loader()
+
+
+def memory_loader(ext):
+    # The loader Kivy would pick for an image in memory. Kivy asks every loader
+    # for its extensions on each load, and Pillow's answer imports all of its
+    # plugins (~50 ms), so the first one that can take ext is kept instead.
+    if ext not in MEMORY_LOADERS:
+        from kivy.core.image import ImageLoader
+        MEMORY_LOADERS[ext] = next(loader for loader in ImageLoader.loaders
+                                   if loader.can_load_memory() and ext in loader.extensions())
+    return MEMORY_LOADERS[ext]
+
+
+class Assets:
+    # Where one theme's assets are read from: the theme's pack if it has the
+    # source, then the default pack, then the loose file. Variants are picked
+    # from the same place as their source, so a theme never shows a default card.
+    def __init__(self, theme=DEFAULT_THEME, cache_dir='.', default_pack=DEFAULT_PACK):
+        self.theme = theme
+        paths = [themes().get(theme), default_pack if default_pack and os.path.exists(default_pack) else None]
+        self.packs = [AssetPack(path) for path in paths if path is not None]
+        self.variants = [AssetVariants(pack=pack) for pack in self.packs]
+        self.loose_variants = AssetVariants()
+        self.cache_dir = cache_dir  # Sounds are copied out here, the audio backends only open files
+
+    def _pack(self, source):
+        for pack in self.packs:
+            if source in pack:
+                return pack
+        return None
+
+    def pick(self, source, width, height):
+        # As AssetVariants.pick
+        for pack, variants in zip(self.packs, self.variants):
+            if source in pack:
+                return variants.pick(source, width, height)
+        return self.loose_variants.pick(source, width, height)
+
+    def image(self, source):
+        # Decoded now, and not kept in Kivy's image cache: the caller holds the only reference
+        from kivy.core.image import Image as CoreImage  # Kivy stays out of the build step
+        pack = self._pack(source)
+        if pack is None:
+            return CoreImage(source, nocache=True)
+        ext = os.path.splitext(source)[1][1:]
+        image = memory_loader(ext)(source, ext=ext, rawdata=BytesIO(pack.read(source)), inline=True, nocache=True)
+        return CoreImage(image, nocache=True)
+
+    def path(self, source):
+        # A file holding source; copied out of its pack the first time it is asked for
+        pack = self._pack(source)
+        if pack is None:
+            return source
+        offset, size = pack.entries[source]
+        name = os.path.splitext(os.path.basename(pack.path))[0]
+        path = os.path.join(self.cache_dir, f'{name}-{offset}-{os.path.basename(source)}')
+        if not os.path.exists(path) or os.path.getsize(path) != size:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            with open(path + '.tmp', 'wb') as copy:
+                copy.write(pack.read(source))
+            os.replace(path + '.tmp', path)
+        return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build or list asset packs.")
+    commands = parser.add_subparsers(dest='command', required=True)
+    build_parser = commands.add_parser('build', help="pack the assets directory into one file")
+    build_parser.add_argument('path')
+    build_parser.add_argument('--root', default='.', help="directory holding the assets directory to pack")
+    list_parser = commands.add_parser('list', help="show what a pack holds")
+    list_parser.add_argument('path')
+    args = parser.parse_args()
+
+    if args.command == 'build':
+        count, size = build(args.path, args.root)
+        print(f"{count} files, {size / 1024:.0f} KB packed into {args.path}")
+        return
+
+    pack = AssetPack(args.path)
+    for name, (offset, size) in pack.entries.items():
+        print(f"{size:>10}  {name}")
+    print(f"{len(pack.entries)} files")
+
+
+if __name__ == "__main__":
+    main()
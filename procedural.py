@@ -0,0 +1,195 @@
+# Card faces drawn at runtime instead of read from PNGs, so a board can have
+# as many pairs as wanted. Every face id maps to its own shape, colour and,
+# past the first SHAPES * COLORS faces, a glyph. Faces missing from the cache
+# are drawn together into Fbo pages, and whole pages are evicted least
+# recently used first once more than `capacity` faces are kept.
+#
+#   python main.py --procedural      adds the Huge level, 120 cards, see levels.py
+#   python -m benchmarks.procedural_faces [--pairs 200]
+from collections import Counter, OrderedDict
+from math import ceil, cos, sin, sqrt, tau
+
+from kivy.core.text import Label as CoreLabel
+from kivy.graphics import Fbo, ClearColor, ClearBuffers, Color, Mesh
+
+COLORS = (
+    (0.91, 0.30, 0.24), (0.95, 0.61, 0.07), (0.18, 0.80, 0.44), (0.20, 0.60, 0.86), (0.61, 0.35, 0.71),
+    (0.10, 0.74, 0.61), (0.90, 0.49, 0.13), (0.17, 0.24, 0.31), (1.00, 0.43, 0.85), (0.50, 0.55, 0.55),
+)
+MAX_PAGE = 2048        # Longest edge of a page texture, safe on every GPU we target
+MAX_VERTICES = 65535   # Mesh indices are unsigned shorts
+SEGMENTS = 32          # Enough for a smooth circle at card size, Kivy's default is 180
+
+
+def circle_points(radius):
+    return [(0.5 + radius * cos(tau * k / SEGMENTS), 0.5 + radius * sin(tau * k / SEGMENTS))
+            for k in range(SEGMENTS + 1)]
+
+
+def shape_triangles():
+    # Every shape as a flat list of triangle corners in a unit square, so a
+    # page draws all shapes of one colour as a single mesh
+    outer, inner = circle_points(0.5), circle_points(0.3)
+    circle, ring = [], []
+    for k in range(SEGMENTS):
+        circle += [(0.5, 0.5), outer[k], outer[k + 1]]
+        ring += [outer[k], outer[k + 1], inner[k], inner[k], outer[k + 1], inner[k + 1]]
+
+    def box(left, bottom, right, top):
+        return [(left, bottom), (right, bottom), (right, top), (left, bottom), (right, top), (left, top)]
+
+    return {
+        'circle': circle,
+        'square': box(0, 0, 1, 1),
+        'triangle': [(0, 0), (1, 0), (0.5, 1)],
+        'diamond': [(0.5, 0), (1, 0.5), (0.5, 1), (0.5, 0), (0.5, 1), (0, 0.5)],
+        'ring': ring,
+        'cross': box(0, 1 / 3, 1, 2 / 3) + box(1 / 3, 0, 2 / 3, 1 / 3) + box(1 / 3, 2 / 3, 2 / 3, 1),
+    }
+
+
+SHAPE_TRIANGLES = shape_triangles()
+SHAPES = tuple(SHAPE_TRIANGLES)
+
+
+def face_style(face_id):
+    # Shape and colour differ between any two of the first SHAPES * COLORS
+    # faces; later faces repeat them with a glyph counting up from 1
+    shape = face_id % len(SHAPES)
+    row = face_id // len(SHAPES)
+    color = (row + face_id) % len(COLORS)
+    glyph = face_id // (len(SHAPES) * len(COLORS))
+    return SHAPES[shape], COLORS[color], base36(glyph) if glyph else ''
+
+
+def base36(number):
+    digits = ''
+    while number:
+        number, digit = divmod(number, 36)
+        digits = '0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ'[digit] + digits
+    return digits
+
+
+class ProceduralFaces:
+    # Same interface as CardAtlas: load(keys) returns one texture per key.
+    # Keys can be anything hashable; each new key gets the next face id.
+    def __init__(self, cell_size=128, capacity=1024):
+        self.cell_size = cell_size
+        self.capacity = capacity
+        self.face_ids = {}           # key -> face id, stable for the whole run
+        self.textures = {}           # face id -> region of a page
+        self.page_of = {}            # face id -> page
+        self.pages = OrderedDict()   # page -> face ids on it, least recently used first
+        self.page_bytes = {}
+        self.glyphs = {}             # glyph text -> texture
+        self.users = Counter()       # key -> load() calls not yet matched by unload()
+        self.rendered = 0
+
+    def load(self, keys):
+        self.users.update(dict.fromkeys(keys, 1))
+        ids = [self.face_ids.setdefault(key, len(self.face_ids)) for key in keys]
+        missing = [face_id for face_id in dict.fromkeys(ids) if face_id not in self.textures]
+        per_page = (MAX_PAGE // self.cell_size) ** 2
+        for start in range(0, len(missing), per_page):
+            self.render(missing[start:start + per_page])
+        for face_id in ids:
+            self.pages.move_to_end(self.page_of[face_id])
+        self.evict(set(ids))
+        return [self.textures[face_id] for face_id in ids]
+
+    def render(self, face_ids):
+        # A page is a handful of draw calls however many faces it holds: the
+        # clear paints every card white, then one mesh per colour and per glyph
+        cell = self.cell_size
+        cols = ceil(sqrt(len(face_ids)))
+        rows = ceil(len(face_ids) / cols)
+        margin = cell * 0.18
+        size = cell - 2 * margin
+        shapes, glyphs = {}, {}  # colour -> vertices, glyph text -> vertices
+        for i, face_id in enumerate(face_ids):
+            shape, color, glyph = face_style(face_id)
+            x, y = (i % cols) * cell, (i // cols) * cell
+            vertices = shapes.setdefault(color, [])
+            for u, v in SHAPE_TRIANGLES[shape]:
+                vertices += (x + margin + u * size, y + margin + v * size, 0, 0)
+            if glyph:
+                texture = self.glyph(glyph)
+                left, bottom = x + (cell - texture.width) / 2, y + (cell - texture.height) / 2
+                right, top = left + texture.width, bottom + texture.height
+                glyphs.setdefault(glyph, []).extend(
+                    (left, bottom, 0, 1, right, bottom, 1, 1, right, top, 1, 0,
+                     left, bottom, 0, 1, right, top, 1, 0, left, top, 0, 0))
+
+        fbo = Fbo(size=(cols * cell, rows * cell))
+        with fbo:
+            ClearColor(1, 1, 1, 1)
+            ClearBuffers()
+            for color, vertices in shapes.items():
+                Color(*color)
+                self.mesh(vertices)
+            Color(1, 1, 1, 1)
+            for glyph, vertices in glyphs.items():
+                self.mesh(vertices, self.glyphs[glyph])
+        fbo.draw()
+
+        # The fbo keeps its instructions so the page is redrawn if the GL context is lost
+        self.pages[fbo] = set(face_ids)
+        self.page_bytes[fbo] = cols * cell * rows * cell * 4
+        for i, face_id in enumerate(face_ids):
+            self.textures[face_id] = fbo.texture.get_region((i % cols) * cell, (i // cols) * cell, cell, cell)
+            self.page_of[face_id] = fbo
+        self.rendered += len(face_ids)
+
+    def mesh(self, vertices, texture=None):
+        # Triangles are independent, so a long list can be cut after any third vertex
+        step = MAX_VERTICES // 3 * 3 * 4
+        for start in range(0, len(vertices), step):
+            chunk = vertices[start:start + step]
+            Mesh(vertices=chunk, indices=range(len(chunk) // 4), mode='triangles', texture=texture)
+
+    def glyph(self, text):
+        texture = self.glyphs.get(text)
+        if texture is None:
+            label = CoreLabel(text=text, font_size=self.cell_size * 0.3, bold=True, color=(1, 1, 1, 1),
+                              outline_width=2, outline_color=(0, 0, 0))
+            label.refresh()
+            texture = self.glyphs[text] = label.texture
+        return texture
+
+    def evict(self, keep):
+        # Drops whole pages, oldest first, that hold none of the faces in use
+        for page in list(self.pages):
+            if len(self.textures) <= self.capacity:
+                break
+            if not self.pages[page] & keep:
+                self.drop(page)
+
+    def drop(self, page):
+        for face_id in self.pages.pop(page):
+            del self.textures[face_id]
+            del self.page_of[face_id]
+        del self.page_bytes[page]
+
+    def unload(self, keys):
+        # Faces of these keys are no longer shown by any screen; pages left without any go
+        for key in dict.fromkeys(keys):
+            self.users[key] -= 1
+            if self.users[key] > 0:
+                continue
+            del self.users[key]
+            face_id = self.face_ids.get(key)
+            page = self.page_of.pop(face_id, None)
+            if page is not None:
+                del self.textures[face_id]
+                self.pages[page].discard(face_id)
+                if not self.pages[page]:
+                    del self.pages[page]
+                    del self.page_bytes[page]
+
+    def nbytes(self, keys):
+        pages = {self.page_of[self.face_ids[key]] for key in keys
+                 if key in self.face_ids and self.face_ids[key] in self.page_of}
+        return sum(self.page_bytes[page] for page in pages)
+
+    def __getitem__(self, key):
+        return self.textures[self.face_ids[key]]
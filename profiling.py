@@ -0,0 +1,171 @@
+# Opt-in profiling of the game's hot paths and frame times.
+#
+#   MEMORYGAME_PROFILE=1 python main.py
+#
+# While it is off, timed() hands back the function it decorates untouched, so
+# the game runs exactly the same code as without profiling. While it is on,
+# every timed call and every frame lands in a histogram, an overlay (F12 to
+# hide) shows the live numbers and a JSON report is written on exit.
+import json
+import os
+import platform
+import time
+from functools import wraps
+
+ENABLED = os.environ.get('MEMORYGAME_PROFILE', '') not in ('', '0')
+FRAME_BUDGET = 1 / 60.  # frames slower than 1.5x this count as dropped
+
+
+class Histogram:
+    # Power-of-two buckets in microseconds, cheap enough to fill on every frame
+    def __init__(self):
+        self.buckets = [0] * 40
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, seconds):
+        self.buckets[int(seconds * 1e6).bit_length()] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def percentile(self, q):
+        # Upper bound of the bucket holding the q-th percentile, in milliseconds
+        wanted = q * self.count
+        seen = 0
+        for bucket, count in enumerate(self.buckets):
+            seen += count
+            if count and seen >= wanted:
+                return min((1 << bucket) / 1000., self.max * 1000)
+        return 0.0
+
+    def as_dict(self):
+        return {
+            'count': self.count,
+            'mean_ms': self.total / self.count * 1000 if self.count else 0.0,
+            'p50_ms': self.percentile(0.5),
+            'p95_ms': self.percentile(0.95),
+            'p99_ms': self.percentile(0.99),
+            'max_ms': self.max * 1000,
+            'buckets_us': {str(1 << bucket): count for bucket, count in enumerate(self.buckets) if count},
+        }
+
+
+class Profiler:
+    def __init__(self, enabled=ENABLED):
+        self.enabled = enabled
+        self.events = {}   # event name -> Histogram
+        self.frames = {}   # screen name -> Histogram of frame times
+        self.dropped = {}  # screen name -> frames over budget
+        self.overlay = None
+        self.transition_start = None
+        self.pending = []  # (event name, touch down time) waiting for the next frame
+
+    def timed(self, name):
+        def decorate(func):
+            if not self.enabled:
+                return func
+
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    self.record(name, time.perf_counter() - start)
+            return wrapper
+        return decorate
+
+    def record(self, name, seconds):
+        histogram = self.events.get(name)
+        if histogram is None:
+            histogram = self.events[name] = Histogram()
+        histogram.add(seconds)
+
+    def after_frame(self, name, touch):
+        # Records the time from touch down until the frame showing its result
+        self.pending.append((name, touch.time_start))
+
+    def start(self, app):
+        from kivy.clock import Clock
+        from kivy.core.window import Window
+        from kivy.uix.label import Label
+
+        self.app = app
+        Clock.schedule_interval(self.on_frame, 0)
+        Window.bind(on_flip=self.on_flip)
+        app.root.bind(current=self.on_screen_change)
+        app.root.transition.bind(on_complete=self.on_transition_complete)
+
+        self.overlay = Label(font_size=12, color=(0, 0, 0, 1), halign='left', valign='top',
+                             size_hint=(None, None), size=Window.size)
+        self.overlay.bind(size=self.overlay.setter('text_size'))
+        Window.bind(size=self.overlay.setter('size'))
+        Window.add_widget(self.overlay)
+        Window.bind(on_key_down=self.on_key_down)
+        Clock.schedule_interval(self.update_overlay, 0.5)
+
+    def on_frame(self, dt):
+        screen = self.app.root.current
+        histogram = self.frames.get(screen)
+        if histogram is None:
+            histogram = self.frames[screen] = Histogram()
+            self.dropped[screen] = 0
+        histogram.add(dt)
+        if dt > FRAME_BUDGET * 1.5:
+            self.dropped[screen] += 1
+
+    def on_flip(self, window):
+        if self.pending:
+            now = time.time()  # Touch times come from time.time()
+            for name, touch_start in self.pending:
+                self.record(name, now - touch_start)
+            del self.pending[:]
+
+    def on_screen_change(self, manager, current):
+        self.transition_start = time.perf_counter()
+
+    def on_transition_complete(self, transition):
+        if self.transition_start is not None:
+            self.record('transition:' + self.app.root.current, time.perf_counter() - self.transition_start)
+            self.transition_start = None
+
+    def on_key_down(self, window, key, *args):
+        if key == 293:  # F12
+            self.overlay.opacity = 0 if self.overlay.opacity else 1
+
+    def update_overlay(self, dt):
+        if not self.overlay.opacity:
+            return
+        lines = []
+        for screen, histogram in self.frames.items():
+            lines.append(f"{screen}: {histogram.count / histogram.total if histogram.total else 0:.0f} fps, "
+                         f"p95 {histogram.percentile(0.95):.1f} ms, dropped {self.dropped[screen]}")
+        for name, histogram in self.events.items():
+            lines.append(f"{name}: n={histogram.count} p50 {histogram.percentile(0.5):.2f} ms "
+                         f"p95 {histogram.percentile(0.95):.2f} ms max {histogram.max * 1000:.2f} ms")
+        self.overlay.text = '\n'.join(lines)
+
+    def report(self, **extra):
+        from kivy import __version__ as kivy_version
+        report = {
+            'platform': platform.platform(),
+            'python': platform.python_version(),
+            'kivy': kivy_version,
+            'events': {name: histogram.as_dict() for name, histogram in self.events.items()},
+            'frames': {screen: dict(histogram.as_dict(), dropped=self.dropped[screen])
+                       for screen, histogram in self.frames.items()},
+        }
+        report.update(extra)
+        return report
+
+    def dump(self, path, **extra):
+        with open(path, 'w') as report:
+            json.dump(self.report(**extra), report, indent=2)
+        print(f"Profile written to {path}")
+
+
+profiler = Profiler()
+timed = profiler.timed
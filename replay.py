@@ -0,0 +1,202 @@
+# Append-only binary log of game sessions, and a memory-mapped reader that
+# replays any recorded session on a MemoryBoard.
+#
+# Every record is 8 bytes: kind (u8), a (u8), b (u16), value (u32).
+#   SESSION  a=level        b=num_cards     value=seed
+#   LIMITS   a=pipelined    b=max_attempts  value=time limit in seconds
+#   FLIP     a=flip result  b=card index    value=microseconds since SESSION
+#   MATCH    a=1 if matched b=num_attempts  value=microseconds since SESSION
+#   END      a=board state  b=num_attempts  value=microseconds since SESSION
+#            (PLAYING when the game was left for the menu)
+#
+# Session time stops while the app is paused, like the game clock. It is
+# capped at MAX_ELAPSED, about 71 minutes, rather than wrapping around.
+#
+#   python replay.py replay.bin [--session N]
+import argparse
+import mmap
+import struct
+import time
+
+from engine import MemoryBoard, FLIP_IGNORED, PLAYING, WON, LOST
+from levels import LEVELS
+from writer import BackgroundWriter
+
+SESSION = 1
+LIMITS = 2
+FLIP = 3
+MATCH = 4
+END = 5
+
+LEVEL_NAMES = tuple(LEVELS)  # level code -> level name
+
+RECORD = struct.Struct('<BBHI')
+MAX_ELAPSED = 0xFFFFFFFF  # Largest value a record holds
+RECORD_FIELDS = [('kind', 'u1'), ('a', 'u1'), ('b', '<u2'), ('value', '<u4')]  # As a NumPy dtype
+
+
+class ReplayWriter:
+    # Records are packed on the caller's thread and written by a worker, so
+    # logging a click never waits on the disk.
+    def __init__(self, path):
+        self.path = path
+        self.session_start = None
+        self.paused_at = None
+        self.writer = BackgroundWriter(self._write, lambda: open(path, 'ab'))
+
+    def _write(self, log, chunks):
+        log.write(b''.join(chunks))
+        log.flush()
+
+    def _elapsed(self):
+        now = self.paused_at if self.paused_at is not None else time.monotonic_ns()
+        return min((now - self.session_start) // 1000, MAX_ELAPSED)
+
+    def pause(self):
+        # Time in the background is not part of the session
+        if self.paused_at is None:
+            self.paused_at = time.monotonic_ns()
+
+    def resume(self):
+        if self.paused_at is not None:
+            if self.session_start is not None:
+                self.session_start += time.monotonic_ns() - self.paused_at
+            self.paused_at = None
+
+    def begin(self, level, board, time_limit, pipelined=False):
+        self.session_start = self.paused_at or time.monotonic_ns()
+        self.writer.put(RECORD.pack(SESSION, LEVEL_NAMES.index(level), board.num_cards, board.seed)
+                       + RECORD.pack(LIMITS, pipelined, board.max_attempts, time_limit))
+
+    def flip(self, index, result):
+        if self.session_start is not None:
+            self.writer.put(RECORD.pack(FLIP, result, index, self._elapsed()))
+
+    def match(self, matched, num_attempts):
+        if self.session_start is not None:
+            self.writer.put(RECORD.pack(MATCH, matched, num_attempts, self._elapsed()))
+
+    def end(self, state, num_attempts):
+        if self.session_start is not None:
+            self.writer.put(RECORD.pack(END, state, num_attempts, self._elapsed()))
+            self.session_start = None
+
+    def abandon(self):
+        # Stop recording the current session without writing an END record
+        self.session_start = None
+
+    def close(self):
+        self.writer.close()
+
+
+class Session:
+    def __init__(self, records):
+        self.records = records
+        self.level = LEVEL_NAMES[records[0]['a']]
+        self.num_cards = int(records[0]['b'])
+        self.seed = int(records[0]['value'])
+        self.pipelined = bool(records[1]['a'])  # Taps during a mismatch reveal settled the pair
+        self.max_attempts = int(records[1]['b'])
+        self.time_limit = int(records[1]['value'])
+
+    def events(self):
+        # (kind, a, b, seconds since the session started), in recorded order
+        for record in self.records[2:]:
+            yield int(record['kind']), int(record['a']), int(record['b']), record['value'] / 1e6
+
+    def outcome(self):
+        ends = self.records[self.records['kind'] == END]
+        return int(ends[-1]['a']) if len(ends) else None
+
+
+class ReplayReader:
+    def __init__(self, path):
+        # NumPy is only needed to read logs, so writing one (the app, the
+        # server) does not pay for importing it
+        import numpy as np
+        self.file = open(path, 'rb')
+        self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        # A torn record at the end of the file (app killed mid-write) is ignored
+        count = len(self.map) // RECORD.size
+        self.records = np.frombuffer(self.map, dtype=np.dtype(RECORD_FIELDS), count=count)
+        self.starts = np.flatnonzero(self.records['kind'] == SESSION)
+        self.bounds = np.append(self.starts[1:], count)
+
+    def __len__(self):
+        return len(self.starts)
+
+    def session(self, index):
+        return Session(self.records[self.starts[index]:self.bounds[index]])
+
+    def summary(self):
+        # Counts per level and outcome, computed over the whole file at once
+        import numpy as np
+        levels = self.records['a'][self.starts]
+        ends = np.flatnonzero(self.records['kind'] == END)
+        owner = np.searchsorted(self.starts, ends, side='right') - 1
+        outcome = np.zeros(len(self.starts), dtype=np.uint8)
+        outcome[owner] = self.records['a'][ends]
+
+        summary = {}
+        for code, level in enumerate(LEVEL_NAMES):
+            mine = levels == code
+            summary[level] = {
+                'sessions': int(mine.sum()),
+                'won': int((mine & (outcome == WON)).sum()),
+                'lost': int((mine & (outcome == LOST)).sum()),
+                'unfinished': int((mine & (outcome == 0)).sum()),
+            }
+        return summary
+
+    def close(self):
+        del self.records
+        self.map.close()
+        self.file.close()
+
+
+def replay(session):
+    # Plays the recorded clicks on a fresh board and checks every recorded
+    # outcome, so a replay that diverges from the original fails loudly.
+    board = MemoryBoard(session.num_cards // 2, session.max_attempts, session.seed)
+    for kind, a, b, seconds in session.events():
+        if kind == FLIP:
+            result = board.flip(b)
+            if result != a:
+                raise ValueError(f"flip of card {b} at {seconds:.3f}s gave {result}, recorded {a}")
+        elif kind == MATCH:
+            matched = board.check_match()
+            if matched != bool(a) or board.num_attempts != b:
+                raise ValueError(f"match at {seconds:.3f}s diverged from the recording")
+        elif kind == END:
+            if a == LOST and board.state == PLAYING:
+                board.time_up()  # The only way a game ends without a match check
+            if board.state != a:
+                raise ValueError(f"game ended in state {a} at {seconds:.3f}s, replay is in state {board.state}")
+    return board
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Summarize or replay recorded game sessions.")
+    parser.add_argument('path')
+    parser.add_argument('--session', type=int, help="replay one session headlessly")
+    args = parser.parse_args()
+
+    reader = ReplayReader(args.path)
+    if args.session is None:
+        start = time.perf_counter()
+        summary = reader.summary()
+        print(f"{len(reader)} sessions scanned in {(time.perf_counter() - start) * 1000:.1f} ms")
+        for level, counts in summary.items():
+            print(f"  {level:<7} {counts['sessions']:>9} sessions, {counts['won']} won, "
+                  f"{counts['lost']} lost, {counts['unfinished']} unfinished")
+        return
+
+    session = reader.session(args.session)
+    board = replay(session)
+    flips = sum(1 for kind, a, b, seconds in session.events() if kind == FLIP and a != FLIP_IGNORED)
+    print(f"session {args.session}: {session.level}, seed {session.seed}, {flips} flips, "
+          f"{board.num_attempts}/{session.max_attempts} attempts, state {board.state}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,225 @@
+# Head-to-head matches served from one asyncio event loop. Two players share
+# a MemoryBoard and take turns: a found pair scores for the player who found
+# it and keeps the turn, a mismatch passes it. Flips, attempts and the time
+# limit are the engine's rules, so a match plays like the single player game.
+#
+#   python server.py [--host 127.0.0.1] [--port 8765]
+#
+# Messages are 8-byte records like replay.py's: kind (u8), a (u8), b (u16), value (u32).
+#   client -> server
+#   JOIN     a=level code    b=1 to play the computer  value=its difficulty code
+#   FLIP                     b=card index
+#   server -> client
+#   START    a=your seat     b=num_cards     value=time limit in seconds
+#   LIMITS                   b=max_attempts
+#   SHOW     a=seat          b=card index    value=face id
+#   CHECKED  a=1 if matched  b=num_attempts  value=seat to move
+#   END      a=board state   b=winner seat   value=pairs of seat 0 | pairs of seat 1 << 16
+#
+# Seat 0 moves first. A match ends when the board is won or lost, and a player
+# who disconnects forfeits. The winner is DRAW when both found as many pairs.
+# Difficulty codes index solver.DIFFICULTIES; the computer takes seat 1.
+import argparse
+import asyncio
+
+from engine import MemoryBoard, FLIP_IGNORED, FLIP_SECOND, PLAYING, LOST
+from levels import LEVELS
+from replay import RECORD, LEVEL_NAMES
+from solver import Knowledge, DIFFICULTIES, MEMORY_MODELS
+
+JOIN = 1
+FLIP = 2
+START = 16
+LIMITS = 17
+SHOW = 18
+CHECKED = 19
+END = 20
+
+DRAW = 2  # Winner seat of a drawn match
+
+DEFAULT_PORT = 8765
+THINK_TIME = 0.6  # Seconds the computer waits before each flip, so players can follow
+
+
+async def read_records(reader):
+    # Reads whatever has arrived and unpacks every whole record in it, so a
+    # burst of messages costs one wakeup instead of one per record
+    buffer = b''
+    while True:
+        data = await reader.read(65536)
+        if not data:
+            return
+        buffer += data
+        end = len(buffer) - len(buffer) % RECORD.size
+        for record in RECORD.iter_unpack(buffer[:end]):
+            yield record
+        buffer = buffer[end:]
+
+
+class Player:
+    def __init__(self, writer):
+        self.writer = writer
+        self.match = None
+        self.seat = 0
+
+    def send(self, kind, a=0, b=0, value=0):
+        if not self.writer.is_closing():
+            self.writer.write(RECORD.pack(kind, a, b, value))
+
+
+class ComputerPlayer:
+    # Takes a seat like a connection would, remembering what it is shown as
+    # well as its difficulty allows. Moves are worked out in the executor so
+    # a big board never holds up the other matches on the loop.
+    def __init__(self, difficulty):
+        self.recall = MEMORY_MODELS[difficulty]
+        self.knowledge = None
+        self.match = None
+        self.seat = 0
+
+    def send(self, kind, a=0, b=0, value=0):
+        if kind == START:
+            self.knowledge = Knowledge(b, self.recall)
+            if a == 0:
+                self.plan()
+        elif kind == SHOW:
+            self.knowledge.reveal(b, value)
+            if a == self.seat and len(self.knowledge.shown) == 1:
+                self.plan(b)
+        elif kind == CHECKED:
+            self.knowledge.checked(a)
+            if value == self.seat:
+                self.plan()
+
+    def plan(self, first=-1):
+        match = self.match
+        asyncio.get_running_loop().call_later(THINK_TIME, lambda: asyncio.ensure_future(self.move(match, first)))
+
+    async def move(self, match, first):
+        if match is not self.match:
+            return
+        cards = await asyncio.get_running_loop().run_in_executor(None, self.knowledge.snapshot().suggest, first)
+        if match is self.match and match.turn == self.seat:
+            match.flip(self.seat, cards[0])
+
+
+class Match:
+    def __init__(self, server, level, players):
+        limits = LEVELS[level]
+        self.server = server
+        self.board = MemoryBoard(limits.num_pairs, limits.max_attempts)
+        self.players = players
+        self.turn = 0
+        self.pairs = [0, 0]
+        for seat, player in enumerate(players):
+            player.match = self
+            player.seat = seat
+            player.send(START, seat, self.board.num_cards, limits.time_limit)
+            player.send(LIMITS, 0, limits.max_attempts)
+        self.deadline = asyncio.get_running_loop().call_later(limits.time_limit, self.time_up)
+
+    def broadcast(self, kind, a=0, b=0, value=0):
+        for player in self.players:
+            player.send(kind, a, b, value)
+
+    def flip(self, seat, index):
+        if seat != self.turn or not 0 <= index < self.board.num_cards:
+            return
+        result = self.board.flip(index)
+        if result == FLIP_IGNORED:
+            return
+        self.broadcast(SHOW, seat, index, self.board.face(index))
+        if result == FLIP_SECOND:
+            # Checked at once; showing the pair for a moment is up to the clients
+            matched = self.board.check_match()
+            if matched:
+                self.pairs[seat] += 1
+            else:
+                self.turn ^= 1
+            self.broadcast(CHECKED, matched, self.board.num_attempts, self.turn)
+            if self.board.state != PLAYING:
+                self.finish()
+
+    def time_up(self):
+        self.board.time_up()
+        self.finish()
+
+    def forfeit(self, seat):
+        if self.board.state == PLAYING:
+            self.board.state = LOST
+        self.finish(winner=seat ^ 1)
+
+    def finish(self, winner=None):
+        self.deadline.cancel()
+        if winner is None:
+            first, second = self.pairs
+            winner = 0 if first > second else 1 if second > first else DRAW
+        self.broadcast(END, self.board.state, winner, self.pairs[0] | self.pairs[1] << 16)
+        for player in self.players:
+            player.match = None  # Free to JOIN the next match on the same connection
+        self.server.matches.discard(self)
+        self.server.finished += 1
+
+
+class MatchServer:
+    def __init__(self):
+        self.waiting = {}  # level -> player waiting for an opponent
+        self.matches = set()
+        self.finished = 0
+
+    async def handle(self, reader, writer):
+        player = Player(writer)
+        try:
+            async for kind, a, b, value in read_records(reader):
+                if kind == FLIP:
+                    if player.match is not None:
+                        player.match.flip(player.seat, b)
+                elif kind == JOIN and a < len(LEVEL_NAMES):
+                    computer = DIFFICULTIES[value] if b and value < len(DIFFICULTIES) else None
+                    self.join(player, LEVEL_NAMES[a], computer)
+        except ConnectionError:
+            pass
+        finally:
+            self.leave(player)
+            writer.close()
+
+    def join(self, player, level, computer=None):
+        if player.match is not None or player in self.waiting.values():
+            return
+        if computer is not None:
+            self.matches.add(Match(self, level, [player, ComputerPlayer(computer)]))
+            return
+        opponent = self.waiting.pop(level, None)
+        if opponent is None:
+            self.waiting[level] = player
+        else:
+            self.matches.add(Match(self, level, [opponent, player]))
+
+    def leave(self, player):
+        for level, waiting in list(self.waiting.items()):
+            if waiting is player:
+                del self.waiting[level]
+        if player.match is not None:
+            player.match.forfeit(player.seat)
+
+    async def serve(self, host='127.0.0.1', port=DEFAULT_PORT):
+        server = await asyncio.start_server(self.handle, host, port, backlog=4096)
+        async with server:
+            await server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve head-to-head memory game matches.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    args = parser.parse_args()
+
+    print(f"Serving matches on {args.host}:{args.port}")
+    try:
+        asyncio.run(MatchServer().serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+# Move selection for hints and the computer opponent. What has been seen of a
+# board is kept as bitsets in Python ints (bit i is card i), so finding a
+# known pair or a card never seen is a few big-int operations, however many
+# cards the board has.
+#
+#   python solver.py --cards 400 --games 20 --model forgetful
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from random import Random
+import argparse
+import time
+
+# Probability that a card turned over in a mismatch is remembered.
+# 1.0 never forgets, 0.0 is a player picking cards at random.
+MEMORY_MODELS = {
+    'perfect': 1.0,
+    'forgetful': 0.6,
+    'random': 0.0,
+}
+DIFFICULTIES = tuple(MEMORY_MODELS)  # difficulty code -> memory model name
+
+
+def lowest(bits):
+    return (bits & -bits).bit_length() - 1
+
+
+class Knowledge:
+    def __init__(self, num_cards, recall=1.0, seed=None):
+        # recall is the chance a card seen in a mismatch is remembered, as in balancer.py
+        self.num_cards = num_cards
+        self.recall = recall
+        self.rng = Random(seed)
+        self.reset()
+
+    def reset(self):
+        self.known = 0    # cards whose face is remembered
+        self.matched = 0  # cards taken off the board
+        self.faces = {}   # face id -> remembered cards showing it
+        self.ready = {}   # face id -> both cards of a remembered pair
+        self.shown = []   # (card, face) turned over in the current turn
+
+    def reveal(self, index, face):
+        self.shown.append((index, face))
+
+    def checked(self, matched):
+        # End of a turn: a pair leaves the board, a mismatch may be remembered
+        for index, face in self.shown:
+            if matched:
+                self.matched |= 1 << index
+                self.forget(index, face)
+            elif self.rng.random() < self.recall:
+                self.remember(index, face)
+        self.shown = []
+
+    def remember(self, index, face):
+        self.known |= 1 << index
+        cards = self.faces[face] = self.faces.get(face, 0) | 1 << index
+        if cards.bit_count() == 2:
+            self.ready[face] = cards
+
+    def forget(self, index, face):
+        self.known &= ~(1 << index)
+        cards = self.faces.pop(face, 0) & ~(1 << index)
+        if cards:
+            self.faces[face] = cards
+        self.ready.pop(face, None)
+
+    def snapshot(self):
+        # Copy for another thread; the ints are immutable, only the dicts are copied
+        copy = Knowledge.__new__(Knowledge)
+        copy.__dict__.update(self.__dict__, faces=dict(self.faces), ready=dict(self.ready), shown=list(self.shown))
+        return copy
+
+    def unseen(self, exclude=-1):
+        # A card never seen, chosen uniformly so nothing about the board leaks
+        # into which card is tried
+        unknown = ((1 << self.num_cards) - 1) & ~self.known & ~self.matched
+        if exclude >= 0:
+            unknown &= ~(1 << exclude)
+        if not unknown:
+            return -1
+        for _ in range(8):  # Cheap while plenty of cards are unknown
+            index = self.rng.randrange(self.num_cards)
+            if unknown >> index & 1:
+                return index
+        for _ in range(self.rng.randrange(unknown.bit_count())):
+            unknown &= unknown - 1  # Drops the lowest card
+        return lowest(unknown)
+
+    def suggest(self, first=-1):
+        # Cards worth turning over next: both cards of a known pair, the partner
+        # of the face up card if it is known, or else a card never seen
+        if first == -1:
+            for cards in self.ready.values():
+                return lowest(cards), cards.bit_length() - 1
+        else:
+            # None when first was turned over before this knowledge was kept
+            face = next((face for index, face in self.shown if index == first), None)
+            partner = self.faces.get(face, 0) & ~(1 << first)
+            if partner:
+                return lowest(partner),
+        index = self.unseen(first)
+        if index == -1:  # Everything is remembered, yet no pair: any other card
+            others = ((1 << self.num_cards) - 1) & ~self.matched
+            if first >= 0:
+                others &= ~(1 << first)
+            index = lowest(others)
+        return index,
+
+
+class MoveWorker:
+    # Computes suggestions on a worker thread so the board never waits on
+    # them; deliver(function) must run function on the caller's thread
+    def __init__(self, deliver):
+        self.pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix='solver')
+        self.deliver = deliver
+
+    def request(self, knowledge, first, callback):
+        future = self.pool.submit(knowledge.snapshot().suggest, first)
+        future.add_done_callback(lambda future: self.deliver(partial(callback, future.result())))
+
+    def close(self):
+        self.pool.shutdown(wait=False, cancel_futures=True)
+
+
+def play(board_cards, knowledge):
+    # Plays a whole board alone with suggest(), returns the number of mismatches
+    from engine import MemoryBoard
+    board = MemoryBoard(board_cards // 2, max_attempts=1 << 30)
+    while board.num_matched < board.num_cards:
+        first = knowledge.suggest()[0]
+        board.flip(first)
+        knowledge.reveal(first, board.face(first))
+        second = knowledge.suggest(first)[0]
+        board.flip(second)
+        knowledge.reveal(second, board.face(second))
+        knowledge.checked(board.check_match())
+    return board.num_attempts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time the solver playing whole boards.")
+    parser.add_argument('--cards', type=int, default=400)
+    parser.add_argument('--games', type=int, default=20)
+    parser.add_argument('--model', choices=DIFFICULTIES, default='perfect')
+    args = parser.parse_args()
+
+    mismatches, moves = 0, 0
+    start = time.perf_counter()
+    for game in range(args.games):
+        knowledge = Knowledge(args.cards, MEMORY_MODELS[args.model], seed=game)
+        attempts = play(args.cards, knowledge)
+        mismatches += attempts
+        moves += attempts + args.cards // 2
+    elapsed = time.perf_counter() - start
+    print(f"{args.cards} cards, {args.model}: {mismatches / args.games:.1f} mismatches per game, "
+          f"{elapsed / (moves * 2) * 1e6:.1f} us per suggestion")
+
+
+if __name__ == "__main__":
+    main()
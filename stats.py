@@ -0,0 +1,130 @@
+# Local results store and leaderboards, kept in SQLite in WAL mode.
+# Finished games are queued by the UI thread and written in batches by a
+# worker thread with its own connection, so game_over never waits on disk.
+#
+#   python stats.py stats.db              leaderboards for every level
+#   python stats.py /tmp/bench.db --fill 200000   time queries on a big table
+import argparse
+import random
+import sqlite3
+import time
+from contextlib import closing
+
+from writer import BackgroundWriter
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS results (
+    id INTEGER PRIMARY KEY,
+    level TEXT NOT NULL,
+    won INTEGER NOT NULL,
+    seconds REAL NOT NULL,
+    attempts INTEGER NOT NULL,
+    finished_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS results_by_time ON results (level, won, seconds);
+CREATE INDEX IF NOT EXISTS results_by_attempts ON results (level, won, attempts, seconds);
+CREATE TABLE IF NOT EXISTS totals (
+    level TEXT PRIMARY KEY,
+    played INTEGER NOT NULL,
+    won INTEGER NOT NULL
+);
+'''
+
+BATCH_SIZE = 256
+BATCH_WAIT = 0.5  # seconds a batch may wait for more results before it is written
+
+
+def insert(db, rows):
+    # Per-level totals are kept up to date with the rows, so counting games
+    # never has to scan the results table
+    db.executemany('INSERT INTO results (level, won, seconds, attempts, finished_at) VALUES (?, ?, ?, ?, ?)', rows)
+    db.executemany('INSERT INTO totals (level, played, won) VALUES (?, 1, ?) '
+                   'ON CONFLICT (level) DO UPDATE SET played = played + 1, won = won + excluded.won',
+                   ((row[0], row[1]) for row in rows))
+
+
+def connect(path):
+    db = sqlite3.connect(path)
+    db.execute('PRAGMA journal_mode=WAL')
+    db.execute('PRAGMA synchronous=NORMAL')
+    db.executescript(SCHEMA)
+    return db
+
+
+class StatsStore:
+    def __init__(self, path):
+        self.path = path
+        self.reader = None
+        connect(path).close()  # Create the schema before anyone reads
+        # The writer's connection is opened on its own thread, as SQLite requires
+        self.writer = BackgroundWriter(self._write, lambda: closing(connect(path)), BATCH_SIZE, BATCH_WAIT)
+
+    def record(self, level, won, seconds, attempts):
+        self.writer.put((level, int(won), seconds, attempts, time.time()))
+
+    def _write(self, db, rows):
+        with db:
+            insert(db, rows)
+
+    def close(self):
+        self.writer.close()
+        if self.reader:
+            self.reader.close()
+            self.reader = None
+
+    def _db(self):
+        # Reads use their own connection; in WAL mode they never block the writer
+        if self.reader is None:
+            self.reader = connect(self.path)
+        return self.reader
+
+    def best_times(self, level, limit=10):
+        return self._db().execute(
+            'SELECT seconds, attempts, finished_at FROM results '
+            'WHERE level = ? AND won = 1 ORDER BY seconds LIMIT ?', (level, limit)).fetchall()
+
+    def fewest_attempts(self, level, limit=10):
+        return self._db().execute(
+            'SELECT attempts, seconds, finished_at FROM results '
+            'WHERE level = ? AND won = 1 ORDER BY attempts, seconds LIMIT ?', (level, limit)).fetchall()
+
+    def summary(self, level):
+        row = self._db().execute('SELECT played, won FROM totals WHERE level = ?', (level,)).fetchone()
+        played, won = row or (0, 0)
+        return {'played': played, 'won': won}
+
+
+def fill(store, count):
+    # Synthetic results for timing queries on a large table
+    db = connect(store.path)
+    rng = random.Random(0)
+    with db:
+        insert(db, [(rng.choice(('easy', 'normal', 'hard')), int(rng.random() < 0.6), rng.uniform(10, 90),
+                     rng.randrange(20), time.time()) for _ in range(count)])
+    db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Show leaderboards from the results store.")
+    parser.add_argument('path')
+    parser.add_argument('--fill', type=int, default=0, help="insert this many synthetic results first")
+    args = parser.parse_args()
+
+    store = StatsStore(args.path)
+    if args.fill:
+        fill(store, args.fill)
+
+    for level in ('easy', 'normal', 'hard'):
+        start = time.perf_counter()
+        summary = store.summary(level)
+        best = store.best_times(level, 3)
+        fewest = store.fewest_attempts(level, 3)
+        elapsed = (time.perf_counter() - start) * 1000
+        print(f"{level}: {summary['won']}/{summary['played']} won, queries took {elapsed:.2f} ms")
+        print("  best times:      " + ', '.join(f"{seconds:.1f}s ({attempts} attempts)" for seconds, attempts, _ in best))
+        print("  fewest attempts: " + ', '.join(f"{attempts} ({seconds:.1f}s)" for attempts, seconds, _ in fewest))
+    store.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+import autosave
+from autosave import Autosave, HEADER, MAGIC
+from engine import MemoryBoard
+from levels import LEVELS
+
+
+def saved_board():
+    board = MemoryBoard(LEVELS['normal'].num_pairs, 16, seed=42)
+    positions = {}
+    for index in range(board.num_cards):
+        positions.setdefault(board.face(index), []).append(index)
+    first, second = positions[3]
+    board.flip(first)
+    board.flip(second)
+    board.check_match()
+    board.num_attempts = 4
+    return board
+
+
+def test_save_and_load(tmp_path):
+    path = str(tmp_path / 'autosave.bin')
+    board = saved_board()
+    saver = Autosave(path)
+    saver.save('normal', board, 37, pipelined=True)
+    saver.close()
+
+    snapshot = autosave.load(path)
+    assert snapshot.level == 'normal'
+    assert snapshot.pipelined
+    assert (snapshot.num_cards, snapshot.seed) == (board.num_cards, 42)
+    assert (snapshot.num_attempts, snapshot.max_attempts, snapshot.remaining_time) == (4, 16, 37)
+    assert bytes(snapshot.matched) == bytes(board.matched)
+
+    restored = MemoryBoard(LEVELS['normal'].num_pairs, snapshot.max_attempts)
+    restored.restore(snapshot.seed, snapshot.matched, snapshot.num_attempts)
+    assert bytes(restored.matched) == bytes(board.matched)
+    assert restored.num_matched == board.num_matched
+
+
+def test_latest_snapshot_wins(tmp_path):
+    path = str(tmp_path / 'autosave.bin')
+    saver = Autosave(path)
+    for remaining_time in (30, 20, 10):
+        saver.save('normal', saved_board(), remaining_time)
+    saver.close()
+    assert autosave.load(path).remaining_time == 10
+    assert not (tmp_path / 'autosave.bin.tmp').exists()
+
+
+def test_clear_leaves_nothing_to_resume(tmp_path):
+    path = str(tmp_path / 'autosave.bin')
+    saver = Autosave(path)
+    saver.save('normal', saved_board(), 30)
+    saver.clear()
+    saver.clear()  # Nothing left to remove
+    saver.close()
+    assert not (tmp_path / 'autosave.bin').exists()
+    assert autosave.load(path) is None
+
+
+def test_missing_or_corrupt_file_loads_as_nothing(tmp_path):
+    path = tmp_path / 'autosave.bin'
+    assert autosave.load(str(path)) is None
+
+    good = autosave.pack('normal', saved_board(), 30)
+    for data in (b'', b'junk', good[:HEADER.size - 1], good[:-1], good + b'\0',
+                 b'XXXX' + good[len(MAGIC):], good[:4] + bytes([99]) + good[5:]):
+        path.write_bytes(data)
+        assert autosave.load(str(path)) is None, data
+
+
+def test_snapshot_of_another_deck_size_is_refused(tmp_path):
+    path = tmp_path / 'autosave.bin'
+    board = MemoryBoard(LEVELS['easy'].num_pairs, 20, seed=1)  # An easy board saved as normal
+    path.write_bytes(autosave.pack('normal', board, 30))
+    assert autosave.load(str(path)) is None
@@ -0,0 +1,122 @@
+from engine import MemoryBoard, FLIP_IGNORED, FLIP_FIRST, FLIP_SECOND, PLAYING, WON, LOST
+
+
+def pairs(board):
+    # face id -> its two positions
+    positions = {}
+    for index in range(board.num_cards):
+        positions.setdefault(board.face(index), []).append(index)
+    return positions
+
+
+def test_same_seed_deals_same_board():
+    assert list(MemoryBoard(6, 20, seed=7).cards) == list(MemoryBoard(6, 20, seed=7).cards)
+    assert sorted(MemoryBoard(6, 20, seed=7).cards) == sorted(list(range(6)) * 2)
+
+
+def test_flip_takes_two_cards_then_waits_for_the_check():
+    board = MemoryBoard(6, 20, seed=1)
+    assert board.flip(0) == FLIP_FIRST
+    assert board.flip(0) == FLIP_IGNORED
+    assert board.flip(1) == FLIP_SECOND
+    assert board.flip(2) == FLIP_IGNORED
+    assert board.is_face_up(0) and board.is_face_up(1) and not board.is_face_up(2)
+
+
+def test_match_takes_the_pair_off_the_board():
+    board = MemoryBoard(6, 20, seed=1)
+    first, second = pairs(board)[0]
+    board.flip(first)
+    board.flip(second)
+    assert board.check_match()
+    assert board.is_matched(first) and board.is_matched(second)
+    assert board.num_matched == 2 and board.num_attempts == 0
+    assert board.flip(first) == FLIP_IGNORED
+
+
+def test_mismatch_counts_an_attempt_and_turns_the_cards_back():
+    board = MemoryBoard(6, 20, seed=1)
+    positions = pairs(board)
+    board.flip(positions[0][0])
+    board.flip(positions[1][0])
+    assert not board.check_match()
+    assert board.num_attempts == 1
+    assert not board.is_face_up(positions[0][0]) and not board.is_face_up(positions[1][0])
+    assert board.state == PLAYING
+
+
+def test_check_match_without_a_pair_does_nothing():
+    board = MemoryBoard(6, 20, seed=1)
+    board.flip(0)
+    assert not board.check_match()
+    assert board.num_attempts == 0
+
+
+def test_last_pair_wins():
+    board = MemoryBoard(6, 20, seed=1)
+    for first, second in pairs(board).values():
+        board.flip(first)
+        board.flip(second)
+        board.check_match()
+    assert board.state == WON
+    assert board.flip(0) == FLIP_IGNORED
+
+
+def test_running_out_of_attempts_loses():
+    board = MemoryBoard(6, 2, seed=1)
+    positions = pairs(board)
+    for _ in range(2):
+        board.flip(positions[0][0])
+        board.flip(positions[1][0])
+        board.check_match()
+    assert board.state == LOST
+    assert board.flip(positions[2][0]) == FLIP_IGNORED
+
+
+def test_time_up_loses_only_a_game_in_play():
+    board = MemoryBoard(6, 20, seed=1)
+    board.time_up()
+    assert board.state == LOST
+
+    board = MemoryBoard(6, 20, seed=1)
+    for first, second in pairs(board).values():
+        board.flip(first)
+        board.flip(second)
+        board.check_match()
+    board.time_up()
+    assert board.state == WON
+
+
+def test_pair_showing_when_time_runs_out_is_not_checked():
+    # The reveal timer fires after time_up(); the lost game must stay lost
+    # without another attempt, even if the pair would have matched
+    board = MemoryBoard(6, 20, seed=1)
+    positions = pairs(board)
+    board.flip(positions[0][0])
+    board.flip(positions[1][0])
+    board.time_up()
+    assert not board.check_match()
+    assert board.state == LOST and board.num_attempts == 0
+
+    board = MemoryBoard(6, 20, seed=1)
+    first, second = pairs(board)[0]
+    board.flip(first)
+    board.flip(second)
+    board.time_up()
+    assert not board.check_match()
+    assert board.state == LOST and board.num_matched == 0
+
+
+def test_restore_deals_the_board_part_way_through():
+    board = MemoryBoard(6, 20, seed=3)
+    first, second = pairs(board)[2]
+    board.flip(first)
+    board.flip(second)
+    board.check_match()
+
+    restored = MemoryBoard(6, 20)
+    restored.restore(board.seed, board.matched, 5)
+    assert list(restored.cards) == list(board.cards)
+    assert restored.is_matched(first) and restored.is_matched(second)
+    assert restored.num_matched == 2 and restored.num_attempts == 5
+    assert restored.state == PLAYING
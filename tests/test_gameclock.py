@@ -0,0 +1,121 @@
+import os
+from types import SimpleNamespace
+
+import pytest
+
+os.environ.setdefault('KIVY_NO_ARGS', '1')  # Kivy must not read pytest's command line
+os.environ.setdefault('KIVY_NO_CONSOLELOG', '1')
+pytest.importorskip('kivy.clock')  # gameclock schedules its ticks on Kivy's Clock
+
+import gameclock
+from gameclock import GameClock
+
+
+class FakeTime:
+    # Stands in for time.monotonic and Kivy's Clock: time only moves on
+    # advance(), which runs the tick that was scheduled, if it is due
+    def __init__(self):
+        self.now = 100.0
+        self.scheduled = None  # (callback, when)
+
+    def monotonic(self):
+        return self.now
+
+    def schedule_once(self, callback, timeout):
+        self.scheduled = (callback, self.now + timeout)
+        return self
+
+    def cancel(self):
+        self.scheduled = None
+
+    def advance(self, seconds):
+        end = self.now + seconds
+        while self.scheduled is not None and self.scheduled[1] <= end:
+            callback, when = self.scheduled
+            self.scheduled = None
+            self.now = when
+            callback(0)
+        self.now = end
+
+
+@pytest.fixture
+def fake(monkeypatch):
+    fake = FakeTime()
+    monkeypatch.setattr(gameclock, 'time', SimpleNamespace(monotonic=fake.monotonic))
+    monkeypatch.setattr(gameclock, 'Clock', fake)
+    return fake
+
+
+def started(duration):
+    clock = GameClock()
+    shown, expired = [], []
+    clock.start('game', duration, shown.append, lambda: expired.append(True))
+    return clock, shown, expired
+
+
+def test_shows_every_whole_second_then_expires(fake):
+    clock, shown, expired = started(3)
+    fake.advance(10)
+    assert shown == [3, 2, 1, 0]
+    assert expired == [True] and 'game' not in clock.timers
+
+
+def test_pause_holds_the_time_left(fake):
+    clock, shown, _ = started(10)
+    fake.advance(2.5)
+    clock.pause()
+    fake.advance(30)
+    assert clock.remaining('game') == 7.5
+    assert shown[-1] == 8 and fake.scheduled is None
+
+
+def test_pause_across_the_deadline_does_not_expire(fake):
+    clock, shown, expired = started(10)
+    fake.advance(4)
+    clock.pause()
+    fake.advance(60)  # Well past the deadline the timer was started with
+    assert not expired and clock.remaining('game') == 6
+    clock.resume()
+    fake.advance(5.5)
+    assert not expired and shown[-1] == 1
+    fake.advance(0.5)
+    assert expired == [True] and shown[-1] == 0
+
+
+def test_pause_and_resume_one_owner_leaves_the_others_running(fake):
+    clock = GameClock()
+    clock.start('game', 10, lambda seconds: None)
+    clock.start('online', 10, lambda seconds: None)
+    fake.advance(1)
+    clock.pause('online')
+    fake.advance(3)
+    assert clock.remaining('game') == 6 and clock.remaining('online') == 9
+    clock.resume('online')
+    fake.advance(1)
+    assert clock.remaining('game') == 5 and clock.remaining('online') == 8
+
+
+def test_pausing_twice_keeps_the_first_time_left(fake):
+    clock, _, _ = started(10)
+    fake.advance(2)
+    clock.pause()
+    fake.advance(3)
+    clock.pause()
+    clock.resume()
+    assert clock.remaining('game') == 8
+
+
+def test_stop_ends_the_timer_without_expiring(fake):
+    clock, _, expired = started(5)
+    fake.advance(1)
+    clock.stop('game')
+    fake.advance(10)
+    assert not expired and clock.remaining('game') == 0.0 and fake.scheduled is None
+
+
+def test_starting_again_replaces_the_timer(fake):
+    clock, _, expired = started(5)
+    fake.advance(4)
+    clock.start('game', 5, lambda seconds: None)
+    fake.advance(4)
+    assert not expired and clock.remaining('game') == 1
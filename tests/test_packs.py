@@ -0,0 +1,92 @@
+import os
+
+import pytest
+
+from packs import build, AssetPack, HEADER, ENTRY
+
+FILES = {
+    'assets/a.png': b'\x89PNG first card',
+    'assets/sounds/click.wav': bytes(range(256)) * 4,
+    'assets/empty.txt': b'',
+}
+
+
+@pytest.fixture
+def pack_path(tmp_path):
+    root = tmp_path / 'root'
+    for name, data in FILES.items():
+        path = root / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(data)
+    path = str(tmp_path / 'assets.pack')
+    assert build(path, str(root)) == (len(FILES), sum(len(data) for data in FILES.values()))
+    return path
+
+
+def rewrite(path, change):
+    with open(path, 'rb') as pack:
+        data = bytearray(pack.read())
+    change(data)
+    with open(path, 'wb') as pack:
+        pack.write(data)
+
+
+def test_round_trip_reads_every_file_back(pack_path):
+    pack = AssetPack(pack_path)
+    assert sorted(pack.entries) == sorted(FILES)
+    for name, data in FILES.items():
+        assert name in pack
+        assert pack.read(name) == data
+    assert 'assets/missing.png' not in pack
+    assert not os.path.exists(pack_path + '.tmp')
+
+
+def test_blobs_follow_the_index_in_name_order(pack_path):
+    pack = AssetPack(pack_path)
+    _, _, count, index_size = HEADER.unpack_from(pack.data)
+    offsets = [pack.entries[name][0] for name in sorted(FILES)]
+    assert count == len(FILES)
+    assert offsets[0] == HEADER.size + index_size
+    assert offsets == sorted(offsets)
+    assert pack.entries[sorted(FILES)[-1]][0] + len(FILES[sorted(FILES)[-1]]) == len(pack.data)
+
+
+def test_wrong_magic_is_not_a_pack(pack_path):
+    rewrite(pack_path, lambda data: data.__setitem__(slice(0, 4), b'ZIP!'))
+    with pytest.raises(ValueError, match="not an asset pack"):
+        AssetPack(pack_path)
+
+
+def test_file_shorter_than_the_header_is_not_a_pack(tmp_path):
+    path = tmp_path / 'short.pack'
+    path.write_bytes(b'MGPK')
+    with pytest.raises(ValueError, match="not an asset pack"):
+        AssetPack(str(path))
+
+
+def test_index_past_the_end_of_the_file_is_truncated(pack_path):
+    rewrite(pack_path, lambda data: HEADER.pack_into(data, 0, b'MGPK', 1, len(FILES), len(data)))
+    with pytest.raises(ValueError, match="truncated"):
+        AssetPack(pack_path)
+
+
+def test_blob_past_the_end_of_the_mapping_is_refused(pack_path):
+    # A pack cut short loses the end of its last blob
+    rewrite(pack_path, lambda data: data.__delitem__(slice(-1, None)))
+    with pytest.raises(ValueError, match="corrupt index"):
+        AssetPack(pack_path)
+
+
+def test_blob_inside_the_index_is_refused(pack_path):
+    rewrite(pack_path, lambda data: ENTRY.pack_into(data, HEADER.size, 0, 4, len('assets/a.png')))
+    with pytest.raises(ValueError, match="corrupt index"):
+        AssetPack(pack_path)
+
+
+def test_more_entries_than_the_index_holds_are_refused(pack_path):
+    def change(data):
+        magic, version, count, index_size = HEADER.unpack_from(data)
+        HEADER.pack_into(data, 0, magic, version, count + 1, index_size)
+    rewrite(pack_path, change)
+    with pytest.raises(ValueError, match="corrupt index"):
+        AssetPack(pack_path)
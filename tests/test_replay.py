@@ -0,0 +1,139 @@
+import struct
+
+import pytest
+
+pytest.importorskip('numpy')  # ReplayReader reads the records with it
+
+import replay
+from engine import MemoryBoard, FLIP_IGNORED, PLAYING, WON, LOST
+from replay import ReplayWriter, ReplayReader, RECORD, FLIP, MATCH, END, MAX_ELAPSED
+
+
+def play(log, board, moves):
+    # Flips and checks every pair of moves as the game screen does, logging each step
+    for first, second in moves:
+        for index in (first, second):
+            log.flip(index, board.flip(index))
+        log.match(board.check_match(), board.num_attempts)
+    log.end(board.state, board.num_attempts)
+
+
+def recorded(tmp_path, moves, max_attempts=20):
+    path = str(tmp_path / 'replay.bin')
+    log = ReplayWriter(path)
+    board = MemoryBoard(6, max_attempts, seed=11)
+    log.begin('normal', board, 90, pipelined=True)
+    play(log, board, moves)
+    log.close()
+    return path, board
+
+
+def test_round_trip(tmp_path):
+    path, board = recorded(tmp_path, [(0, 1), (2, 3), (0, 0), (4, 5)])
+    reader = ReplayReader(path)
+    assert len(reader) == 1
+    session = reader.session(0)
+    assert (session.level, session.num_cards, session.seed) == ('normal', 12, 11)
+    assert (session.pipelined, session.max_attempts, session.time_limit) == (True, 20, 90)
+    assert session.outcome() == board.state
+
+    replayed = replay.replay(session)
+    assert replayed.num_attempts == board.num_attempts
+    assert bytes(replayed.matched) == bytes(board.matched)
+    assert replayed.state == board.state
+    flips = [(a, b) for kind, a, b, seconds in session.events() if kind == FLIP]
+    assert flips[5] == (FLIP_IGNORED, 0)  # The same card twice
+
+
+def test_sessions_append(tmp_path):
+    recorded(tmp_path, [(0, 1)])
+    path, _ = recorded(tmp_path, [(2, 3)], max_attempts=1)
+    reader = ReplayReader(path)
+    assert len(reader) == 2
+    assert reader.session(1).max_attempts == 1
+    assert reader.summary()['normal']['sessions'] == 2
+    reader.close()
+
+
+def test_time_up_replays_as_lost(tmp_path):
+    path = str(tmp_path / 'replay.bin')
+    log = ReplayWriter(path)
+    board = MemoryBoard(6, 20, seed=11)
+    log.begin('easy', board, 90)
+    log.flip(0, board.flip(0))
+    board.time_up()
+    log.end(board.state, board.num_attempts)
+    log.close()
+
+    reader = ReplayReader(path)
+    assert replay.replay(reader.session(0)).state == LOST
+    reader.close()
+
+
+def test_left_game_replays_unfinished(tmp_path):
+    path = str(tmp_path / 'replay.bin')
+    log = ReplayWriter(path)
+    board = MemoryBoard(6, 20, seed=11)
+    log.begin('easy', board, 90)
+    log.flip(0, board.flip(0))
+    log.end(PLAYING, board.num_attempts)
+    log.close()
+
+    reader = ReplayReader(path)
+    assert replay.replay(reader.session(0)).state == PLAYING
+    assert reader.summary()['easy']['unfinished'] == 1
+    reader.close()
+
+
+def tampered(path, kind, change):
+    # Rewrites the first record of kind with change(a, b) -> (a, b)
+    with open(path, 'r+b') as log:
+        data = bytearray(log.read())
+        for offset in range(0, len(data), RECORD.size):
+            record_kind, a, b, value = RECORD.unpack_from(data, offset)
+            if record_kind == kind:
+                RECORD.pack_into(data, offset, record_kind, *change(a, b), value)
+                break
+        log.seek(0)
+        log.write(data)
+
+
+@pytest.mark.parametrize('kind, change', [
+    (FLIP, lambda a, b: (FLIP_IGNORED, b)),
+    (MATCH, lambda a, b: (a, b + 1)),
+    (MATCH, lambda a, b: (not a, b)),
+    (END, lambda a, b: (WON, b)),
+])
+def test_diverging_replay_fails(tmp_path, kind, change):
+    path, _ = recorded(tmp_path, [(0, 1), (2, 3)])
+    tampered(path, kind, change)
+    reader = ReplayReader(path)
+    with pytest.raises(ValueError):
+        replay.replay(reader.session(0))
+    reader.close()
+
+
+def test_torn_record_is_ignored(tmp_path):
+    path, board = recorded(tmp_path, [(0, 1)])
+    with open(path, 'ab') as log:
+        log.write(struct.pack('<BB', FLIP, 1))
+    reader = ReplayReader(path)
+    assert replay.replay(reader.session(0)).state == board.state
+    reader.close()
+
+
+def test_session_time_is_capped_and_stops_while_paused(tmp_path, monkeypatch):
+    now = [0]
+    monkeypatch.setattr(replay.time, 'monotonic_ns', lambda: now[0])
+    log = ReplayWriter(str(tmp_path / 'replay.bin'))
+    log.begin('easy', MemoryBoard(6, 20, seed=11), 90)
+    now[0] = 2_000_000
+    log.pause()
+    now[0] = 10_000_000_000
+    assert log._elapsed() == 2_000
+    log.resume()
+    assert log._elapsed() == 2_000
+    now[0] += 80 * 60 * 10**9
+    assert log._elapsed() == MAX_ELAPSED
+    log.end(PLAYING, 0)
+    log.close()
@@ -0,0 +1,194 @@
+import asyncio
+
+from engine import WON, LOST
+from levels import LEVELS
+from replay import RECORD, LEVEL_NAMES
+from server import MatchServer, read_records, JOIN, FLIP, START, LIMITS, SHOW, CHECKED, END, DRAW
+
+
+class FakePlayer:
+    # Takes a seat like server.Player, keeping what it is sent
+    def __init__(self):
+        self.match = None
+        self.seat = 0
+        self.received = []
+
+    def send(self, kind, a=0, b=0, value=0):
+        self.received.append((kind, a, b, value))
+
+    def last(self, kind):
+        return [record for record in self.received if record[0] == kind][-1]
+
+
+def pairs(board):
+    # face id -> its two positions
+    positions = {}
+    for index in range(board.num_cards):
+        positions.setdefault(board.face(index), []).append(index)
+    return list(positions.values())
+
+
+def mismatch(board):
+    first, second = pairs(board)[:2]
+    return first[0], second[0]
+
+
+def run(test):
+    # Matches set their deadline on the running loop, so each test runs in one
+    async def main():
+        return test()
+    return asyncio.run(main())
+
+
+def matched_players(level='easy'):
+    server = MatchServer()
+    players = [FakePlayer(), FakePlayer()]
+    for player in players:
+        server.join(player, level)
+    return server, players
+
+
+def test_read_records_joins_records_split_across_reads():
+    async def main():
+        reader = asyncio.StreamReader()
+        data = RECORD.pack(JOIN, 1, 0, 0) + RECORD.pack(FLIP, 0, 5, 0) + RECORD.pack(FLIP, 0, 300, 0)
+        for start in range(0, len(data), 5):
+            reader.feed_data(data[start:start + 5])
+        reader.feed_eof()
+        return [record async for record in read_records(reader)]
+
+    assert asyncio.run(main()) == [(JOIN, 1, 0, 0), (FLIP, 0, 5, 0), (FLIP, 0, 300, 0)]
+
+
+def test_second_player_on_a_level_starts_the_match():
+    def test():
+        server, (first, second) = matched_players()
+        assert len(server.matches) == 1 and not server.waiting
+        limits = LEVELS['easy']
+        assert first.received[0] == (START, 0, limits.num_pairs * 2, limits.time_limit)
+        assert second.received[0] == (START, 1, limits.num_pairs * 2, limits.time_limit)
+        assert first.last(LIMITS) == (LIMITS, 0, limits.max_attempts, 0)
+
+    run(test)
+
+
+def test_players_on_different_levels_keep_waiting():
+    def test():
+        server = MatchServer()
+        server.join(FakePlayer(), 'easy')
+        server.join(FakePlayer(), 'hard')
+        assert not server.matches and set(server.waiting) == {'easy', 'hard'}
+
+    run(test)
+
+
+def test_flip_out_of_turn_or_off_the_board_is_ignored():
+    def test():
+        _, (first, second) = matched_players()
+        match = first.match
+        match.flip(1, 0)
+        match.flip(0, match.board.num_cards)
+        assert not [record for player in (first, second) for record in player.received if record[0] == SHOW]
+
+    run(test)
+
+
+def test_pair_scores_and_keeps_the_turn():
+    def test():
+        _, (first, second) = matched_players()
+        match = first.match
+        a, b = pairs(match.board)[0]
+        match.flip(0, a)
+        match.flip(0, b)
+        assert second.received[-3:] == [(SHOW, 0, a, match.board.face(a)), (SHOW, 0, b, match.board.face(b)),
+                                         (CHECKED, 1, 0, 0)]
+        assert match.pairs == [1, 0] and match.turn == 0
+
+    run(test)
+
+
+def test_mismatch_passes_the_turn():
+    def test():
+        _, (first, second) = matched_players()
+        match = first.match
+        a, b = mismatch(match.board)
+        match.flip(0, a)
+        match.flip(0, b)
+        assert first.last(CHECKED) == (CHECKED, 0, 1, 1)
+        assert match.turn == 1 and match.pairs == [0, 0]
+
+    run(test)
+
+
+def test_last_pair_ends_the_match_for_whoever_found_more():
+    def test():
+        server, (first, second) = matched_players()
+        match = first.match
+        for a, b in pairs(match.board):
+            match.flip(match.turn, a)
+            match.flip(match.turn, b)
+        assert first.last(END) == (END, WON, 0, LEVELS['easy'].num_pairs)
+        assert first.match is None and second.match is None
+        assert not server.matches and server.finished == 1
+
+    run(test)
+
+
+def test_time_up_with_even_pairs_is_a_draw():
+    def test():
+        _, (first, _) = matched_players()
+        first.match.time_up()
+        assert first.last(END) == (END, LOST, DRAW, 0)
+
+    run(test)
+
+
+def test_leaving_forfeits_to_the_opponent():
+    def test():
+        server, (first, second) = matched_players()
+        a, b = pairs(first.match.board)[0]
+        first.match.flip(0, a)
+        first.match.flip(0, b)
+        server.leave(first)
+        assert second.last(END) == (END, LOST, 1, 1)
+
+    run(test)
+
+
+def test_leaving_while_waiting_frees_the_level():
+    def test():
+        server = MatchServer()
+        player = FakePlayer()
+        server.join(player, 'easy')
+        server.leave(player)
+        assert not server.waiting
+
+    run(test)
+
+
+def test_match_over_a_connection():
+    # JOIN from two clients gets both a START; the first player's FLIP is shown to both
+    async def main():
+        listener = await asyncio.start_server(MatchServer().handle, '127.0.0.1', 0)
+        port = listener.sockets[0].getsockname()[1]
+        clients = [await asyncio.open_connection('127.0.0.1', port) for _ in range(2)]
+        records = [read_records(reader) for reader, _ in clients]
+        for _, writer in clients:
+            writer.write(RECORD.pack(JOIN, LEVEL_NAMES.index('easy'), 0, 0))
+        starts = [await stream.__anext__() for stream in records]
+        for stream in records:
+            await stream.__anext__()  # LIMITS
+        seats = [start[1] for start in starts]
+        clients[seats.index(0)][1].write(RECORD.pack(FLIP, 0, 3, 0))
+        shown = [await stream.__anext__() for stream in records]
+        for _, writer in clients:
+            writer.close()
+        listener.close()
+        await listener.wait_closed()
+        return starts, shown
+
+    starts, shown = asyncio.run(asyncio.wait_for(main(), 10))
+    assert sorted(start[1] for start in starts) == [0, 1]
+    assert all(start[0] == START for start in starts)
+    assert [record[:3] for record in shown] == [(SHOW, 0, 3)] * 2
+    assert shown[0] == shown[1] and shown[0][3] in range(LEVELS['easy'].num_pairs)
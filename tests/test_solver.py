@@ -0,0 +1,50 @@
+from solver import Knowledge
+
+
+def test_known_pair_is_suggested_first():
+    knowledge = Knowledge(8, recall=1.0, seed=0)
+    knowledge.reveal(2, 5)
+    knowledge.reveal(6, 1)
+    knowledge.checked(False)
+    knowledge.reveal(4, 5)
+    knowledge.reveal(7, 3)
+    knowledge.checked(False)
+    assert knowledge.suggest() == (2, 4)
+
+
+def test_partner_of_the_face_up_card():
+    knowledge = Knowledge(8, recall=1.0, seed=0)
+    knowledge.reveal(2, 5)
+    knowledge.reveal(6, 1)
+    knowledge.checked(False)
+    knowledge.reveal(3, 1)
+    assert knowledge.suggest(3) == (6,)
+
+
+def test_unknown_partner_gives_an_unseen_card():
+    knowledge = Knowledge(8, recall=1.0, seed=0)
+    knowledge.reveal(2, 5)
+    knowledge.reveal(6, 1)
+    knowledge.checked(False)
+    knowledge.reveal(3, 0)
+    for _ in range(20):
+        index, = knowledge.suggest(3)
+        assert index not in (2, 3, 6)
+
+
+def test_face_up_card_it_never_saw():
+    # A hint asked for after the first card was turned over elsewhere
+    knowledge = Knowledge(8, recall=1.0, seed=0)
+    index, = knowledge.suggest(3)
+    assert index != 3 and 0 <= index < 8
+
+
+def test_matched_cards_are_never_suggested():
+    knowledge = Knowledge(4, recall=1.0, seed=0)
+    knowledge.reveal(0, 0)
+    knowledge.reveal(3, 0)
+    knowledge.checked(True)
+    for _ in range(20):
+        assert set(knowledge.suggest()) <= {1, 2}
+    knowledge.reveal(1, 1)
+    assert knowledge.suggest(1) == (2,)
@@ -0,0 +1,90 @@
+import sqlite3
+
+import stats
+from stats import StatsStore
+
+
+def store_with(tmp_path, results):
+    store = StatsStore(str(tmp_path / 'stats.db'))
+    for result in results:
+        store.record(*result)
+    store.writer.close()  # Everything queued is written, the reader stays usable
+    return store
+
+
+def test_close_writes_every_queued_result(tmp_path):
+    path = str(tmp_path / 'stats.db')
+    store = StatsStore(path)
+    for seconds in range(100):
+        store.record('easy', seconds % 2, float(seconds), 5)
+    store.close()
+    db = sqlite3.connect(path)
+    assert db.execute('SELECT COUNT(*) FROM results').fetchone() == (100,)
+    assert db.execute("SELECT played, won FROM totals WHERE level = 'easy'").fetchone() == (100, 50)
+    db.close()
+
+
+def test_a_burst_of_results_is_one_batch(tmp_path, monkeypatch):
+    batches = []
+    original = stats.insert
+    monkeypatch.setattr(stats, 'insert', lambda db, rows: batches.append(len(rows)) or original(db, rows))
+    store = store_with(tmp_path, [('easy', True, 30.0, 4)] * 10)
+    assert batches == [10]
+    store.close()
+
+
+def test_batches_hold_at_most_batch_size(tmp_path, monkeypatch):
+    batches = []
+    original = stats.insert
+    monkeypatch.setattr(stats, 'insert', lambda db, rows: batches.append(len(rows)) or original(db, rows))
+    store = store_with(tmp_path, [('easy', True, 30.0, 4)] * (stats.BATCH_SIZE + 1))
+    assert sum(batches) == stats.BATCH_SIZE + 1 and max(batches) == stats.BATCH_SIZE
+    store.close()
+
+
+def test_database_is_in_wal_mode(tmp_path):
+    store = store_with(tmp_path, [])
+    assert store._db().execute('PRAGMA journal_mode').fetchone() == ('wal',)
+    store.close()
+
+
+def test_best_times_are_won_games_of_the_level_fastest_first(tmp_path):
+    store = store_with(tmp_path, [
+        ('easy', True, 40.0, 3),
+        ('easy', False, 10.0, 20),
+        ('hard', True, 5.0, 1),
+        ('easy', True, 25.0, 8),
+        ('easy', True, 60.0, 2),
+    ])
+    assert [row[:2] for row in store.best_times('easy')] == [(25.0, 8), (40.0, 3), (60.0, 2)]
+    assert [row[:2] for row in store.best_times('easy', limit=1)] == [(25.0, 8)]
+    store.close()
+
+
+def test_fewest_attempts_break_ties_on_time(tmp_path):
+    store = store_with(tmp_path, [
+        ('normal', True, 50.0, 6),
+        ('normal', True, 45.0, 4),
+        ('normal', True, 30.0, 6),
+        ('normal', False, 20.0, 1),
+    ])
+    assert [row[:2] for row in store.fewest_attempts('normal')] == [(4, 45.0), (6, 30.0), (6, 50.0)]
+    store.close()
+
+
+def test_summary_counts_played_and_won(tmp_path):
+    store = store_with(tmp_path, [('hard', True, 50.0, 6), ('hard', False, 60.0, 12), ('hard', False, 60.0, 9)])
+    assert store.summary('hard') == {'played': 3, 'won': 1}
+    assert store.summary('easy') == {'played': 0, 'won': 0}
+    store.close()
+
+
+def test_totals_agree_with_filled_results(tmp_path):
+    store = store_with(tmp_path, [])
+    stats.fill(store, 1000)
+    db = store._db()
+    for level in ('easy', 'normal', 'hard'):
+        played, won = db.execute('SELECT COUNT(*), COALESCE(SUM(won), 0) FROM results WHERE level = ?',
+                                 (level,)).fetchone()
+        assert store.summary(level) == {'played': played, 'won': won}
+    store.close()
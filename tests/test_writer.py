@@ -0,0 +1,47 @@
+import threading
+from contextlib import contextmanager
+
+from writer import BackgroundWriter
+
+
+def test_items_are_written_in_order_before_close_returns():
+    written = []
+    writer = BackgroundWriter(lambda _, items: written.extend(items))
+    for item in range(1000):
+        writer.put(item)
+    writer.close()
+    assert written == list(range(1000))
+
+
+def test_batches_hold_at_most_batch_size():
+    batches = []
+    gate = threading.Event()
+
+    def write(_, items):
+        gate.wait()
+        batches.append(items)
+
+    writer = BackgroundWriter(write, batch_size=4, batch_wait=0.01)
+    for item in range(10):
+        writer.put(item)
+    gate.set()
+    writer.close()
+    assert [item for batch in batches for item in batch] == list(range(10))
+    assert max(len(batch) for batch in batches) <= 4
+
+
+def test_target_is_opened_and_closed_on_the_worker():
+    threads = []
+
+    @contextmanager
+    def target():
+        threads.append(threading.current_thread())
+        yield 'target'
+        threads.append(threading.current_thread())
+
+    seen = []
+    writer = BackgroundWriter(lambda target, items: seen.append(target), target)
+    writer.put(1)
+    writer.close()
+    assert seen == ['target']
+    assert threads == [writer.thread, writer.thread]
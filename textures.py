@@ -0,0 +1,86 @@
+# Texture memory budget. Screens register what their textures cost and how to
+# release and restore them; whenever the total is over budget, the textures
+# of the least recently shown screens are released until it fits again, and a
+# screen gets its textures back when it is shown. The budget is enforced once
+# a screen switch has finished, when the screen shown has loaded its textures.
+#
+#   MEMORYGAME_TEXTURE_BUDGET_MB=8 python main.py
+import os
+import time
+from collections import OrderedDict
+
+from profiling import profiler
+
+DEFAULT_BUDGET = int(float(os.environ.get('MEMORYGAME_TEXTURE_BUDGET_MB', '16')) * 1024 * 1024)
+
+
+class Owner:
+    def __init__(self, size, release, restore):
+        self.size = size        # size() -> bytes of texture memory held now
+        self.release = release  # None for textures that are never released
+        self.restore = restore
+        self.released = False
+
+
+class TextureBudget:
+    def __init__(self, budget=DEFAULT_BUDGET):
+        self.budget = budget
+        self.owners = OrderedDict()  # name -> Owner, least recently shown first
+        self.current = None
+        self.peaks = {}  # screen name -> most bytes resident while it was shown
+        self.evictions = 0
+        self.restores = 0
+
+    def register(self, name, size, release=None, restore=None):
+        self.owners[name] = Owner(size, release, restore)
+        self.owners.move_to_end(name, last=False)  # Not shown yet, so first in line
+
+    def loaded(self, name):
+        # The owner loaded textures itself, e.g. for a new level, so a
+        # release before is undone and show() has nothing to restore
+        self.owners[name].released = False
+        self.note_peak()
+
+    def resident(self):
+        return sum(owner.size() for owner in self.owners.values() if not owner.released)
+
+    def show(self, name):
+        # Call before the screen is drawn, eviction waits for enforce()
+        self.current = name
+        owner = self.owners.get(name)
+        if owner is not None:
+            self.owners.move_to_end(name)
+            if owner.released:
+                start = time.perf_counter()
+                owner.restore()
+                owner.released = False
+                self.restores += 1
+                if profiler.enabled:
+                    profiler.record('texture_restore', time.perf_counter() - start)
+        self.note_peak()
+
+    def enforce(self):
+        total = self.resident()
+        for name, owner in self.owners.items():
+            if total <= self.budget:
+                break
+            if name == self.current or owner.released or owner.release is None:
+                continue
+            total -= owner.size()
+            owner.release()
+            owner.released = True
+            self.evictions += 1
+        self.note_peak()
+
+    def note_peak(self):
+        if self.current is not None:
+            self.peaks[self.current] = max(self.peaks.get(self.current, 0), self.resident())
+
+    def report(self):
+        return {
+            'budget_bytes': self.budget,
+            'resident_bytes': self.resident(),
+            'peak_bytes': dict(self.peaks),
+            'evictions': self.evictions,
+            'restores': self.restores,
+        }
@@ -0,0 +1,120 @@
+# Downscaled variants of the image assets, so a small window never decodes or
+# uploads more pixels than it can show.
+#
+#   python variants.py [assets]
+#
+# The build step writes every image in one size per density bucket that is
+# smaller than the source, named by the source's content hash. Sources whose
+# hash is already in the manifest are never processed again. At runtime pick()
+# returns the smallest variant that still covers the size it is drawn at.
+import argparse
+import hashlib
+import json
+import os
+
+# Paths use forward slashes so manifest keys match the sources as the app names them
+ASSETS_DIR = 'assets'
+VARIANTS_DIR = ASSETS_DIR + '/variants'
+MANIFEST = VARIANTS_DIR + '/manifest.json'
+
+# Longest edge in pixels of each density bucket
+BUCKETS = (64, 128, 256, 512, 1024)
+
+
+def content_hash(path):
+    with open(path, 'rb') as source:
+        return hashlib.sha256(source.read()).hexdigest()
+
+
+def build(assets_dir=ASSETS_DIR, variants_dir=None):
+    from PIL import Image  # Only the build step needs Pillow
+
+    variants_dir = variants_dir or assets_dir + '/variants'
+    manifest_path = variants_dir + '/manifest.json'
+    os.makedirs(variants_dir, exist_ok=True)
+    try:
+        with open(manifest_path) as manifest_file:
+            old = json.load(manifest_file)
+    except (OSError, ValueError):
+        old = {}
+
+    manifest, built, cached = {}, 0, 0
+    for name in sorted(os.listdir(assets_dir)):
+        source = f'{assets_dir}/{name}'
+        if not name.lower().endswith('.png') or not os.path.isfile(source):
+            continue
+        stat = os.stat(source)
+        digest = content_hash(source)
+        entry = old.get(source)
+        if entry and entry['sha256'] == digest and all(os.path.exists(path) for path in entry['variants'].values()):
+            entry.update(bytes=stat.st_size, mtime_ns=stat.st_mtime_ns)
+            manifest[source] = entry
+            cached += 1
+            continue
+
+        with Image.open(source) as image:
+            image.load()
+            width, height = image.size
+            variants = {}
+            for bucket in BUCKETS:
+                scale = bucket / max(width, height)
+                if scale >= 1:
+                    break
+                path = f'{variants_dir}/{digest[:16]}-{bucket}.png'
+                if not os.path.exists(path):  # Same content under another name
+                    size = (max(round(width * scale), 1), max(round(height * scale), 1))
+                    image.resize(size, Image.LANCZOS).save(path, optimize=True)
+                variants[bucket] = path
+        manifest[source] = {'sha256': digest, 'size': [width, height], 'bytes': stat.st_size,
+                            'mtime_ns': stat.st_mtime_ns, 'variants': variants}
+        built += 1
+
+    with open(manifest_path, 'w') as manifest_file:
+        json.dump(manifest, manifest_file, indent=1)
+    return built, cached
+
+
+class AssetVariants:
+    def __init__(self, manifest=MANIFEST, pack=None):
+        # With a pack, the manifest and variants are read from it, see packs.py
+        self.pack = pack
+        try:
+            if pack is not None:
+                self.entries = json.loads(pack.read(manifest))
+            else:
+                with open(manifest) as manifest_file:
+                    self.entries = json.load(manifest_file)
+        except (OSError, KeyError, ValueError):
+            self.entries = {}  # Build step not run, every source is used as it is
+
+    def pick(self, source, width, height):
+        # Smallest variant covering width x height pixels, or the source itself
+        entry = self.entries.get(source)
+        if entry is None:
+            return source
+        if self.pack is None:  # A pack is packed with its variants, so they never go stale
+            try:
+                stat = os.stat(source)
+            except OSError:
+                return source
+            if stat.st_size != entry['bytes'] or stat.st_mtime_ns != entry['mtime_ns']:
+                return source  # Changed since the build step ran
+        source_width, source_height = entry['size']
+        for bucket, path in sorted(entry['variants'].items(), key=lambda item: int(item[0])):
+            scale = int(bucket) / max(source_width, source_height)
+            if source_width * scale >= width and source_height * scale >= height:
+                return path
+        return source
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build downscaled variants of the image assets.")
+    parser.add_argument('assets', nargs='?', default=ASSETS_DIR)
+    args = parser.parse_args()
+
+    built, cached = build(args.assets)
+    print(f"{built} images processed, {cached} unchanged")
+
+
+if __name__ == "__main__":
+    main()
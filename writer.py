@@ -0,0 +1,51 @@
+# Worker thread for writes the UI thread should never wait on: the replay log,
+# autosave snapshots and the results store. Items are queued by the caller and
+# handed to write() in batches, everything waiting at once, so a burst of
+# items costs one write instead of one each.
+import time
+from contextlib import nullcontext
+from queue import Queue, Empty
+from threading import Thread
+
+
+class BackgroundWriter:
+    # write(target, items) runs on the worker, target being what open() gave
+    # it; open() runs there too, for connections that must stay on one thread.
+    # With batch_wait a batch waits up to that many seconds for more items,
+    # until it holds batch_size.
+    def __init__(self, write, open=nullcontext, batch_size=None, batch_wait=0):
+        self.write = write
+        self.open = open
+        self.batch_size = batch_size
+        self.batch_wait = batch_wait
+        self.queue = Queue()
+        self.thread = Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def put(self, item):
+        self.queue.put(item)
+
+    def _batch(self):
+        items = [self.queue.get()]
+        deadline = time.monotonic() + self.batch_wait
+        while self.batch_size is None or len(items) < self.batch_size:
+            try:
+                items.append(self.queue.get(timeout=max(deadline - time.monotonic(), 0)))
+            except Empty:
+                break
+        return items
+
+    def _run(self):
+        with self.open() as target:
+            closing = False
+            while not closing:
+                items = self._batch()
+                closing = None in items
+                items = [item for item in items if item is not None]
+                if items:
+                    self.write(target, items)
+
+    def close(self):
+        # Writes everything queued so far, then stops the worker
+        self.queue.put(None)
+        self.thread.join()